@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+
+"""
+   Geradores de árvores e arquivos sintéticos para os benchmarks. Todos os dados
+são criados a partir de uma semente (random.Random(seed)), a mesma escala gera
+sempre os mesmos arquivos.
+"""
+
+import os
+import random
+import tarfile
+import zipfile
+
+BLOCK_SIZE = 1024 * 1024
+
+# Tamanhos usados por cada escala.
+SCALES = {
+    'small': {
+        'small_files': 2000,
+        'small_file_size': (512, 8192),
+        'huge_files': 2,
+        'huge_file_size': 64 * BLOCK_SIZE,
+        'sparse_size': 256 * BLOCK_SIZE,
+        'deep_levels': 64,
+        'deep_files': 4,
+    },
+    'medium': {
+        'small_files': 20000,
+        'small_file_size': (512, 16384),
+        'huge_files': 2,
+        'huge_file_size': 512 * BLOCK_SIZE,
+        'sparse_size': 2048 * BLOCK_SIZE,
+        'deep_levels': 256,
+        'deep_files': 8,
+    },
+    'large': {
+        'small_files': 200000,
+        'small_file_size': (512, 16384),
+        'huge_files': 4,
+        'huge_file_size': 2048 * BLOCK_SIZE,
+        'sparse_size': 16384 * BLOCK_SIZE,
+        'deep_levels': 512,
+        'deep_files': 8,
+    },
+}
+
+
+class DataSource(object):
+    """
+       Bloco pseudoaleatório reutilizado para escrever os arquivos. Cada bloco
+    escrito recebe um contador no início, os blocos não se repetem (arquivos
+    compactados não ficam artificialmente pequenos).
+    """
+    def __init__(self, seed: int=0) -> None:
+        self.rng = random.Random(seed)
+        self.block: bytes = self.rng.randbytes(BLOCK_SIZE)
+        self._counter: int = 0
+
+    def chunk(self, size: int) -> bytes:
+        self._counter += 1
+        prefix = self._counter.to_bytes(8, 'little')
+        if size <= len(prefix):
+            return prefix[:size]
+        offset = self.rng.randrange(0, BLOCK_SIZE - size + 1) if size < BLOCK_SIZE else 0
+        return prefix + self.block[offset:offset + size - len(prefix)]
+
+    def write_file(self, path: str, size: int) -> None:
+        with open(path, 'wb') as file:
+            remaining = size
+            while remaining > 0:
+                data = self.chunk(min(remaining, BLOCK_SIZE))
+                file.write(data)
+                remaining -= len(data)
+
+
+def make_small_files(root: str, source: DataSource, *, count: int, size_range: tuple, fanout: int=100) -> int:
+    """Muitos arquivos pequenos, no máximo fanout arquivos por diretório. Retorna o total de bytes."""
+    total = 0
+    for i in range(count):
+        directory = os.path.join(root, f'd{i // fanout:05d}')
+        if i % fanout == 0:
+            os.makedirs(directory, exist_ok=True)
+        size = source.rng.randint(*size_range)
+        source.write_file(os.path.join(directory, f'f{i:07d}.dat'), size)
+        total += size
+    return total
+
+
+def make_huge_files(root: str, source: DataSource, *, count: int, size: int) -> int:
+    """Poucos arquivos grandes. Retorna o total de bytes."""
+    os.makedirs(root, exist_ok=True)
+    for i in range(count):
+        source.write_file(os.path.join(root, f'huge{i}.bin'), size)
+    return count * size
+
+
+def make_sparse_file(path: str, source: DataSource, *, size: int, data_every: int=16 * BLOCK_SIZE) -> int:
+    """Arquivo esparso com um bloco de dados a cada data_every bytes. Retorna os bytes de dados."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    written = 0
+    with open(path, 'wb') as file:
+        for offset in range(0, size, data_every):
+            file.seek(offset)
+            data = source.chunk(min(BLOCK_SIZE, size - offset))
+            file.write(data)
+            written += len(data)
+        file.truncate(size)
+    return written
+
+
+def make_deep_tree(root: str, source: DataSource, *, levels: int, files_per_level: int) -> int:
+    """Diretórios aninhados (levels níveis) com alguns arquivos em cada nível. Retorna o total de bytes."""
+    total = 0
+    directory = root
+    for level in range(levels):
+        directory = os.path.join(directory, f'l{level:03d}')
+        os.makedirs(directory, exist_ok=True)
+        for i in range(files_per_level):
+            size = source.rng.randint(256, 4096)
+            source.write_file(os.path.join(directory, f'f{i}.dat'), size)
+            total += size
+    return total
+
+
+def make_archive(src_dir: str, path: str, *, format: str) -> str:
+    """Compacta src_dir em path. format = 'tar' | 'gztar' | 'zip'."""
+    base = os.path.basename(src_dir)
+    if format == 'zip':
+        with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for dirpath, dirnames, filenames in os.walk(src_dir):
+                dirnames.sort()
+                for name in sorted(filenames):
+                    file_path = os.path.join(dirpath, name)
+                    archive.write(file_path, os.path.join(base, os.path.relpath(file_path, src_dir)))
+    else:
+        mode = 'w:gz' if format == 'gztar' else 'w'
+        with tarfile.open(path, mode) as archive:
+            archive.add(src_dir, arcname=base)
+    return path
+
+
+def make_dataset(root: str, *, scale: str='small', seed: int=0) -> dict:
+    """
+       Cria todos os dados de uma escala em root e retorna {nome: informações}:
+    small (muitos arquivos pequenos), huge (poucos arquivos grandes), sparse,
+    deep (aninhamento profundo) e os arquivos compactados de small.
+    """
+    config = SCALES[scale]
+    source = DataSource(seed)
+    dataset = {}
+
+    path = os.path.join(root, 'small')
+    size = make_small_files(
+        path, source, count=config['small_files'], size_range=config['small_file_size']
+    )
+    dataset['small'] = {'path': path, 'bytes': size, 'files': config['small_files']}
+
+    path = os.path.join(root, 'huge')
+    size = make_huge_files(path, source, count=config['huge_files'], size=config['huge_file_size'])
+    dataset['huge'] = {'path': path, 'bytes': size, 'files': config['huge_files']}
+    dataset['huge_file'] = {
+        'path': os.path.join(path, 'huge0.bin'), 'bytes': config['huge_file_size'], 'files': 1
+    }
+
+    path = os.path.join(root, 'sparse', 'sparse.img')
+    make_sparse_file(path, source, size=config['sparse_size'])
+    dataset['sparse'] = {'path': os.path.dirname(path), 'bytes': config['sparse_size'], 'files': 1}
+
+    path = os.path.join(root, 'deep')
+    size = make_deep_tree(path, source, levels=config['deep_levels'], files_per_level=config['deep_files'])
+    dataset['deep'] = {
+        'path': path, 'bytes': size, 'files': config['deep_levels'] * config['deep_files']
+    }
+
+    archives = os.path.join(root, 'archives')
+    os.makedirs(archives, exist_ok=True)
+    for name, format, extension in (('tar', 'tar', 'tar'), ('tgz', 'gztar', 'tar.gz'), ('zip', 'zip', 'zip')):
+        path = make_archive(dataset['small']['path'], os.path.join(archives, f'small.{extension}'), format=format)
+        dataset[name] = {'path': path, 'bytes': os.path.getsize(path), 'files': config['small_files']}
+    return dataset
@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+
+"""
+   Benchmarks do cmdlib, comparando os backends Linux (ferramentas do sistema) e
+Python em: hashes, tamanho de diretórios, cópia, remoção, descompactação,
+detecção de tipo de arquivo, criação de processos e tempo de importação.
+
+Os dados são gerados localmente (benchmarks/generators.py), nada é baixado.
+
+USO:
+   python3 benchmarks/run.py --scale small --output result.json
+   python3 benchmarks/run.py --baseline baseline.json --threshold 0.25
+   python3 benchmarks/run.py --only 'hash.*' --repeat 5
+
+Com --baseline o resultado é comparado com um resultado salvo anteriormente, o
+código de saída é 1 se algum benchmark ficar mais lento que baseline * (1 + threshold).
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import fnmatch
+import argparse
+import platform
+import statistics
+import tempfile
+import shutil
+import contextlib
+
+file_run = os.path.abspath(os.path.realpath(__file__))
+dir_of_benchmarks = os.path.dirname(file_run)
+dir_of_project = os.path.dirname(dir_of_benchmarks)
+
+sys.path.insert(0, dir_of_project)
+sys.path.insert(0, dir_of_benchmarks)
+
+import generators
+from cmdlib.__main__ import (
+    __version__,
+    which,
+    File,
+    ShaSum,
+    ShaSumLinux,
+    ShaSumTree,
+    FileSize,
+    PythonShellCore,
+    LinuxShellCore,
+    CopyEngine,
+    UnpackLinux,
+    ShutilUnpack,
+    StreamUnpack,
+    ZipParallelUnpack,
+    ExecShellCommand,
+    detect_file_type,
+    ByteSize,
+    format_sizes,
+    run_command,
+    run_many,
+    gather_commands,
+)
+
+SPAWN_COUNT = 50
+
+
+class Benchmark(object):
+    """
+       Um benchmark: fn() é medida repeat vezes, setup() (se existir) é executada
+    antes de cada medição e não entra no tempo.
+
+    bytes/files = quantidade de dados processada por execução, usada para calcular
+                  a vazão (MB/s, arquivos/s).
+    """
+    def __init__(self, name: str, fn, *, setup=None, bytes: int=0, files: int=0, requires: tuple=()) -> None:
+        self.name: str = name
+        self.fn = fn
+        self.setup = setup
+        self.bytes: int = bytes
+        self.files: int = files
+        self.requires: tuple = requires
+
+    def missing(self) -> list:
+        """Comandos necessários que não estão instalados."""
+        return [cmd for cmd in self.requires if which(cmd) is None]
+
+    def run(self, repeat: int) -> dict:
+        times = []
+        for _ in range(repeat):
+            if self.setup is not None:
+                self.setup()
+            # A saída das funções (tar -v, cp, mensagens) não interessa aqui.
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                result = self.fn()
+                elapsed = time.perf_counter() - start
+            if result is False or result is None:
+                raise RuntimeError(f'{self.name} retornou {result!r}')
+            times.append(elapsed)
+
+        median = statistics.median(times)
+        report = {
+            'median': median,
+            'min': min(times),
+            'max': max(times),
+            'runs': times,
+        }
+        if self.bytes:
+            report['bytes'] = self.bytes
+            report['mb_per_s'] = self.bytes / median / (1024 * 1024) if median else None
+        if self.files:
+            report['files'] = self.files
+            report['files_per_s'] = self.files / median if median else None
+        return report
+
+
+def _remove(path: str) -> None:
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.unlink(path)
+
+
+def _fresh_dir(path: str):
+    """setup() que recria um diretório vazio."""
+    def setup():
+        _remove(path)
+        os.makedirs(path)
+    return setup
+
+
+def hash_benchmarks(dataset: dict, workdir: str) -> list:
+    huge_file = dataset['huge_file']
+    small = dataset['small']
+    benchmarks = [
+        Benchmark(
+            'hash.sha256.python.huge_file', lambda: ShaSum().getsha256(huge_file['path']),
+            bytes=huge_file['bytes'], files=1,
+        ),
+        Benchmark(
+            'hash.md5+sha256.python.huge_file',
+            lambda: ShaSum().get_digests(huge_file['path'], ('md5', 'sha256')),
+            bytes=huge_file['bytes'], files=1,
+        ),
+        Benchmark(
+            'hash.sha256.linux.huge_file', lambda: ShaSumLinux().getsha256(huge_file['path']),
+            bytes=huge_file['bytes'], files=1, requires=('sha256sum',),
+        ),
+        Benchmark(
+            'hash.md5+sha256.linux.huge_file',
+            lambda: ShaSumLinux().get_digests(huge_file['path'], ('md5', 'sha256')),
+            bytes=huge_file['bytes'], files=1, requires=('md5sum', 'sha256sum'),
+        ),
+        Benchmark(
+            'hash.tree.python.small', lambda: ShaSumTree().hash_tree(small['path']),
+            bytes=small['bytes'], files=small['files'],
+        ),
+    ]
+    return benchmarks
+
+
+def size_benchmarks(dataset: dict, workdir: str) -> list:
+    benchmarks = []
+    for name in ('small', 'deep', 'sparse'):
+        data = dataset[name]
+        benchmarks.append(Benchmark(
+            f'size.python.{name}', lambda path=data['path']: FileSize(path).get_size(), files=data['files'],
+        ))
+        benchmarks.append(Benchmark(
+            f'size.linux.{name}', lambda path=data['path']: LinuxShellCore().file_size(path),
+            files=data['files'], requires=('du',),
+        ))
+    return benchmarks
+
+
+def copy_benchmarks(dataset: dict, workdir: str) -> list:
+    benchmarks = []
+    dest = os.path.join(workdir, 'copy-dest')
+    for name in ('small', 'huge', 'sparse', 'deep'):
+        data = dataset[name]
+        benchmarks.append(Benchmark(
+            f'copy.python.{name}', lambda src=data['path']: PythonShellCore().copy(src, dest),
+            setup=lambda: _remove(dest), bytes=data['bytes'], files=data['files'],
+        ))
+        benchmarks.append(Benchmark(
+            f'copy.linux.{name}', lambda src=data['path']: LinuxShellCore().copy(src, dest),
+            setup=lambda: _remove(dest), bytes=data['bytes'], files=data['files'], requires=('cp',),
+        ))
+
+    # Sincronização sem alterações (nenhum arquivo deve ser copiado).
+    small = dataset['small']
+    sync_dest = os.path.join(workdir, 'sync-dest')
+
+    def sync_setup():
+        if not os.path.isdir(sync_dest):
+            CopyEngine().copy_tree(small['path'], sync_dest)
+
+    benchmarks.append(Benchmark(
+        'sync.python.small.unchanged', lambda: PythonShellCore().sync(small['path'], sync_dest),
+        setup=sync_setup, files=small['files'],
+    ))
+    benchmarks.append(Benchmark(
+        'sync.linux.small.unchanged', lambda: LinuxShellCore().sync(small['path'], sync_dest),
+        setup=sync_setup, files=small['files'], requires=('rsync',),
+    ))
+    return benchmarks
+
+
+def delete_benchmarks(dataset: dict, workdir: str) -> list:
+    benchmarks = []
+    target = os.path.join(workdir, 'delete-target')
+    for name in ('small', 'deep'):
+        data = dataset[name]
+
+        def setup(src=data['path']):
+            _remove(target)
+            CopyEngine().copy_tree(src, target)
+
+        benchmarks.append(Benchmark(
+            f'delete.python.{name}', lambda: PythonShellCore().rmdir(target),
+            setup=setup, files=data['files'],
+        ))
+        benchmarks.append(Benchmark(
+            f'delete.linux.{name}', lambda: LinuxShellCore().rmdir(target),
+            setup=setup, files=data['files'], requires=('rm',),
+        ))
+    return benchmarks
+
+
+def _unpack_with(engine_class, path: str, output_dir: str, **kw):
+    def fn():
+        engine = engine_class(output_dir=output_dir, **kw)
+        engine.unpack(File(path))
+        return engine.returnbool
+    return fn
+
+
+def unpack_benchmarks(dataset: dict, workdir: str) -> list:
+    benchmarks = []
+    output_dir = os.path.join(workdir, 'unpack-dest')
+    for name in ('tar', 'tgz', 'zip'):
+        data = dataset[name]
+        path = data['path']
+        format = 'zip' if name == 'zip' else 'tar'
+        requires = ('unzip',) if name == 'zip' else ('tar',)
+        engines = [
+            ('linux', _unpack_with(UnpackLinux, path, output_dir), requires),
+            ('shutil', _unpack_with(ShutilUnpack, path, output_dir, format=format), ()),
+            ('stream', _unpack_with(StreamUnpack, path, output_dir), ()),
+        ]
+        if name == 'zip':
+            engines.append(('zip_parallel', _unpack_with(ZipParallelUnpack, path, output_dir), ()))
+        for engine_name, fn, engine_requires in engines:
+            benchmarks.append(Benchmark(
+                f'unpack.{engine_name}.{name}', fn, setup=_fresh_dir(output_dir),
+                bytes=data['bytes'], files=data['files'], requires=engine_requires,
+            ))
+    return benchmarks
+
+
+def detect_benchmarks(dataset: dict, workdir: str) -> list:
+    paths = [dataset[name]['path'] for name in ('tar', 'tgz', 'zip', 'huge_file')]
+    rounds = 100
+
+    def detect_python():
+        for _ in range(rounds):
+            for path in paths:
+                detect_file_type(path)
+        return True
+
+    def detect_linux():
+        shellcore = LinuxShellCore()
+        for path in paths:
+            shellcore.get_type_file(path)
+        return True
+
+    return [
+        Benchmark('detect.python.header', detect_python, files=rounds * len(paths)),
+        Benchmark('detect.linux.file', detect_linux, files=len(paths), requires=('file',)),
+    ]
+
+
+def spawn_benchmarks(dataset: dict, workdir: str) -> list:
+    import asyncio
+
+    def commands():
+        # Listas novas a cada execução: ExecShellCommand limpa self.cli depois de executar.
+        return [['true'] for _ in range(SPAWN_COUNT)]
+
+    def spawn_run_command():
+        return all(run_command(cli).returnbool for cli in commands())
+
+    def spawn_exec_silent():
+        return all(ExecShellCommand(cli).exec_silent() for cli in commands())
+
+    def spawn_run_many():
+        return all(result.returnbool for result in run_many(commands()))
+
+    def spawn_gather():
+        return all(result.returnbool for result in asyncio.run(gather_commands(commands())))
+
+    return [
+        Benchmark('spawn.run_command', spawn_run_command, files=SPAWN_COUNT, requires=('true',)),
+        Benchmark('spawn.exec_silent', spawn_exec_silent, files=SPAWN_COUNT, requires=('true',)),
+        Benchmark('spawn.run_many', spawn_run_many, files=SPAWN_COUNT, requires=('true',)),
+        Benchmark('spawn.gather_commands', spawn_gather, files=SPAWN_COUNT, requires=('true',)),
+    ]
+
+
+def import_benchmarks(dataset: dict, workdir: str) -> list:
+    # O interpretador filho precisa encontrar o cmdlib deste diretório.
+    os.environ['PYTHONPATH'] = os.pathsep.join(
+        path for path in (dir_of_project, os.environ.get('PYTHONPATH')) if path
+    )
+
+    def python_code(code: str):
+        # Cada execução é um interpretador novo, sem cache de módulos.
+        def fn():
+            return run_command([sys.executable, '-c', code]).returnbool
+        return fn
+
+    return [
+        Benchmark('import.python_startup', python_code('pass')),
+        Benchmark('import.cmdlib', python_code('import cmdlib')),
+        Benchmark('import.cmdlib.shellcore', python_code('import cmdlib; cmdlib.shellcore')),
+    ]
+
+
+def format_benchmarks(dataset: dict, workdir: str) -> list:
+    sizes = [os.stat(os.path.join(dirpath, name)).st_size
+             for dirpath, _, names in os.walk(dataset['small']['path']) for name in names]
+    sizes = sizes * max(1, 100000 // len(sizes))
+
+    def bytesize_sum():
+        total = ByteSize(0)
+        for size in sizes:
+            total += size
+        return format(total, '.2f')
+
+    return [
+        Benchmark('format.bytesize_sum', bytesize_sum, files=len(sizes)),
+        Benchmark('format.bytesize_each', lambda: [format(ByteSize(size), '.2f') for size in sizes], files=len(sizes)),
+        Benchmark('format.format_sizes', lambda: format_sizes(sizes), files=len(sizes)),
+    ]
+
+
+GROUPS = (
+    hash_benchmarks,
+    size_benchmarks,
+    copy_benchmarks,
+    delete_benchmarks,
+    unpack_benchmarks,
+    detect_benchmarks,
+    spawn_benchmarks,
+    import_benchmarks,
+    format_benchmarks,
+)
+
+
+def compare(results: dict, baseline: dict, *, threshold: float) -> list:
+    """
+       Compara os resultados com baseline (mesmo formato do JSON gerado), retorna
+    uma lista de (nome, mediana_baseline, mediana_atual, razão) dos benchmarks que
+    ficaram mais lentos que baseline * (1 + threshold).
+    """
+    regressions = []
+    for name, base in baseline.get('results', {}).items():
+        current = results['results'].get(name)
+        if (current is None) or ('median' not in current) or ('median' not in base):
+            continue
+        ratio = current['median'] / base['median'] if base['median'] else 1.0
+        if ratio > 1.0 + threshold:
+            regressions.append((name, base['median'], current['median'], ratio))
+    return regressions
+
+
+def run(args) -> dict:
+    workdir = tempfile.mkdtemp(prefix='cmdlib-bench-', dir=args.workdir)
+    try:
+        print(f'Gerando dados ({args.scale}) em ... {workdir}', file=sys.stderr)
+        start = time.perf_counter()
+        dataset = generators.make_dataset(os.path.join(workdir, 'data'), scale=args.scale, seed=args.seed)
+        print(f'Dados gerados em {time.perf_counter() - start:.1f}s', file=sys.stderr)
+
+        results = {
+            'meta': {
+                'cmdlib': __version__,
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'scale': args.scale,
+                'seed': args.seed,
+                'repeat': args.repeat,
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            },
+            'results': {},
+        }
+        for group in GROUPS:
+            for benchmark in group(dataset, workdir):
+                if args.only and not any(fnmatch.fnmatch(benchmark.name, pattern) for pattern in args.only):
+                    continue
+                missing = benchmark.missing()
+                if missing:
+                    results['results'][benchmark.name] = {'skipped': f'comando não encontrado: {" ".join(missing)}'}
+                    print(f'{benchmark.name:40} IGNORADO ({" ".join(missing)})', file=sys.stderr)
+                    continue
+                try:
+                    report = benchmark.run(args.repeat)
+                except Exception as e:
+                    results['results'][benchmark.name] = {'error': f'{type(e).__name__}: {e}'}
+                    print(f'{benchmark.name:40} ERRO {e}', file=sys.stderr)
+                    continue
+                results['results'][benchmark.name] = report
+                extra = ''
+                if report.get('mb_per_s'):
+                    extra = f'{report["mb_per_s"]:10.1f} MB/s'
+                elif report.get('files_per_s'):
+                    extra = f'{report["files_per_s"]:10.1f} /s'
+                print(f'{benchmark.name:40} {report["median"] * 1000:10.2f} ms {extra}', file=sys.stderr)
+        return results
+    finally:
+        if args.keep:
+            print(f'Dados mantidos em ... {workdir}', file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks do cmdlib.')
+    parser.add_argument('--scale', choices=sorted(generators.SCALES), default='small')
+    parser.add_argument('--repeat', type=int, default=3, help='medições por benchmark (mediana).')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', action='append', help='padrão (fnmatch) dos benchmarks, ex: "hash.*".')
+    parser.add_argument('--workdir', help='diretório dos dados temporários (padrão: /tmp).')
+    parser.add_argument('--keep', action='store_true', help='não apaga os dados gerados.')
+    parser.add_argument('--output', help='arquivo JSON de saída (padrão: stdout).')
+    parser.add_argument('--baseline', help='JSON de um resultado anterior para comparação.')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='tolerância em relação ao baseline (0.25 = 25%% mais lento).')
+    args = parser.parse_args()
+
+    results = run(args)
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, threshold=args.threshold)
+        for name, base, current, ratio in regressions:
+            print(f'REGRESSÃO {name}: {base * 1000:.2f} ms -> {current * 1000:.2f} ms ({ratio:.2f}x)', file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,26 +1,75 @@
 #!/usr/bin/env python3
 
-from platform import system
-
-if system() == 'Linux':
-    from .__main__ import (
-        is_admin,
-        sudo_command,
-        device_ismounted,
-        LinuxShellCore,
-        gpg_utils,
-    )
-
-
-from .__main__ import (
-    __version__,
-    shellcore,
-    ExecShellCommand,
-    PythonShellCore,
-    File,
-    ByteSize,
-    unpack,
-    get_term_col,
-    get_bytes,
-    shasum,
+"""
+   Os nomes são importados de cmdlib.__main__ apenas no primeiro acesso, assim
+'import cmdlib' não carrega o python-magic nem cria os objetos globais.
+"""
+
+import sys
+
+_NAMES_LINUX = (
+    'is_admin',
+    'sudo_command',
+    'device_ismounted',
+    'mounted_devices',
+    'MountTable',
+    'LinuxShellCore',
+    'gpg_utils',
+    'RootHelper',
+    'get_root_helper',
 )
+
+_NAMES = (
+    '__version__',
+    'shellcore',
+    'ExecShellCommand',
+    'AsyncExecShellCommand',
+    'CommandResult',
+    'gather_commands',
+    'run_command',
+    'run_many',
+    'PythonShellCore',
+    'CopyEngine',
+    'SyncPlan',
+    'RemoveEngine',
+    'ShellPlan',
+    'ShellOperation',
+    'FileSize',
+    'FolderSizeIndex',
+    'File',
+    'detect_file_type',
+    'ByteSize',
+    'format_sizes',
+    'unpack',
+    'get_term_col',
+    'Progress',
+    'TerminalProgress',
+    'events',
+    'Event',
+    'LoggingSink',
+    'PrometheusTextfileSink',
+    'SpanRecorder',
+    'get_bytes',
+    'iter_chunks',
+    'shasum',
+    'ShaSumTree',
+    'DigestCache',
+)
+
+if sys.platform == 'linux':
+    __all__ = list(_NAMES_LINUX + _NAMES)
+else:
+    __all__ = list(_NAMES)
+
+
+def __getattr__(name: str):
+    if name not in __all__:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    from . import __main__ as _main
+    value = getattr(_main, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -13,29 +13,46 @@ __download_file__ = 'https://github.com/Brunopvh/cmd-lib/archive/refs/heads/main
 
 import sys
 import os
-import hashlib
-
-from shutil import (
-    which,
-    copytree,
-    copy,
-    rmtree,
-    unpack_archive,
-)
+import time
+import threading
+import signal
+import selectors
+import select
+import codecs
+import atexit
+import struct
+import stat
 
 from subprocess import (
     PIPE,
+    DEVNULL,
     Popen,
-    run as subprocess_run
+    TimeoutExpired,
 )
 
-from pathlib import Path
+from collections import deque
+
+# Módulos usados apenas por algumas operações (magic, hashlib, shutil, asyncio,
+# concurrent.futures, ...) são importados dentro das funções que os usam, assim
+# 'import cmdlib' continua rápido e não depende do python-magic.
+
+
+def from_file(file: str) -> str:
+    """
+       Retorna a descrição do arquivo gerada pelo libmagic (python-magic). O módulo
+    magic é importado apenas na primeira chamada.
+    """
+    try:
+        from magic import from_file as magic_from_file
+    except Exception as e:
+        raise ImportError(f'python-magic não está disponível ({e}) ... pip3 install python-magic --user')
+    return magic_from_file(file)
+
 
-try:
-    from magic import from_file
-except Exception as e:
-    print(e)
-    sys.exit(1)
+def which(cmd: str) -> str:
+    """Igual a shutil.which(), importa o shutil apenas quando necessário."""
+    from shutil import which as shutil_which
+    return shutil_which(cmd)
 
 
 def get_term_col() -> int:
@@ -48,6 +65,606 @@ def get_term_col() -> int:
     return _col
 
 
+def get_max_workers() -> int:
+    """Retorna o número padrão de threads para operações de I/O em paralelo."""
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+def _bounded_map(executor, fn, iterable, *, max_inflight: int, ordered: bool=True):
+    """
+       Executa fn(item) para cada item de iterable no executor, mantendo no máximo
+    max_inflight tarefas pendentes. Os resultados são gerados na ordem de iterable
+    (ordered=True) ou conforme as tarefas terminam (ordered=False).
+    """
+    from concurrent.futures import wait as wait_futures, FIRST_COMPLETED
+
+    if ordered:
+        pending = deque()
+    else:
+        pending = set()
+
+    try:
+        for item in iterable:
+            if ordered:
+                pending.append(executor.submit(fn, item))
+                if len(pending) >= max_inflight:
+                    yield pending.popleft().result()
+            else:
+                pending.add(executor.submit(fn, item))
+                if len(pending) >= max_inflight:
+                    done, pending = wait_futures(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+
+        while pending:
+            if ordered:
+                yield pending.popleft().result()
+            else:
+                done, pending = wait_futures(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+#===============================================================#
+# Instrumentação
+#===============================================================#
+
+class Event(object):
+    """
+       Um evento emitido por uma operação do cmdlib.
+
+    name      = command | hash | size | copy | remove | sync | unpack
+    timestamp = time.time() do fim da operação.
+    wall_time = duração em segundos (None se o início não foi medido).
+    fields    = dados da operação (returncode, bytes, files, ...).
+    """
+    __slots__ = ('name', 'timestamp', 'wall_time', 'fields')
+
+    def __init__(self, name: str, *, wall_time: float=None, fields: dict=None) -> None:
+        self.name: str = name
+        self.timestamp: float = time.time()
+        self.wall_time: float = wall_time
+        self.fields: dict = fields or {}
+
+    def to_dict(self) -> dict:
+        return {'name': self.name, 'timestamp': self.timestamp, 'wall_time': self.wall_time, **self.fields}
+
+    def __repr__(self):
+        return '{}({!r}, wall_time={}, fields={!r})'.format(
+            self.__class__.__name__, self.name, self.wall_time, self.fields
+        )
+
+
+class EventBus(object):
+    """
+       Distribui os eventos para os sinks (qualquer função sink(event)).
+
+    Sem nenhum sink events.enabled é False e as operações não medem nada, o custo
+    da instrumentação desativada é apenas a verificação desse atributo:
+
+        events.add_sink(LoggingSink())
+        events.add_sink(PrometheusTextfileSink('/var/lib/node_exporter/cmdlib.prom'))
+    """
+    def __init__(self) -> None:
+        self.enabled: bool = False
+        self._sinks: tuple = ()
+        self._lock = threading.Lock()
+
+    def add_sink(self, sink) -> None:
+        with self._lock:
+            self._sinks = self._sinks + (sink,)
+            self.enabled = True
+
+    def remove_sink(self, sink) -> None:
+        with self._lock:
+            self._sinks = tuple(s for s in self._sinks if s is not sink)
+            self.enabled = bool(self._sinks)
+
+    @property
+    def sinks(self) -> tuple:
+        return self._sinks
+
+    def emit(self, name: str, *, start: float=None, **fields) -> None:
+        """
+           Envia um evento para os sinks. start = time.monotonic() do início da
+        operação (para calcular wall_time).
+        """
+        sinks = self._sinks
+        if not sinks:
+            return
+        wall_time = (time.monotonic() - start) if start is not None else None
+        event = Event(name, wall_time=wall_time, fields=fields)
+        for sink in sinks:
+            try:
+                sink(event)
+            except Exception as e:
+                print(f'{__class__.__name__} ERRO no sink {sink!r} ... {e}', file=sys.stderr)
+
+
+events = EventBus()
+
+
+def _wait_process(proc: Popen):
+    """
+       Aguarda o fim de proc. Com a instrumentação ativa o processo é aguardado com
+    os.wait4() e o uso de recursos (tempo de CPU) é retornado, caso contrário None.
+    """
+    if events.enabled and hasattr(os, 'wait4') and (proc.returncode is None):
+        while True:
+            try:
+                _, status, rusage = os.wait4(proc.pid, 0)
+            except InterruptedError:
+                continue
+            except ChildProcessError:
+                break
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            return rusage
+    proc.wait()
+    return None
+
+
+def _emit_command(cli: list, *, start: float, spawn_time: float, returncode: int, rusage=None, **fields) -> None:
+    if rusage is not None:
+        fields['user_time'] = rusage.ru_utime
+        fields['system_time'] = rusage.ru_stime
+    events.emit(
+        'command', start=start, cli=list(cli), returncode=returncode, spawn_time=spawn_time, **fields
+    )
+
+
+class LoggingSink(object):
+    """Envia os eventos para um logger (logging), um evento por linha."""
+    def __init__(self, logger=None, *, level: int=None) -> None:
+        import logging
+
+        self.logger = logger or logging.getLogger('cmdlib')
+        self.level: int = logging.INFO if level is None else level
+
+    def __call__(self, event: Event) -> None:
+        if not self.logger.isEnabledFor(self.level):
+            return
+        fields = ' '.join(f'{key}={value!r}' for key, value in event.fields.items())
+        if event.wall_time is not None:
+            self.logger.log(self.level, '%s wall_time=%.6f %s', event.name, event.wall_time, fields)
+        else:
+            self.logger.log(self.level, '%s %s', event.name, fields)
+
+
+class PrometheusTextfileSink(object):
+    """
+       Acumula contadores dos eventos e os grava no formato texto do Prometheus
+    (textfile collector do node_exporter).
+
+    path     = arquivo .prom, gravado de forma atômica (arquivo temporário + os.replace).
+    interval = intervalo mínimo em segundos entre duas gravações, o arquivo também
+               é gravado em close() e na saída do programa.
+
+    Métricas (prefix_): events_total, errors_total, seconds_total, cpu_seconds_total,
+    bytes_total e files_total, todas com o rótulo event (nome do evento).
+    """
+    # Campos numéricos somados em bytes_total{field=...}.
+    BYTES_FIELDS = ('bytes', 'bytes_read', 'bytes_written', 'bytes_hashed')
+
+    def __init__(self, path: str, *, prefix: str='cmdlib', interval: float=10.0) -> None:
+        self.path: str = path
+        self.prefix: str = prefix
+        self.interval: float = interval
+        self._counters: dict = {}
+        self._last_write: float = 0.0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        atexit.register(self.close)
+
+    def _add(self, metric: str, labels: tuple, value: float) -> None:
+        key = (metric, labels)
+        self._counters[key] = self._counters.get(key, 0) + value
+
+    def __call__(self, event: Event) -> None:
+        fields = event.fields
+        labels = (('event', event.name),)
+        with self._lock:
+            self._add('events_total', labels, 1)
+            if (fields.get('returncode') not in (None, 0)) or (fields.get('returnbool') is False):
+                self._add('errors_total', labels, 1)
+            if event.wall_time is not None:
+                self._add('seconds_total', labels, event.wall_time)
+            for mode in ('user', 'system'):
+                if fields.get(f'{mode}_time') is not None:
+                    self._add('cpu_seconds_total', labels + (('mode', mode),), fields[f'{mode}_time'])
+            for name in self.BYTES_FIELDS:
+                if fields.get(name):
+                    self._add('bytes_total', labels + (('field', name),), fields[name])
+            if fields.get('files'):
+                self._add('files_total', labels, fields['files'])
+            write = (time.monotonic() - self._last_write) >= self.interval
+        if write:
+            self.write()
+
+    def render(self) -> str:
+        """Retorna as métricas no formato texto do Prometheus."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+        lines = []
+        last_metric = None
+        for (metric, labels), value in counters:
+            name = f'{self.prefix}_{metric}'
+            if metric != last_metric:
+                lines.append(f'# TYPE {name} counter')
+                last_metric = metric
+            label_text = ','.join(f'{key}="{value_}"' for key, value_ in labels)
+            lines.append(f'{name}{{{label_text}}} {value:.9g}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self) -> None:
+        # Uma gravação por vez, o arquivo temporário é único por processo e thread.
+        with self._write_lock:
+            self._last_write = time.monotonic()
+            temp_path = f'{self.path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            try:
+                with open(temp_path, 'w') as file:
+                    file.write(self.render())
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                print(f'{__class__.__name__} ERRO ao gravar {self.path} ... {e}', file=sys.stderr)
+
+    def close(self) -> None:
+        if self._counters:
+            self.write()
+
+
+class SpanRecorder(object):
+    """
+       Guarda os últimos max_spans eventos em memória (self.spans), para inspeção
+    local ou para exportar em JSON (to_json()).
+    """
+    def __init__(self, *, max_spans: int=10000) -> None:
+        self.spans: deque = deque(maxlen=max_spans)
+
+    def __call__(self, event: Event) -> None:
+        self.spans.append(event)
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+    def summary(self) -> dict:
+        """Retorna {evento: {'count': n, 'wall_time': soma}}."""
+        summary = {}
+        for event in list(self.spans):
+            item = summary.setdefault(event.name, {'count': 0, 'wall_time': 0.0})
+            item['count'] += 1
+            item['wall_time'] += event.wall_time or 0.0
+        return summary
+
+    def to_json(self) -> str:
+        import json
+
+        return json.dumps([event.to_dict() for event in list(self.spans)], default=str)
+
+
+#===============================================================#
+# Progresso
+#===============================================================#
+
+class Progress(object):
+    """
+       Acompanha o andamento de uma operação longa (cópia, hash, descompactação).
+
+    callback    = função chamada com este objeto: callback(progress), no máximo uma
+                  vez a cada interval segundos e sempre no final (progress.finished).
+    total_bytes = total esperado (None = desconhecido, sem porcentagem/ETA).
+    total_files = total de arquivos esperado.
+
+    O custo de update() é uma soma e uma leitura de time.monotonic(), o callback não
+    é chamado a cada bloco de dados.
+
+        shasum.getsha256('/path/file.iso', progress=Progress(TerminalProgress()))
+    """
+    def __init__(self, callback=None, *, total_bytes: int=None, total_files: int=None, interval: float=0.5,
+                 name: str='') -> None:
+        self.callback = callback
+        self.total_bytes: int = total_bytes
+        self.total_files: int = total_files
+        self.interval: float = interval
+        self.name: str = name
+        self.bytes_done: int = 0
+        self.files_done: int = 0
+        self.finished: bool = False
+        self.start_time: float = time.monotonic()
+        self.rate: float = 0.0 # bytes/s desde o último callback (instantâneo).
+        self._last_time: float = self.start_time
+        self._last_bytes: int = 0
+        self._next_report: float = self.start_time + interval
+        self._lock = threading.Lock()
+
+    def update(self, nbytes: int=0, *, files: int=0) -> None:
+        """Soma nbytes/files ao progresso (seguro para várias threads)."""
+        with self._lock:
+            self.bytes_done += nbytes
+            self.files_done += files
+        now = time.monotonic()
+        if now >= self._next_report:
+            self._report(now)
+
+    def _report(self, now: float) -> None:
+        with self._lock:
+            if (now < self._next_report) and not self.finished:
+                return
+            self._next_report = now + self.interval
+            elapsed = now - self._last_time
+            if elapsed > 0:
+                self.rate = (self.bytes_done - self._last_bytes) / elapsed
+            self._last_time = now
+            self._last_bytes = self.bytes_done
+        if self.callback is not None:
+            self.callback(self)
+
+    def finish(self) -> None:
+        """Marca a operação como concluída e chama o callback uma última vez."""
+        if self.finished:
+            return
+        self.finished = True
+        self._report(time.monotonic())
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.start_time
+
+    @property
+    def throughput(self) -> float:
+        """Média de bytes/s desde o início."""
+        elapsed = self.elapsed
+        return self.bytes_done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def fraction(self) -> float:
+        """Fração concluída (0.0 a 1.0) ou None se o total for desconhecido."""
+        if not self.total_bytes:
+            return None
+        return min(1.0, self.bytes_done / self.total_bytes)
+
+    @property
+    def eta(self) -> float:
+        """Segundos restantes estimados pela média, ou None."""
+        throughput = self.throughput
+        if (not self.total_bytes) or (throughput <= 0):
+            return None
+        return max(0.0, (self.total_bytes - self.bytes_done) / throughput)
+
+
+class _ProgressFeed(object):
+    """Adapta Progress para ser alimentado como um objeto de hashlib (update(bytes))."""
+    __slots__ = ('progress',)
+
+    def __init__(self, progress: Progress) -> None:
+        self.progress: Progress = progress
+
+    def update(self, data) -> None:
+        self.progress.update(len(data))
+
+    __call__ = update
+
+
+def _format_seconds(seconds: float) -> str:
+    if seconds is None:
+        return '--:--'
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f'{hours}:{minutes:02d}:{seconds:02d}'
+    return f'{minutes:02d}:{seconds:02d}'
+
+
+class TerminalProgress(object):
+    """
+       Callback de Progress que exibe uma linha de progresso no terminal, ajustada à
+    largura do terminal (get_term_col()):
+
+    nome  42% [########            ] 1.10 GB/2.60 GB 350.00 MB/s ETA 00:04
+    """
+    def __init__(self, *, file=None) -> None:
+        self.file = file
+
+    def render(self, progress: Progress) -> str:
+        columns = get_term_col()
+        done = format(ByteSize(int(progress.bytes_done)), '.2f')
+        if progress.total_bytes:
+            done = f'{done}/{ByteSize(int(progress.total_bytes)):.2f}'
+        rate = progress.throughput if progress.finished else (progress.rate or progress.throughput)
+        info = f'{done} {ByteSize(int(rate)):.2f}/s'
+        if progress.files_done:
+            info += f' {progress.files_done}'
+            if progress.total_files:
+                info += f'/{progress.total_files}'
+            info += ' arquivos'
+        if progress.finished:
+            info += f' {_format_seconds(progress.elapsed)}'
+        else:
+            info += f' ETA {_format_seconds(progress.eta)}'
+
+        fraction = progress.fraction
+        head = progress.name
+        if fraction is not None:
+            head = f'{head} {fraction * 100:3.0f}%'.strip()
+            bar_width = columns - len(head) - len(info) - 5
+            if bar_width >= 10:
+                filled = int(bar_width * fraction)
+                head = f'{head} [{"#" * filled}{" " * (bar_width - filled)}]'
+        return f'{head} {info}'.strip()[:columns - 1]
+
+    def __call__(self, progress: Progress) -> None:
+        file = self.file or sys.stderr
+        line = self.render(progress)
+        file.write('\r' + line.ljust(get_term_col() - 1))
+        if progress.finished:
+            file.write('\n')
+        file.flush()
+
+
+def pump_streams(streams: dict, sinks: dict, *, buffer_size: int=65536) -> None:
+    """
+       Lê todos os streams de streams {nome: arquivo} ao mesmo tempo até o fim (EOF),
+    entregando cada bloco de bytes lido para sinks[nome](bloco). Assim um processo
+    que escreve muito no stderr não fica bloqueado enquanto o stdout é lido.
+    Em sistemas posix usa selectors, nos demais uma thread por stream.
+    """
+    if os.name == 'posix':
+        with selectors.DefaultSelector() as selector:
+            for name, stream in streams.items():
+                selector.register(stream.fileno(), selectors.EVENT_READ, name)
+            while selector.get_map():
+                for key, _ in selector.select():
+                    data = os.read(key.fd, buffer_size)
+                    if not data:
+                        selector.unregister(key.fd)
+                        continue
+                    sinks[key.data](data)
+        return
+
+    def _read_all(name: str, stream) -> None:
+        fd = stream.fileno()
+        while True:
+            data = os.read(fd, buffer_size)
+            if not data:
+                break
+            sinks[name](data)
+
+    threads = [
+        threading.Thread(target=_read_all, args=(name, stream), daemon=True)
+        for name, stream in streams.items()
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+class LineSink(object):
+    """
+       Recebe blocos de bytes, divide em linhas de texto e chama callback(linha)
+    para cada linha completa. Apenas as últimas tail_lines linhas são mantidas
+    em self.tail, linhas maiores que max_line_length são quebradas.
+    """
+    def __init__(self, callback=None, *, tail_lines: int=200, encoding: str='utf8', max_line_length: int=65536) -> None:
+        super().__init__()
+        self.callback = callback
+        self.tail: deque = deque(maxlen=tail_lines)
+        self.max_line_length: int = max_line_length
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        self._partial: str = ''
+
+    def _emit(self, line: str) -> None:
+        self.tail.append(line)
+        if self.callback is not None:
+            self.callback(line)
+
+    def __call__(self, data: bytes) -> None:
+        text = self._partial + self._decoder.decode(data)
+        lines = text.split('\n')
+        self._partial = lines.pop()
+        for line in lines:
+            self._emit(line + '\n')
+        while len(self._partial) > self.max_line_length:
+            self._emit(self._partial[:self.max_line_length])
+            self._partial = self._partial[self.max_line_length:]
+
+    def close(self) -> None:
+        """Envia a última linha, caso a saída não termine com quebra de linha."""
+        self._partial += self._decoder.decode(b'', final=True)
+        if self._partial:
+            self._emit(self._partial)
+            self._partial = ''
+
+    def text(self) -> str:
+        return ''.join(self.tail)
+
+
+class CapturedOutput(object):
+    """
+       Captura a saída de um processo. Os primeiros max_memory bytes ficam em memória,
+    o restante é gravado em um arquivo temporário (tempfile.SpooledTemporaryFile).
+    Com tail_bytes os últimos bytes recebidos também são mantidos separadamente,
+    útil para exibir erros sem ler toda a saída.
+    """
+    def __init__(self, *, max_memory: int=None, tail_bytes: int=None, keep_output: bool=True, encoding: str='utf8') -> None:
+        super().__init__()
+        self.max_memory: int = max_memory
+        self.tail_bytes: int = tail_bytes
+        self.encoding: str = encoding
+        self.size: int = 0
+        self._tail: bytearray = bytearray()
+        self._file = None
+        if keep_output:
+            import tempfile
+            # max_size=0 mantém tudo em memória.
+            self._file = tempfile.SpooledTemporaryFile(max_size=max_memory or 0)
+
+    def __call__(self, data: bytes) -> None:
+        self.size += len(data)
+        if self._file is not None:
+            self._file.write(data)
+        if self.tail_bytes:
+            self._tail += data
+            if len(self._tail) > self.tail_bytes:
+                del self._tail[:len(self._tail) - self.tail_bytes]
+
+    @property
+    def spilled(self) -> bool:
+        """True se a saída foi gravada em disco."""
+        return (self._file is not None) and bool(self.max_memory) and (self.size > self.max_memory)
+
+    def stream(self):
+        """Retorna um objeto de arquivo (binário) posicionado no início da saída."""
+        if self._file is None:
+            return None
+        self._file.seek(0)
+        return self._file
+
+    def mmap(self):
+        """
+           Retorna a saída sem copiá-la: um mmap se ela estiver em disco ou uma
+        memoryview se estiver em memória.
+        """
+        if self._file is None:
+            return None
+        if self.spilled:
+            import mmap
+            self._file.flush()
+            return mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._file.seek(0)
+        return memoryview(self._file.read())
+
+    def tail(self) -> bytes:
+        """Retorna os últimos tail_bytes recebidos."""
+        return bytes(self._tail)
+
+    def get_text(self) -> str:
+        """
+           Retorna o texto completo se ele estiver em memória, caso contrário o texto
+        dos últimos tail_bytes, ou None.
+        """
+        if (self._file is not None) and not self.spilled:
+            self._file.seek(0)
+            return self._file.read().decode(self.encoding, errors='replace')
+        if self.tail_bytes:
+            return self.tail().decode(self.encoding, errors='replace')
+        return None
+
+    def close(self) -> None:
+        """Fecha o arquivo temporário, stream() e mmap() deixam de estar disponíveis."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> 'CapturedOutput':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
 class ExecShellCommand(object):
     """
        Classe para executar comandos shell, apartir da lista 'self.cli'
@@ -61,6 +678,8 @@ class ExecShellCommand(object):
         self.returncode: int = 0
         self.text_exit = None
         self.current_line = None
+        self.stdout_output: CapturedOutput = None
+        self.stderr_output: CapturedOutput = None
 
     @property
     def cli(self) -> list:
@@ -103,230 +722,2156 @@ class ExecShellCommand(object):
         self.isproc = True
         return _proc
 
-    def exec(self) -> None:
+    def _print_line(self, line: str) -> None:
+        self.current_line = line
+        print(line, end=' ')
+        sys.stdout.flush()
+
+    def exec(self, *, on_stdout=None, on_stderr=None, tail_lines: int=200) -> None:
         """
           Executa um comando e exibe as linhas de saída no stdout.
+        stdout e stderr são lidos ao mesmo tempo, on_stdout(linha) e on_stderr(linha)
+        podem ser usados no lugar da exibição padrão. Apenas as últimas tail_lines
+        linhas de cada stream são mantidas em memória (self.stdout_tail/self.stderr_tail).
         """
+        start = time.monotonic()
         proc: Popen = self.get_process()
+        spawn_time = time.monotonic() - start
         if proc is None:
             self.returnbool = False
             self.returncode = 1
             self.text_exit = None
             return
 
-        for line in proc.stdout:
-            self.current_line = line
-            print(line, end=' ')
-            sys.stdout.flush()
-        print()
-        proc.wait()
-
+        # O processo não recebe nada pelo stdin, fechar para que ele não fique
+        # aguardando uma entrada.
+        proc.stdin.close()
+        if on_stdout is None:
+            on_stdout = self._print_line
+
+        stdout_sink = LineSink(on_stdout, tail_lines=tail_lines)
+        stderr_sink = LineSink(on_stderr, tail_lines=tail_lines)
+        pump_streams(
+            {'stdout': proc.stdout, 'stderr': proc.stderr},
+            {'stdout': stdout_sink, 'stderr': stderr_sink},
+        )
+        stdout_sink.close()
+        stderr_sink.close()
+        if on_stdout == self._print_line:
+            print()
+        rusage = _wait_process(proc)
+        proc.stdout.close()
+        proc.stderr.close()
+        if events.enabled:
+            _emit_command(
+                self.cli, start=start, spawn_time=spawn_time, returncode=proc.returncode, rusage=rusage
+            )
+
+        self.stdout_tail: list = list(stdout_sink.tail)
+        self.stderr_tail: list = list(stderr_sink.tail)
         self.returncode = proc.returncode
         self.isproc = False
         if proc.returncode == 0:
             self.returnbool = True
-            self.text_exit = proc.communicate()[0]
+            self.text_exit = stdout_sink.text()
         else:
             self.returnbool = False
-            self.text_exit = proc.stderr
+            self.text_exit = stderr_sink.text()
             print(f'EXIT -> {self.returncode}')
 
         self.cli.clear()
 
-    def exec_silent(self) -> bool:
+    def exec_silent(self, *, max_memory: int=None, tail_bytes: int=None, keep_output: bool=True) -> bool:
         """
           Executa um comando sem exibir nada no stdout, apenas ERROS serão exibidos
         no stderr após a execução do comando.
+
+        max_memory  = bytes de cada stream mantidos em memória, o restante da saída
+                      vai para um arquivo temporário (None = tudo em memória).
+        tail_bytes  = mantém também os últimos tail_bytes de cada stream.
+        keep_output = False descarta a saída, mantendo apenas os últimos tail_bytes.
+
+        As saídas ficam em self.stdout_output/self.stderr_output (CapturedOutput) até a
+        próxima execução ou close_output(), self.text_exit recebe o texto completo quando
+        ele cabe em max_memory, caso contrário recebe apenas os últimos tail_bytes (ou None).
         """
+        self.close_output()
         self.isproc = True
+        start = time.monotonic()
         try:
-            proc = subprocess_run(self.cli, text=True, capture_output=True)
+            proc = Popen(self.cli, stdout=PIPE, stderr=PIPE)
         except Exception as e:
             print(e)
             self.returnbool = False
             self.returncode = 1
             self.text_exit = None
             self.isproc = False
-            
+            self.cli.clear()
+            return False
+
+        spawn_time = time.monotonic() - start
+        self.stdout_output = CapturedOutput(max_memory=max_memory, tail_bytes=tail_bytes, keep_output=keep_output)
+        self.stderr_output = CapturedOutput(max_memory=max_memory, tail_bytes=tail_bytes, keep_output=keep_output)
+        pump_streams(
+            {'stdout': proc.stdout, 'stderr': proc.stderr},
+            {'stdout': self.stdout_output, 'stderr': self.stderr_output},
+        )
+        rusage = _wait_process(proc)
+        proc.stdout.close()
+        proc.stderr.close()
+        if events.enabled:
+            _emit_command(
+                self.cli, start=start, spawn_time=spawn_time, returncode=proc.returncode, rusage=rusage
+            )
+
         self.returncode = proc.returncode
         self.isproc = False
         if proc.returncode == 0:
             self.returnbool = True
-            self.text_exit = proc.stdout
+            self.text_exit = self.stdout_output.get_text()
         else:
             self.returnbool = False
-            self.text_exit = proc.stderr
+            self.text_exit = self.stderr_output.get_text()
         self.cli.clear()
+        return self.returnbool
+
+    def close_output(self) -> None:
+        """Fecha os arquivos temporários da saída da última execução de exec_silent()."""
+        for output in (self.stdout_output, self.stderr_output):
+            if output is not None:
+                output.close()
+        self.stdout_output = None
+        self.stderr_output = None
+
+
+
+class CommandResult(object):
+    """
+       Resultado da execução de um comando.
+    """
+    def __init__(
+                self,
+                cli: list,
+                *,
+                returncode: int=None,
+                stdout: str=None,
+                stderr: str=None,
+                wall_time: float=0.0,
+                timed_out: bool=False,
+            ) -> None:
+        super().__init__()
+        self.cli: list = cli
+        self.returncode: int = returncode
+        self.stdout: str = stdout
+        self.stderr: str = stderr
+        self.wall_time: float = wall_time
+        self.timed_out: bool = timed_out
+
+    @property
+    def returnbool(self) -> bool:
+        return self.returncode == 0
+
+    def __repr__(self):
+        return '{}(cli={!r}, returncode={}, wall_time={:.3f})'.format(
+            self.__class__.__name__, self.cli, self.returncode, self.wall_time
+        )
+
+
+def run_command(cli: list, *, timeout: float=None, encoding: str='utf8') -> CommandResult:
+    """
+       Executa um comando e retorna um CommandResult, sem exibir nada no stdout.
+    Se o timeout expirar o comando (e os processos criados por ele) é encerrado.
+    """
+    start = time.monotonic()
+    try:
+        proc = Popen(
+            cli, stdin=DEVNULL, stdout=PIPE, stderr=PIPE, start_new_session=(os.name == 'posix')
+        )
+    except OSError as e:
+        return CommandResult(cli, returncode=1, stderr=str(e))
+    spawn_time = time.monotonic() - start
+
+    timed_out = False
+    try:
+        out, err = proc.communicate(timeout=timeout)
+    except TimeoutExpired:
+        timed_out = True
+        try:
+            if os.name == 'posix':
+                os.killpg(proc.pid, signal.SIGKILL)
+            else:
+                proc.kill()
+        except (ProcessLookupError, PermissionError):
+            pass
+        out, err = proc.communicate()
+
+    if events.enabled:
+        _emit_command(
+            cli, start=start, spawn_time=spawn_time, returncode=proc.returncode, timed_out=timed_out,
+            bytes_read=len(out) + len(err),
+        )
+    return CommandResult(
+        cli,
+        returncode=proc.returncode,
+        stdout=out.decode(encoding, errors='replace'),
+        stderr=err.decode(encoding, errors='replace'),
+        wall_time=time.monotonic() - start,
+        timed_out=timed_out,
+    )
+
+
+def run_many(commands, *, max_workers: int=None, timeout: float=None, ordered: bool=True):
+    """
+       Executa vários comandos (lista de listas) em paralelo, com no máximo
+    max_workers processos simultâneos e timeout por comando.
+    Gera os CommandResult na ordem de commands (ordered=True) ou conforme os
+    comandos terminam (ordered=False).
+
+        for result in run_many([['gzip', '-t', f] for f in files], max_workers=8):
+            print(result.cli, result.returncode, result.wall_time)
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    max_workers = max_workers or get_max_workers()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        yield from _bounded_map(
+            executor,
+            lambda cli: run_command(cli, timeout=timeout),
+            commands,
+            max_inflight=max_workers * 2,
+            ordered=ordered,
+        )
+
+
+class AsyncExecShellCommand(object):
+    """
+       Executa comandos com asyncio.create_subprocess_exec(), sem bloquear o loop de
+    eventos. Timeouts e cancelamentos encerram o processo filho (kill).
+    """
+
+    def __init__(self, cli: list=None, *, timeout: float=None, encoding: str='utf8') -> None:
+        super().__init__()
+        self.cli: list = cli or []
+        self.timeout: float = timeout
+        self.encoding: str = encoding
+        self.result: CommandResult = None
+
+    async def _create_process(self, cli: list, stdin):
+        # Em sistemas posix o comando roda em uma nova sessão, assim o kill
+        # alcança também os processos filhos do comando (ex: sh -c '...').
+        import asyncio
+        return await asyncio.create_subprocess_exec(
+            *cli,
+            stdin=stdin,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=(os.name == 'posix'),
+        )
+
+    async def _kill(self, proc) -> None:
+        try:
+            if os.name == 'posix':
+                os.killpg(proc.pid, signal.SIGKILL)
+            else:
+                proc.kill()
+        except (ProcessLookupError, PermissionError):
+            pass
+        await proc.wait()
+
+    @staticmethod
+    async def _readline(stream) -> bytes:
+        """
+           Como stream.readline(), mas uma linha maior que o limite do StreamReader
+        (64 KiB, ex: progresso com '\\r' do curl/wget) é retornada em partes, em vez
+        de levantar ValueError.
+        """
+        import asyncio
+
+        try:
+            return await stream.readuntil(b'\n')
+        except asyncio.IncompleteReadError as e:
+            # Fim do stream sem '\n' no final.
+            return e.partial
+        except asyncio.LimitOverrunError as e:
+            return await stream.read(max(e.consumed, 1))
+
+    async def run(self, cli: list=None, *, timeout: float=None, input: bytes=None) -> CommandResult:
+        """
+           Executa o comando e aguarda o término, retorna um CommandResult com a
+        saída completa. Se o timeout expirar o processo é encerrado e
+        CommandResult.timed_out será True.
+        """
+        import asyncio
+
+        cli = cli or self.cli
+        timeout = timeout if timeout is not None else self.timeout
+        start = time.monotonic()
+
+        try:
+            proc = await self._create_process(cli, PIPE if input is not None else asyncio.subprocess.DEVNULL)
+        except OSError as e:
+            self.result = CommandResult(cli, returncode=1, stderr=str(e))
+            return self.result
+        spawn_time = time.monotonic() - start
+
+        timed_out = False
+        try:
+            out, err = await asyncio.wait_for(proc.communicate(input), timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+            await self._kill(proc)
+            out, err = b'', b''
+        except asyncio.CancelledError:
+            await self._kill(proc)
+            raise
+
+        if events.enabled:
+            _emit_command(
+                cli, start=start, spawn_time=spawn_time, returncode=proc.returncode, timed_out=timed_out,
+                bytes_read=len(out) + len(err),
+            )
+        self.result = CommandResult(
+            cli,
+            returncode=proc.returncode,
+            stdout=out.decode(self.encoding, errors='replace'),
+            stderr=err.decode(self.encoding, errors='replace'),
+            wall_time=time.monotonic() - start,
+            timed_out=timed_out,
+        )
+        return self.result
+
+    async def iter_lines(self, cli: list=None, *, timeout: float=None, max_stderr_lines: int=200):
+        """
+           Gerador assíncrono com as linhas do stdout do comando, conforme são
+        produzidas. O stderr é lido em paralelo (apenas as últimas max_stderr_lines
+        linhas são mantidas) e o resultado fica disponível em self.result. Linhas
+        maiores que 64 KiB são geradas em partes.
+
+            async for line in AsyncExecShellCommand(['ls', '-l']).iter_lines():
+                print(line, end='')
+        """
+        import asyncio
+
+        cli = cli or self.cli
+        timeout = timeout if timeout is not None else self.timeout
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+
+        try:
+            proc = await self._create_process(cli, asyncio.subprocess.DEVNULL)
+        except OSError as e:
+            self.result = CommandResult(cli, returncode=1, stderr=str(e))
+            return
+
+        stderr_tail = deque(maxlen=max_stderr_lines)
+
+        async def _drain_stderr():
+            # Lido em blocos: uma linha longa não interrompe a leitura (e o processo
+            # não fica bloqueado com o pipe do stderr cheio).
+            partial = b''
+            while True:
+                data = await proc.stderr.read(65536)
+                if not data:
+                    break
+                lines = (partial + data).split(b'\n')
+                partial = lines.pop()[-65536:]
+                for line in lines:
+                    stderr_tail.append((line + b'\n').decode(self.encoding, errors='replace'))
+            if partial:
+                stderr_tail.append(partial.decode(self.encoding, errors='replace'))
+
+        stderr_task = asyncio.ensure_future(_drain_stderr())
+        timed_out = False
+        try:
+            while True:
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    line = await asyncio.wait_for(self._readline(proc.stdout), remaining)
+                except asyncio.TimeoutError:
+                    timed_out = True
+                    break
+                if not line:
+                    break
+                yield line.decode(self.encoding, errors='replace')
+        finally:
+            # Executado também quando o consumidor é cancelado ou interrompe o loop.
+            if timed_out or not proc.stdout.at_eof():
+                await self._kill(proc)
+                # Processos netos podem manter o stderr aberto após o kill.
+                stderr_task.cancel()
+            await proc.wait()
+            try:
+                await stderr_task
+            except asyncio.CancelledError:
+                pass
+            self.result = CommandResult(
+                cli,
+                returncode=proc.returncode,
+                stderr=''.join(stderr_tail),
+                wall_time=time.monotonic() - start,
+                timed_out=timed_out,
+            )
+
+
+async def gather_commands(commands: list, *, limit: int=32, timeout: float=None) -> list:
+    """
+       Executa vários comandos (lista de listas) no mesmo loop de eventos, com no
+    máximo limit processos simultâneos. Retorna os CommandResult na mesma ordem
+    de commands.
+    """
+    import asyncio
+
+    semaphore = asyncio.Semaphore(limit)
 
+    async def _run(cli: list) -> CommandResult:
+        async with semaphore:
+            return await AsyncExecShellCommand(cli, timeout=timeout).run()
+
+    return await asyncio.gather(*(_run(cli) for cli in commands))
 
 
 if sys.platform == 'linux':
    
     def is_admin() -> bool:
         """
-          Verificar se o usuário atual é administrador
-        Requerimentos: 
-           comando 'id' no linux. (id --user)
+          Verificar se o usuário atual é administrador
+        Requerimentos: 
+           comando 'id' no linux. (id --user)
+        """
+        if os.geteuid() == 0:
+            return True
+
+        # Se o processo auxiliar root estiver ativo não é preciso chamar o sudo.
+        helper = get_root_helper(start=False)
+        if helper is not None:
+            return helper.ping()
+       
+        print("Verificando se você é administrador ...", end=' ')
+        sys.stdout.flush()
+        proc = ExecShellCommand(['sudo', 'sh', '-c', 'id --user'])
+        proc.exec_silent()
+        return proc.returnbool
+
+    def sudo_command(cmds: list) -> bool:
+        """
+           Executa comandos com o sudo.  
+        Ex:
+          mkdir /teste
+
+        sudo_command(['mkdir', '/teste'])    
+        """
+        if not isinstance(cmds, list):
+            raise Exception('sudo_command ERRO ... os comandos precisam ser passados em forma de lista.')
+
+        cmds.insert(0, 'sudo')
+        print('-' * get_term_col())
+        print('Executando ...', end=' ')
+        
+        for c in cmds:
+            print(c, end=' ')
+        print()
+        print('-' * get_term_col())
+
+        proc = ExecShellCommand(cmds)
+        proc.exec()
+        return proc.returnbool
+
+
+    class RootHelper(object):
+        """
+           Processo auxiliar executado como root. O sudo é chamado apenas uma vez
+        em start(), as operações seguintes são enviadas pelo stdin/stdout do processo
+        (uma linha JSON por requisição/resposta), sem nova autenticação.
+
+            helper = RootHelper()
+            helper.start()
+            helper.exec(['cp', '-R', 'src', '/opt/dest'])
+            helper.stop()
+        """
+        def __init__(self, *, timeout: float=30.0) -> None:
+            super().__init__()
+            self.timeout: float = timeout
+            self._proc: Popen = None
+            self._buffer: bytes = b''
+            self._lock = threading.Lock()
+            self._atexit_registered: bool = False
+
+        def start(self) -> bool:
+            """Inicia o processo auxiliar (o sudo pode pedir a senha no terminal)."""
+            if self.is_alive():
+                return True
+
+            cli = [sys.executable, os.path.abspath(__file__), '--root-helper']
+            if os.geteuid() != 0:
+                if which('sudo') is None:
+                    print(f'{__class__.__name__} comando [sudo] não está disponível.')
+                    return False
+                cli.insert(0, 'sudo')
+
+            try:
+                self._proc = Popen(cli, stdin=PIPE, stdout=PIPE)
+            except OSError as e:
+                print(f'{__class__.__name__} {e}')
+                return False
+
+            self._buffer = b''
+            # A primeira resposta pode demorar enquanto o sudo pede a senha.
+            if not self.ping(timeout=None):
+                self.stop()
+                return False
+            if not self._atexit_registered:
+                atexit.register(self.stop)
+                self._atexit_registered = True
+            return True
+
+        def is_alive(self) -> bool:
+            return (self._proc is not None) and (self._proc.poll() is None)
+
+        def _read_line(self, timeout: float) -> bytes:
+            fd = self._proc.stdout.fileno()
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while b'\n' not in self._buffer:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if (remaining is not None) and (remaining <= 0):
+                    return None
+                ready, _, _ = select.select([fd], [], [], remaining)
+                if not ready:
+                    return None
+                data = os.read(fd, 65536)
+                if not data:
+                    return None
+                self._buffer += data
+            line, _, self._buffer = self._buffer.partition(b'\n')
+            return line
+
+        def request(self, op: str, *, timeout: float=-1, **kwargs) -> dict:
+            """
+               Envia uma operação para o processo auxiliar e retorna a resposta. Se o
+            processo não responder em timeout segundos ele é encerrado.
+            """
+            import json
+
+            if timeout == -1:
+                timeout = self.timeout
+
+            with self._lock:
+                if not self.is_alive():
+                    return {'ok': False, 'error': 'processo auxiliar não está em execução'}
+
+                kwargs['op'] = op
+                try:
+                    self._proc.stdin.write(json.dumps(kwargs).encode('utf8') + b'\n')
+                    self._proc.stdin.flush()
+                    line = self._read_line(timeout)
+                except OSError:
+                    line = None
+
+                if line is None:
+                    self._kill()
+                    return {'ok': False, 'error': 'processo auxiliar não respondeu'}
+                return json.loads(line.decode('utf8'))
+
+        def ping(self, *, timeout: float=5.0) -> bool:
+            """Verifica se o processo auxiliar está respondendo e executando como root."""
+            response = self.request('ping', timeout=timeout)
+            return response.get('ok', False) and (response.get('euid') == 0)
+
+        def exec(self, cli: list, *, timeout: float=None) -> CommandResult:
+            """Executa um comando como root, retorna um CommandResult."""
+            # O timeout da requisição é maior que o do comando.
+            request_timeout = None if timeout is None else timeout + self.timeout
+            response = self.request('exec', cli=cli, cmd_timeout=timeout, timeout=request_timeout)
+            if not response.get('ok', False):
+                return CommandResult(cli, returncode=1, stderr=response.get('error'))
+            return CommandResult(
+                cli,
+                returncode=response['returncode'],
+                stdout=response['stdout'],
+                stderr=response['stderr'],
+                wall_time=response['wall_time'],
+                timed_out=response['timed_out'],
+            )
+
+        def _kill(self) -> None:
+            if self.is_alive():
+                self._proc.kill()
+                self._proc.wait()
+
+        def stop(self) -> None:
+            """Encerra o processo auxiliar."""
+            if not self.is_alive():
+                return
+            self.request('shutdown', timeout=5.0)
+            try:
+                self._proc.wait(timeout=5.0)
+            except TimeoutExpired:
+                self._kill()
+            self._proc.stdin.close()
+            self._proc.stdout.close()
+
+        @staticmethod
+        def serve() -> int:
+            """
+               Loop do processo auxiliar (lado root). Lê requisições do stdin e escreve as
+            respostas no stdout, mensagens de outras funções vão para o stderr.
+            """
+            import json
+
+            requests_in = sys.stdin.buffer
+            responses_out = os.fdopen(os.dup(1), 'wb')
+            os.dup2(2, 1)
+
+            for line in requests_in:
+                try:
+                    req = json.loads(line.decode('utf8'))
+                except ValueError:
+                    req = None
+
+                if isinstance(req, dict):
+                    try:
+                        response = RootHelper._handle(req)
+                    except Exception as e:
+                        response = {'ok': False, 'error': str(e)}
+                else:
+                    response = {'ok': False, 'error': 'requisição inválida'}
+
+                responses_out.write(json.dumps(response).encode('utf8') + b'\n')
+                responses_out.flush()
+                if isinstance(req, dict) and (req.get('op') == 'shutdown'):
+                    break
+            return 0
+
+        @staticmethod
+        def _handle(req: dict) -> dict:
+            op = req.get('op')
+            if op in ('ping', 'shutdown'):
+                return {'ok': True, 'pid': os.getpid(), 'euid': os.geteuid()}
+
+            if op == 'exec':
+                cli = req.get('cli')
+                if (not isinstance(cli, list)) or (not cli):
+                    return {'ok': False, 'error': 'exec requer cli (lista de argumentos)'}
+                result = run_command(cli, timeout=req.get('cmd_timeout'))
+                return {
+                    'ok': True,
+                    'returncode': result.returncode,
+                    'stdout': result.stdout,
+                    'stderr': result.stderr,
+                    'wall_time': result.wall_time,
+                    'timed_out': result.timed_out,
+                }
+            return {'ok': False, 'error': f'operação desconhecida {op}'}
+
+
+    _root_helper: RootHelper = None
+
+    def get_root_helper(*, start: bool=True) -> RootHelper:
+        """
+           Retorna o processo auxiliar root compartilhado, iniciando-o se necessário
+        (start=True). Retorna None se ele não estiver/puder ser iniciado.
+        """
+        global _root_helper
+        if (_root_helper is not None) and _root_helper.is_alive():
+            return _root_helper
+        if not start:
+            return None
+
+        helper = RootHelper()
+        if not helper.start():
+            return None
+        _root_helper = helper
+        return _root_helper
+
+
+    def _unescape_mount_field(field: str) -> str:
+        """Converte os escapes octais do mountinfo (\\040 = espaço)."""
+        import re
+
+        if '\\' not in field:
+            return field
+        return re.sub(r'\\([0-7]{3})', lambda m: chr(int(m.group(1), 8)), field)
+
+
+    class MountTable(object):
+        """
+           Índice dispositivo -> pontos de montagem, lido de /proc/self/mountinfo sem
+        executar o comando mount. O índice fica em cache e só é relido quando o kernel
+        sinaliza uma alteração na tabela de montagem (poll em /proc/self/mounts).
+
+        Os dispositivos são comparados pelo caminho real (links como /dev/disk/by-uuid/...
+        são resolvidos) e pelo número major:minor.
+        """
+        def __init__(self, *, mountinfo: str='/proc/self/mountinfo', mounts: str='/proc/self/mounts') -> None:
+            super().__init__()
+            self.mountinfo: str = mountinfo
+            self._by_source: dict = {}
+            self._by_devnum: dict = {}
+            self._loaded: bool = False
+            self._lock = threading.Lock()
+            self._poll_file = None
+            self._poller = None
+            try:
+                self._poll_file = open(mounts, 'rb')
+                self._poller = select.poll()
+                self._poller.register(self._poll_file.fileno(), select.POLLERR | select.POLLPRI)
+            except (OSError, AttributeError):
+                self._poller = None
+
+        def _changed(self) -> bool:
+            """True se a tabela de montagem mudou desde a última leitura."""
+            if (not self._loaded) or (self._poller is None):
+                return True
+            for _fd, event in self._poller.poll(0):
+                if event & (select.POLLERR | select.POLLPRI):
+                    return True
+            return False
+
+        def _load(self) -> None:
+            by_source = {}
+            by_devnum = {}
+            realpaths = {}
+            with open(self.mountinfo, 'rt') as f:
+                for line in f:
+                    # id pai major:minor raiz ponto_de_montagem opções [opcionais...] - tipo origem opções
+                    fields = line.split()
+                    try:
+                        sep = fields.index('-', 6)
+                    except ValueError:
+                        continue
+                    mountpoint = _unescape_mount_field(fields[4])
+                    source = _unescape_mount_field(fields[sep + 2]) if len(fields) > sep + 2 else ''
+                    major, _, minor = fields[2].partition(':')
+                    by_devnum.setdefault((int(major), int(minor)), []).append(mountpoint)
+
+                    if not source:
+                        continue
+                    by_source.setdefault(source, []).append(mountpoint)
+                    # Origens que não são caminhos (server:/export, tmpfs, //host/share)
+                    # são indexadas como estão.
+                    if (not source.startswith('/')) or source.startswith('//'):
+                        continue
+                    if source not in realpaths:
+                        realpaths[source] = os.path.realpath(source)
+                    if realpaths[source] != source:
+                        by_source.setdefault(realpaths[source], []).append(mountpoint)
+
+            self._by_source = by_source
+            self._by_devnum = by_devnum
+            self._loaded = True
+
+        def refresh(self, *, force: bool=False) -> bool:
+            """Relê /proc/self/mountinfo se necessário, retorna False em caso de erro."""
+            with self._lock:
+                if force or self._changed():
+                    try:
+                        self._load()
+                    except OSError as e:
+                        print(f'{__class__.__name__} {e}')
+                        return False
+            return True
+
+        def _lookup(self, device: str) -> list:
+            mountpoints = self._by_source.get(device)
+            if mountpoints is not None:
+                return mountpoints
+            if not device.startswith('/'):
+                return []
+
+            real_device = os.path.realpath(device)
+            mountpoints = self._by_source.get(real_device)
+            if mountpoints is not None:
+                return mountpoints
+
+            try:
+                st = os.stat(real_device)
+            except OSError:
+                return []
+            if not stat.S_ISBLK(st.st_mode):
+                return []
+            return self._by_devnum.get((os.major(st.st_rdev), os.minor(st.st_rdev)), [])
+
+        def mountpoints(self, device: str) -> list:
+            """Retorna os pontos de montagem de device (/dev/sda1, /dev/disk/by-uuid/...)."""
+            if not self.refresh():
+                return []
+            return list(self._lookup(device))
+
+        def is_mounted(self, device: str) -> bool:
+            return len(self.mountpoints(device)) > 0
+
+        def mounted_devices(self, devices: list) -> dict:
+            """Verifica vários dispositivos de uma vez, retorna {dispositivo: bool}."""
+            if not self.refresh():
+                return {device: False for device in devices}
+            return {device: len(self._lookup(device)) > 0 for device in devices}
+
+        def close(self) -> None:
+            if self._poll_file is not None:
+                self._poll_file.close()
+                self._poll_file = None
+                self._poller = None
+
+
+    _mount_table: MountTable = None
+
+    def get_mount_table() -> MountTable:
+        """Retorna o MountTable compartilhado."""
+        global _mount_table
+        if _mount_table is None:
+            _mount_table = MountTable()
+        return _mount_table
+
+
+    def device_ismounted(device: str) -> bool:
+        """
+          Verifica se um dispositivo está montado.
+        diferente de os.path.ismount(path) que verifica se um caminho é ponto de montagem, este
+        metódo trabalha com um dispositivo (/dev/sda1, /dev/sda2, ...)
+        """
+
+        if os.name != 'posix':
+            return False
+        return get_mount_table().is_mounted(device)
+
+
+    def mounted_devices(devices: list) -> dict:
+        """
+          Verifica quais dispositivos da lista estão montados, retorna {dispositivo: bool}.
+        A tabela de montagem é lida uma única vez para todos os dispositivos.
+        """
+        return get_mount_table().mounted_devices(devices)
+
+
+
+# Unidades de ByteSize/format_sizes: (base, sufixos).
+# None = unidades do ByteSize (base 1024, sufixos kB/MB/...), 'iec' = base 1024
+# com sufixos KiB/MiB/..., 'si' = base 1000.
+_SIZE_UNITS = {
+    None: (1024, ('B', 'kB', 'MB', 'GB', 'TB', 'PB')),
+    'iec': (1024, ('B', 'KiB', 'MiB', 'GiB', 'TiB', 'PiB')),
+    'si': (1000, ('B', 'kB', 'MB', 'GB', 'TB', 'PB')),
+}
+
+
+def _get_size_units(units: str) -> tuple:
+    try:
+        return _SIZE_UNITS[units]
+    except KeyError:
+        raise ValueError(f'unidade inválida {units!r}, use None, "iec" ou "si"') from None
+
+
+class ByteSize(int):
+    """
+      Classe para mostrar o tamaho de um arquivo (B, kB, MB, GB, TB, PB) de modo legível para humanos.
+
+    Os atributos (kB, MB, readable, ...) são calculados apenas quando acessados,
+    criar e somar ByteSize custa o mesmo que um int. Use format(units='si') para
+    unidades de 1000 bytes ou units='iec' para os sufixos KiB, MiB, ...
+    """
+
+    # https://qastack.com.br/programming/1392413/calculating-a-directorys-size-using-python
+    # 2021-11-13 - 21:12
+    
+    __slots__ = ()
+    _kB = 1024
+    _suffixes = 'B', 'kB', 'MB', 'GB', 'TB', 'PB'
+
+    @property
+    def bytes(self) -> int:
+        return int(self)
+
+    B = bytes
+
+    @property
+    def kilobytes(self) -> float:
+        return self / self._kB**1
+
+    kB = kilobytes
+
+    @property
+    def megabytes(self) -> float:
+        return self / self._kB**2
+
+    MB = megabytes
+
+    @property
+    def gigabytes(self) -> float:
+        return self / self._kB**3
+
+    GB = gigabytes
+
+    @property
+    def terabytes(self) -> float:
+        return self / self._kB**4
+
+    TB = terabytes
+
+    @property
+    def petabytes(self) -> float:
+        return self / self._kB**5
+
+    PB = petabytes
+
+    def _readable(self, base: int, suffixes: tuple) -> tuple:
+        value = int(self)
+        exponent = 0
+        limit = base
+        while (exponent < len(suffixes) - 1) and (abs(value) >= limit):
+            exponent += 1
+            limit *= base
+        return suffixes[exponent], value / base**exponent
+
+    @property
+    def readable(self) -> tuple:
+        """(sufixo, valor), ex: ('MB', 1.5)."""
+        return self._readable(self._kB, self._suffixes)
+
+    def format(self, format_spec: str='.2f', *, units: str=None) -> str:
+        """Retorna o tamanho formatado, units = None | 'iec' | 'si'."""
+        suffix, val = self._readable(*_get_size_units(units))
+        return '{val:{fmt}} {suf}'.format(val=val, fmt=format_spec, suf=suffix)
+
+    def __str__(self):
+        return self.__format__('.2f')
+
+    def __repr__(self):
+        return '{}({})'.format(self.__class__.__name__, super().__repr__())
+
+    def __format__(self, format_spec):
+        suffix, val = self.readable
+        return '{val:{fmt}} {suf}'.format(val=val, fmt=format_spec, suf=suffix)
+
+    def __sub__(self, other):
+        return self.__class__(super().__sub__(other))
+
+    def __add__(self, other):
+        return self.__class__(super().__add__(other))
+
+    def __mul__(self, other):
+        return self.__class__(super().__mul__(other))
+
+    def __rsub__(self, other):
+        return self.__class__(super().__rsub__(other))
+
+    def __radd__(self, other):
+        return self.__class__(super().__add__(other))
+
+    def __rmul__(self, other):
+        return self.__class__(super().__rmul__(other))
+
+
+def format_sizes(sizes, *, units: str=None, precision: int=2) -> list:
+    """
+       Converte uma sequência de tamanhos em bytes (lista, iterável ou array do numpy)
+    em textos legíveis, com o mesmo resultado de format(ByteSize(n)), de uma só vez.
+
+    units     = None (como ByteSize) | 'iec' (KiB, MiB, ...) | 'si' (base 1000).
+    precision = casas decimais.
+
+    Arrays do numpy são convertidos com operações vetorizadas do numpy (sem criar
+    um int por item), as demais sequências em um laço com as divisões pré-calculadas.
+    O numpy não é importado pelo cmdlib, é usado apenas se o array for do numpy.
+    """
+    base, suffixes = _get_size_units(units)
+
+    numpy = sys.modules.get('numpy')
+    if (numpy is not None) and isinstance(sizes, numpy.ndarray):
+        values = numpy.asarray(sizes, dtype=numpy.float64).ravel()
+        magnitude = numpy.abs(values)
+        exponents = numpy.zeros(values.shape, dtype=numpy.int64)
+        for exponent in range(1, len(suffixes)):
+            exponents += magnitude >= float(base**exponent)
+        scaled = values / numpy.power(float(base), exponents)
+        text = numpy.char.mod(f'%.{precision}f ', scaled)
+        text = numpy.char.add(text, numpy.asarray(suffixes)[exponents])
+        return text.tolist()
+
+    limits = [base**exponent for exponent in range(1, len(suffixes))]
+    divisors = [base**exponent for exponent in range(len(suffixes))]
+    fmt = f'{{:.{precision}f}} {{}}'
+    result = []
+    append = result.append
+    for size in sizes:
+        magnitude = abs(size)
+        exponent = 0
+        for limit in limits:
+            if magnitude < limit:
+                break
+            exponent += 1
+        append(fmt.format(size / divisors[exponent], suffixes[exponent]))
+    return result
+
+
+
+class FileSize(object):
+    """
+       Obeter o tamanho de arquivos e diretórios com python.
+
+    apparent       = True soma o tamanho dos arquivos (st_size), False soma os blocos
+                     alocados em disco (st_blocks), como o du.
+    one_filesystem = não entra em diretórios de outros sistemas de arquivos (du -x).
+    max_workers    = threads usadas para ler os subdiretórios em paralelo.
+
+    Links simbólicos não são seguidos e arquivos com vários hard links são
+    contados apenas uma vez.
+    """
+    def __init__(self, path: str, *, apparent: bool=True, one_filesystem: bool=False, max_workers: int=None):
+        self.path: str = path # arquivo/diretório.
+        self.apparent: bool = apparent
+        self.one_filesystem: bool = one_filesystem
+        self.max_workers: int = max_workers or get_max_workers()
+        self.files: int = 0
+        self.errors: list = []
+        self._root_dev: int = None
+
+    def _stat_size(self, st: os.stat_result) -> int:
+        if self.apparent or not hasattr(st, 'st_blocks'):
+            return st.st_size
+        return st.st_blocks * 512
+
+    def _scan_dir(self, path: str) -> tuple:
+        """
+           Lê um único diretório, retorna (total, arquivos, hard_links, subdiretórios,
+        total_subdiretórios). Arquivos com mais de um hard link são retornados em
+        hard_links (dev, ino, tamanho) para serem contados uma única vez.
+        """
+        total = 0
+        dirs_total = 0
+        files = 0
+        hard_links = []
+        subdirs = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError as e:
+                        self.errors.append(e)
+                        continue
+
+                    if entry.is_dir(follow_symlinks=False):
+                        if self.one_filesystem and (st.st_dev != self._root_dev):
+                            continue
+                        subdirs.append(entry.path)
+                        dirs_total += self._stat_size(st)
+                    elif st.st_nlink > 1:
+                        hard_links.append((st.st_dev, st.st_ino, self._stat_size(st)))
+                    else:
+                        files += 1
+                        total += self._stat_size(st)
+        except OSError as e:
+            self.errors.append(e)
+        return total, files, hard_links, subdirs, dirs_total
+
+    def _get_folder_size(self) -> float:
+        """
+           Percorre a árvore com os.scandir(), cada diretório é lido por uma thread.
+        O tamanho do próprio diretório raiz é incluído (como no du -s).
+        """
+        from concurrent.futures import ThreadPoolExecutor, wait as wait_futures, FIRST_COMPLETED
+
+        self.files = 0
+        self.errors = []
+        st = os.stat(self.path)
+        self._root_dev = st.st_dev
+        total = self._stat_size(st)
+        seen_links = set()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {executor.submit(self._scan_dir, self.path)}
+            while pending:
+                done, pending = wait_futures(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    dir_total, files, hard_links, subdirs, dirs_total = future.result()
+                    total += dir_total + dirs_total
+                    self.files += files
+                    for dev, ino, size in hard_links:
+                        if (dev, ino) not in seen_links:
+                            seen_links.add((dev, ino))
+                            self.files += 1
+                            total += size
+                    for subdir in subdirs:
+                        pending.add(executor.submit(self._scan_dir, subdir))
+        return float(total)
+
+    def _get_file_size(self) -> float:
+        return float(self._stat_size(os.stat(self.path)))
+
+    def get_size(self) -> float:
+        start = time.monotonic()
+        if os.path.isdir(self.path):
+            size = self._get_folder_size()
+        else:
+            size = self._get_file_size()
+        if events.enabled:
+            events.emit(
+                'size', start=start, path=self.path, size=int(size), files=self.files, errors=len(self.errors)
+            )
+        return size
+
+    def number_size(self) -> float:
+        """
+        ESTE MÉTODO FOI DESCONTINUADO. Use self.get_size()
+          Retorna o tamanho em bytes de um arquivo/diretório.
+        """
+        return self.get_size()
+
+    def human_size(self) -> ByteSize:
+        """Retorna o tamaho de um arquivo ou diretório de maneira legivel a humanos."""
+        return ByteSize(int(self.get_size()))
+
+
+
+class Inotify(object):
+    """Acesso mínimo ao inotify do Linux via ctypes (apenas diretórios)."""
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    WATCH_MASK = (
+        IN_MODIFY | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+        IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+    )
+
+    def __init__(self) -> None:
+        super().__init__()
+        import ctypes
+
+        self._ctypes = ctypes
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self.fd: int = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+
+    def add_watch(self, path: str) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), self.WATCH_MASK)
+        if wd < 0:
+            errno = self._ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self) -> list:
+        """Retorna a lista de eventos pendentes [(wd, mask, nome), ...] sem bloquear."""
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = struct.unpack_from('iIII', data, offset)
+                offset += 16
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+                events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class FolderSizeIndex(object):
+    """
+       Índice incremental do tamanho de um diretório. O índice guarda o subtotal de
+    cada diretório e, nas consultas seguintes, relê apenas os diretórios cujo mtime
+    mudou (um stat por diretório, nenhum por arquivo).
+
+    Sem inotify, alterar o tamanho de um arquivo existente NÃO é detectado: o mtime
+    do diretório só muda quando entradas são criadas, removidas ou renomeadas, e o
+    total continua com o tamanho antigo até o diretório ser relido. Com
+    use_inotify=True (Linux) essas alterações também são detectadas e uma consulta
+    sem alterações na árvore retorna o total imediatamente.
+    """
+    def __init__(self, path: str, *, apparent: bool=True, one_filesystem: bool=False,
+                 use_inotify: bool=False, max_workers: int=None) -> None:
+        super().__init__()
+        self.path: str = os.path.abspath(path)
+        self.total: int = 0
+        self.files: int = 0
+        self._scanner: FileSize = FileSize(
+            self.path, apparent=apparent, one_filesystem=one_filesystem, max_workers=max_workers
+        )
+        # diretório -> [mtime_ns, total_próprio, arquivos, hard_links, subdiretórios, wd]
+        self._nodes: dict = {}
+        # (dev, ino) -> [tamanho, referências]
+        self._links: dict = {}
+        self._lock = threading.Lock()
+        self._inotify: Inotify = None
+        self._wds: dict = {}
+        self._dirty: set = set()
+
+        if use_inotify:
+            try:
+                self._inotify = Inotify()
+            except (OSError, AttributeError) as e:
+                print(f'{__class__.__name__} inotify não disponível ... {e}')
+
+    def _add_node(self, path: str, node: list) -> None:
+        self._nodes[path] = node
+        self.total += node[1]
+        self.files += node[2]
+        for dev, ino, size in node[3]:
+            item = self._links.get((dev, ino))
+            if item is None:
+                self._links[(dev, ino)] = [size, 1]
+                self.total += size
+                self.files += 1
+            else:
+                item[1] += 1
+
+    def _remove_node(self, path: str) -> list:
+        node = self._nodes.pop(path)
+        self.total -= node[1]
+        self.files -= node[2]
+        for dev, ino, _size in node[3]:
+            item = self._links[(dev, ino)]
+            item[1] -= 1
+            if item[1] == 0:
+                del self._links[(dev, ino)]
+                self.total -= item[0]
+                self.files -= 1
+        if node[5] is not None:
+            self._wds.pop(node[5], None)
+            self._inotify.rm_watch(node[5])
+        return node
+
+    def _remove_tree(self, path: str) -> None:
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            if current in self._nodes:
+                stack.extend(self._remove_node(current)[4])
+
+    def _scan(self, path: str) -> tuple:
+        """Retorna (stat, resultado do scan) ou (stat, None) se o diretório não mudou."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None, None
+        node = self._nodes.get(path)
+        if (node is not None) and (node[0] == st.st_mtime_ns) and (path not in self._dirty):
+            return st, None
+        return st, self._scanner._scan_dir(path)
+
+    def _walk(self, start: list) -> None:
+        """Percorre os diretórios de start relendo apenas os que mudaram."""
+        from concurrent.futures import ThreadPoolExecutor, wait as wait_futures, FIRST_COMPLETED
+
+        with ThreadPoolExecutor(max_workers=self._scanner.max_workers) as executor:
+            pending = {executor.submit(self._scan, path): path for path in start}
+            while pending:
+                done, _ = wait_futures(pending.keys(), return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = pending.pop(future)
+                    st, result = future.result()
+                    if st is None:
+                        self._remove_tree(path)
+                        continue
+
+                    if result is None:
+                        subdirs = self._nodes[path][4]
+                        # Sem inotify é preciso verificar cada subdiretório.
+                        if self._inotify is not None:
+                            subdirs = [d for d in subdirs if d not in self._nodes]
+                    else:
+                        files_total, files, hard_links, subdirs, _ = result
+                        old_subdirs = []
+                        wd = None
+                        if path in self._nodes:
+                            old = self._remove_node(path)
+                            old_subdirs = old[4]
+                        if self._inotify is not None:
+                            wd = self._watch(path)
+                        own_total = files_total + self._scanner._stat_size(st)
+                        self._add_node(path, [st.st_mtime_ns, own_total, files, hard_links, subdirs, wd])
+                        for removed in set(old_subdirs) - set(subdirs):
+                            self._remove_tree(removed)
+                        if self._inotify is not None:
+                            # Subdiretórios já indexados só são relidos se tiverem eventos.
+                            subdirs = [d for d in subdirs if d not in self._nodes]
+
+                    self._dirty.discard(path)
+                    for subdir in subdirs:
+                        pending[executor.submit(self._scan, subdir)] = subdir
+
+    def _watch(self, path: str) -> int:
+        try:
+            wd = self._inotify.add_watch(path)
+        except OSError as e:
+            # Ex: limite de fs.inotify.max_user_watches atingido.
+            print(f'{__class__.__name__} inotify desativado ... {e}')
+            self._disable_inotify()
+            return None
+        self._wds[wd] = path
+        return wd
+
+    def _disable_inotify(self) -> None:
+        for node in self._nodes.values():
+            node[5] = None
+        self._wds.clear()
+        self._inotify.close()
+        self._inotify = None
+
+    def _read_inotify(self) -> bool:
+        """Marca os diretórios alterados, retorna False se a fila de eventos transbordou."""
+        for wd, mask, _name in self._inotify.read_events():
+            if mask & Inotify.IN_Q_OVERFLOW:
+                return False
+            path = self._wds.get(wd)
+            if path is None:
+                continue
+            if mask & Inotify.IN_IGNORED:
+                self._wds.pop(wd, None)
+                if path in self._nodes:
+                    self._nodes[path][5] = None
+            self._dirty.add(path)
+        return True
+
+    def refresh(self) -> None:
+        """
+           Atualiza o índice com as alterações feitas na árvore. Os erros de leitura
+        desta atualização ficam em self.errors.
+        """
+        self._scanner.errors = []
+        # _scan_dir usa o dispositivo da raiz com one_filesystem=True.
+        try:
+            self._scanner._root_dev = os.stat(self.path).st_dev
+        except OSError:
+            pass
+
+        if (self._inotify is None) or (not self._nodes):
+            self._walk([self.path])
+            return
+
+        if not self._read_inotify():
+            self._dirty.update(self._nodes.keys())
+        if self._dirty:
+            self._walk([p for p in self._dirty if (p in self._nodes) or (p == self.path)])
+
+    def get_size(self) -> float:
+        """Retorna o tamanho atual da árvore em bytes."""
+        with self._lock:
+            self.refresh()
+            return float(self.total)
+
+    @property
+    def errors(self) -> list:
+        """Erros de leitura da última atualização."""
+        return self._scanner.errors
+
+    def close(self) -> None:
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+
+FICLONE = 0x40049409 # ioctl(dest_fd, FICLONE, src_fd) - linux/fs.h
+COPY_BUFFER_SIZE = 1024 * 1024
+COPY_PROGRESS_CHUNK = 64 * 1024 * 1024
+_COPY_FALLBACK_ERRNOS = (
+    'EXDEV', 'EINVAL', 'ENOSYS', 'EOPNOTSUPP', 'ENOTTY', 'EBADF', 'ETXTBSY', 'EPERM', 'ENOTSUP',
+)
+
+
+
+def _special_file_error(path: str, mode: int):
+    """
+       Retorna um shutil.SpecialFileError se mode for de um pipe, socket ou dispositivo
+    (abrir um pipe para leitura bloquearia a cópia), caso contrário None.
+    """
+    from shutil import SpecialFileError
+
+    for is_type, kind in ((stat.S_ISFIFO, 'um pipe nomeado'), (stat.S_ISSOCK, 'um socket'),
+                          (stat.S_ISCHR, 'um dispositivo de caractere'), (stat.S_ISBLK, 'um dispositivo de bloco')):
+        if is_type(mode):
+            return SpecialFileError(f'{path!r} é {kind}')
+    return None
+
+
+class CopyEngine(object):
+    """
+       Copiar arquivos e diretórios usando as chamadas de sistema mais rápidas
+    disponíveis, na ordem:
+
+    - reflink (ioctl FICLONE, btrfs/xfs): os dados não são copiados, apenas compartilhados.
+    - os.copy_file_range(): cópia dentro do kernel.
+    - os.sendfile().
+    - leitura/escrita com um buffer (os.pread/os.pwrite).
+
+    sparse      = mantém os buracos (holes) de arquivos esparsos (SEEK_DATA/SEEK_HOLE).
+    reflink     = False desativa o FICLONE (os dados são sempre copiados).
+    max_workers = threads usadas para copiar os arquivos de um diretório em paralelo.
+    on_file     = função chamada após cada arquivo copiado: on_file(src, dest, bytes).
+    progress    = Progress atualizado durante a cópia (bytes e arquivos).
+
+    Contadores (somados de todas as cópias): bytes_copied, files_copied e methods
+    ({'reflink': n, 'copy_file_range': n, 'sendfile': n, 'buffer': n, 'symlink': n}). Erros de uma
+    cópia de diretório são guardados em errors [(caminho, exceção)].
+    """
+    def __init__(self, *, max_workers: int=None, reflink: bool=True, sparse: bool=True,
+                 buffer_size: int=COPY_BUFFER_SIZE, on_file=None, progress: Progress=None) -> None:
+        import errno
+
+        self.max_workers: int = max_workers or get_max_workers()
+        self.reflink: bool = reflink
+        self.sparse: bool = sparse
+        self.buffer_size: int = buffer_size
+        self.on_file = on_file
+        self.progress: Progress = progress
+        self.bytes_copied: int = 0
+        self.files_copied: int = 0
+        self.methods: dict = {'reflink': 0, 'copy_file_range': 0, 'sendfile': 0, 'buffer': 0, 'symlink': 0}
+        self.errors: list = []
+        self._lock = threading.Lock()
+        self._fallback_errnos = {getattr(errno, name) for name in _COPY_FALLBACK_ERRNOS if hasattr(errno, name)}
+        # Desativados após o primeiro ENOSYS (kernel sem suporte).
+        self._has_copy_file_range: bool = hasattr(os, 'copy_file_range')
+        self._has_sendfile: bool = hasattr(os, 'sendfile')
+
+    def _count(self, method: str, src: str, dest: str, size: int) -> None:
+        with self._lock:
+            self.bytes_copied += size
+            self.files_copied += 1
+            self.methods[method] += 1
+        if self.progress is not None:
+            # Com reflink nenhum bloco passa por _copy_range().
+            self.progress.update(size if method == 'reflink' else 0, files=1)
+        if self.on_file is not None:
+            self.on_file(src, dest, size)
+
+    def _clone(self, fd_in: int, fd_out: int) -> bool:
+        if (not self.reflink) or (sys.platform != 'linux'):
+            return False
+        import fcntl
+
+        try:
+            fcntl.ioctl(fd_out, FICLONE, fd_in)
+        except OSError as e:
+            if e.errno in self._fallback_errnos:
+                return False
+            raise
+        return True
+
+    def _copy_range(self, fd_in: int, fd_out: int, offset: int, length: int, method: str) -> str:
+        """
+           Copia length bytes a partir de offset (mesma posição no destino). Retorna o
+        método usado, que pode ser rebaixado durante a cópia.
+        """
+        import errno
+
+        end = offset + length
+        progress = self.progress
+        # Blocos menores com progress, para que o progresso avance durante arquivos grandes.
+        max_count = COPY_PROGRESS_CHUNK if progress is not None else 1 << 30
+        while offset < end:
+            count = min(end - offset, max_count)
+            if method == 'copy_file_range':
+                try:
+                    n = os.copy_file_range(fd_in, fd_out, count, offset, offset)
+                except OSError as e:
+                    if e.errno not in self._fallback_errnos:
+                        raise
+                    if e.errno == errno.ENOSYS:
+                        self._has_copy_file_range = False
+                    method = 'sendfile' if self._has_sendfile else 'buffer'
+                    continue
+            elif method == 'sendfile':
+                try:
+                    os.lseek(fd_out, offset, os.SEEK_SET)
+                    n = os.sendfile(fd_out, fd_in, offset, count)
+                except OSError as e:
+                    if e.errno not in self._fallback_errnos:
+                        raise
+                    if e.errno == errno.ENOSYS:
+                        self._has_sendfile = False
+                    method = 'buffer'
+                    continue
+            else:
+                data = os.pread(fd_in, min(count, self.buffer_size), offset)
+                n = len(data)
+                view = memoryview(data)
+                written = 0
+                while written < n:
+                    written += os.pwrite(fd_out, view[written:], offset + written)
+            if n == 0:
+                # Arquivo diminuiu durante a cópia.
+                break
+            offset += n
+            if progress is not None:
+                progress.update(n)
+        return method
+
+    def _data_segments(self, fd: int, size: int):
+        """Gera (início, fim) das regiões com dados de um arquivo esparso."""
+        offset = 0
+        while offset < size:
+            try:
+                start = os.lseek(fd, offset, os.SEEK_DATA)
+            except OSError:
+                # ENXIO: apenas buracos até o fim do arquivo.
+                return
+            end = os.lseek(fd, start, os.SEEK_HOLE)
+            yield start, min(end, size)
+            offset = end
+
+    def copy_file(self, src: str, dest: str, *, follow_symlinks: bool=False, copy_stat: bool=False) -> int:
+        """
+           Copia um arquivo (ou link simbólico) de src para dest, retorna o número de
+        bytes copiados. Se dest for um diretório o arquivo é copiado para dentro dele.
+        As permissões são copiadas (copy_stat=True copia também as datas, como copy2).
         """
-        if os.geteuid() == 0:
-            return True
-       
-        print("Verificando se você é administrador ...", end=' ')
-        sys.stdout.flush()
-        proc = ExecShellCommand(['sudo', 'sh', '-c', 'id --user'])
-        proc.exec_silent()
-        return proc.returnbool
+        from shutil import copymode, copystat, SameFileError
 
-    def sudo_command(cmds: list) -> bool:
-        """
-           Executa comandos com o sudo.  
-        Ex:
-          mkdir /teste
+        if os.path.isdir(dest):
+            dest = os.path.join(dest, os.path.basename(src))
 
-        sudo_command(['mkdir', '/teste'])    
-        """
-        if not isinstance(cmds, list):
-            raise Exception('sudo_command ERRO ... os comandos precisam ser passados em forma de lista.')
+        # Como shutil.copy: abrir dest com 'wb' apagaria o próprio src.
+        try:
+            same_file = os.path.samefile(src, dest)
+        except OSError:
+            same_file = False
+        if same_file:
+            raise SameFileError(f'{src!r} e {dest!r} são o mesmo arquivo')
+
+        if (not follow_symlinks) and os.path.islink(src):
+            os.symlink(os.readlink(src), dest)
+            if copy_stat:
+                copystat(src, dest, follow_symlinks=False)
+            self._count('symlink', src, dest, 0)
+            return 0
 
-        cmds.insert(0, 'sudo')
-        print('-' * get_term_col())
-        print('Executando ...', end=' ')
-        
-        for c in cmds:
-            print(c, end=' ')
-        print()
-        print('-' * get_term_col())
+        error = _special_file_error(src, os.stat(src).st_mode)
+        if error is not None:
+            raise error
 
-        proc = ExecShellCommand(cmds)
-        proc.exec()
-        return proc.returnbool
+        with open(src, 'rb') as file_in, open(dest, 'wb') as file_out:
+            fd_in = file_in.fileno()
+            fd_out = file_out.fileno()
+            st = os.fstat(fd_in)
+            size = st.st_size
 
+            if (size > 0) and self._clone(fd_in, fd_out):
+                method = 'reflink'
+            else:
+                if self._has_copy_file_range:
+                    method = 'copy_file_range'
+                elif self._has_sendfile:
+                    method = 'sendfile'
+                else:
+                    method = 'buffer'
+
+                is_sparse = (self.sparse and hasattr(os, 'SEEK_DATA') and hasattr(st, 'st_blocks')
+                             and (st.st_blocks * 512 < size))
+                if is_sparse:
+                    try:
+                        segments = list(self._data_segments(fd_in, size))
+                    except OSError:
+                        segments = [(0, size)]
+                else:
+                    segments = [(0, size)]
+
+                for start, end in segments:
+                    method = self._copy_range(fd_in, fd_out, start, end - start, method)
+                if is_sparse and (self.progress is not None):
+                    # Os buracos também contam como copiados.
+                    self.progress.update(size - sum(end - start for start, end in segments))
+                # Recria o buraco final (se houver) sem alocar blocos.
+                os.ftruncate(fd_out, size)
+
+        if copy_stat:
+            copystat(src, dest)
+        else:
+            copymode(src, dest)
+        self._count(method, src, dest, size)
+        return size
 
-    def device_ismounted(device: str) -> bool:
+    def _copy_tree_file(self, item: tuple):
+        src, dest = item
+        try:
+            self.copy_file(src, dest, copy_stat=True)
+        except OSError as e:
+            return src, e
+        return None
+
+    def _iter_tree(self, src: str, dest: str, dirs: list):
+        """Cria os diretórios de destino e gera os pares (src, dest) dos arquivos."""
+        os.makedirs(dest)
+        dirs.append((src, dest))
+        with os.scandir(src) as it:
+            entries = list(it)
+        for entry in entries:
+            target = os.path.join(dest, entry.name)
+            if entry.is_dir(follow_symlinks=False):
+                try:
+                    yield from self._iter_tree(entry.path, target, dirs)
+                except OSError as e:
+                    self.errors.append((entry.path, e))
+                continue
+            if not entry.is_symlink():
+                # Pipes, sockets e dispositivos não são copiados (como shutil.copytree).
+                try:
+                    error = _special_file_error(entry.path, entry.stat(follow_symlinks=False).st_mode)
+                except OSError as e:
+                    error = e
+                if error is not None:
+                    self.errors.append((entry.path, error))
+                    continue
+            yield entry.path, target
+
+    def copy_tree(self, src: str, dest: str) -> int:
         """
-          Verifica se um dispositivo está montado.
-        diferente de os.path.ismount(path) que verifica se um caminho é ponto de montagem, este
-        metódo trabalha com um dispositivo (/dev/sda1, /dev/sda2, ...)
+           Copia o diretório src para dest (que não pode existir, como shutil.copytree).
+        Os arquivos são copiados em paralelo, links simbólicos são copiados como links.
+        Retorna o número de bytes copiados, os erros ficam em self.errors.
         """
-
-        if os.name != 'posix':
-            return False
-
-        if '/dev/loop' in device:
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.errors = []
+        bytes_before = self.bytes_copied
+        dirs = []
+        if (self.progress is not None) and (self.progress.total_bytes is None):
+            # Uma leitura extra da árvore (apenas stat) para calcular porcentagem e ETA.
+            size = FileSize(src)
+            self.progress.total_bytes = int(size.get_size())
+            self.progress.total_files = size.files
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = _bounded_map(
+                executor, self._copy_tree_file, self._iter_tree(src, dest, dirs),
+                max_inflight=self.max_workers * 4, ordered=False,
+            )
+            for result in results:
+                if result is not None:
+                    self.errors.append(result)
+
+        from shutil import copystat
+        # As datas dos diretórios são copiadas por último (a cópia dos arquivos as altera).
+        for src_dir, dest_dir in reversed(dirs):
             try:
-                with open('/proc/mounts', 'rt') as f:
-                    mounts = f.read()
-            except Exception as e:
-                print('ERRO', e)
-                return False
-        else:
-            proc = ExecShellCommand(['mount'])
-            proc.exec_silent()
-            mounts = proc.text_exit
-
-        _ismount: bool = False
-        for num, line in enumerate(mounts.split('\n')):
-            if num < len(mounts.split('\n')) - 1:
-                if (line.split()[0] == device) and (len(line.split()[0]) == len(device)):
-                    _ismount = True
-                    break
+                copystat(src_dir, dest_dir)
+            except OSError as e:
+                self.errors.append((src_dir, e))
+        return self.bytes_copied - bytes_before
+
+    def copy(self, src: str, dest: str) -> int:
+        """Copia um arquivo ou diretório, retorna o número de bytes copiados."""
+        if os.path.isdir(src) and not os.path.islink(src):
+            return self.copy_tree(src, dest)
+        if (self.progress is not None) and (self.progress.total_bytes is None):
+            self.progress.total_bytes = os.path.getsize(src)
+            self.progress.total_files = 1
+        return self.copy_file(src, dest)
+
+    def _sync_temp_path(self, dest: str) -> str:
+        head, name = os.path.split(dest)
+        return os.path.join(head, f'.{name}.cmdlib-sync')
+
+    def _sync_file(self, item: tuple):
+        """Copia src para um arquivo temporário e substitui dest (os.replace)."""
+        src, dest = item
+        temp_path = self._sync_temp_path(dest)
+        try:
+            if os.path.lexists(temp_path):
+                os.unlink(temp_path)
+            self.copy_file(src, temp_path, copy_stat=True)
+            if os.path.isdir(dest) and not os.path.islink(dest):
+                from shutil import rmtree
+                rmtree(dest)
+            os.replace(temp_path, dest)
+        except OSError as e:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            return src, e
+        return None
+
+    def _sync_changed(self, src_entry, dest_entry, *, checksum: bool) -> bool:
+        """Retorna True se dest_entry for diferente de src_entry."""
+        if src_entry.is_symlink() or dest_entry.is_symlink():
+            if not (src_entry.is_symlink() and dest_entry.is_symlink()):
+                return True
+            return os.readlink(src_entry.path) != os.readlink(dest_entry.path)
+        if dest_entry.is_dir(follow_symlinks=False):
+            return True
+        src_st = src_entry.stat(follow_symlinks=False)
+        dest_st = dest_entry.stat(follow_symlinks=False)
+        if src_st.st_size != dest_st.st_size:
+            return True
+        if checksum:
+            # Tamanhos iguais, o conteúdo é comparado depois (em paralelo).
+            return None
+        # Comparação em segundos inteiros, como o rsync.
+        return int(src_st.st_mtime) != int(dest_st.st_mtime)
+
+    def _sync_walk(self, src: str, dest: str, plan, *, checksum: bool, delete: bool, to_compare: list) -> None:
+        with os.scandir(src) as it:
+            src_entries = {entry.name: entry for entry in it}
+        dest_entries = {}
+        if os.path.isdir(dest) and not os.path.islink(dest):
+            with os.scandir(dest) as it:
+                dest_entries = {entry.name: entry for entry in it}
+
+        if delete:
+            for name in sorted(set(dest_entries) - set(src_entries)):
+                plan.delete.append(dest_entries[name].path)
+
+        for name in sorted(src_entries):
+            src_entry = src_entries[name]
+            dest_entry = dest_entries.get(name)
+            target = os.path.join(dest, name)
+
+            if src_entry.is_dir(follow_symlinks=False):
+                if dest_entry is None:
+                    plan.mkdir.append(target)
+                elif dest_entry.is_symlink() or not dest_entry.is_dir():
+                    plan.delete.append(target)
+                    plan.mkdir.append(target)
+                    dest_entry = None
+                plan.dirs.append((src_entry.path, target))
+                self._sync_walk(src_entry.path, target, plan, checksum=checksum, delete=delete,
+                                to_compare=to_compare)
+                continue
+
+            if not src_entry.is_symlink():
+                # Apenas arquivos regulares e links entram no plano.
+                try:
+                    error = _special_file_error(src_entry.path, src_entry.stat(follow_symlinks=False).st_mode)
+                except OSError as e:
+                    error = e
+                if error is not None:
+                    self.errors.append((src_entry.path, error))
+                    continue
+
+            if dest_entry is None:
+                changed = True
+            else:
+                changed = self._sync_changed(src_entry, dest_entry, checksum=checksum)
+            if changed is None:
+                to_compare.append((src_entry.path, target, src_entry.stat(follow_symlinks=False).st_size))
+            elif changed:
+                plan.copy.append((src_entry.path, target))
+                if not src_entry.is_symlink():
+                    plan.bytes += src_entry.stat(follow_symlinks=False).st_size
+
+    def sync(self, src: str, dest: str, *, checksum: bool=False, delete: bool=False, dry_run: bool=False,
+             algorithm: str='sha256', shasum=None):
+        """
+           Sincroniza o diretório dest com src (como rsync -a), copiando apenas os
+        arquivos novos ou alterados. Retorna um SyncPlan com as operações.
 
-        return _ismount
+        checksum = compara o conteúdo (hash algorithm) dos arquivos com o mesmo tamanho,
+                   por padrão são comparados tamanho e data de modificação.
+        delete   = apaga de dest os arquivos que não existem em src.
+        dry_run  = apenas retorna o plano, nada é alterado.
 
+        Os arquivos alterados são copiados para um arquivo temporário e depois
+        substituem o destino (os.replace), a cópia nunca fica pela metade.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        from shutil import copystat, rmtree
+
+        plan = SyncPlan(src, dest, dry_run=dry_run)
+        self.errors = []
+        to_compare = []
+        if not os.path.isdir(dest):
+            plan.mkdir.append(dest)
+        plan.dirs.append((src, dest))
+        self._sync_walk(src, dest, plan, checksum=checksum, delete=delete, to_compare=to_compare)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            if to_compare:
+                from pathlib import Path
+                if shasum is None:
+                    shasum = ShaSum()
+
+                def compare(item):
+                    src_path, dest_path, size = item
+                    src_digest = shasum._hexdigest(Path(src_path), algorithm)
+                    return item, (src_digest is None) or (src_digest != shasum._hexdigest(Path(dest_path), algorithm))
+
+                for (src_path, dest_path, size), changed in executor.map(compare, to_compare):
+                    if changed:
+                        plan.copy.append((src_path, dest_path))
+                        plan.bytes += size
+
+            if dry_run:
+                plan.errors = list(self.errors)
+                return plan
+
+            if (self.progress is not None) and (self.progress.total_bytes is None):
+                self.progress.total_bytes = plan.bytes
+                self.progress.total_files = len(plan.copy)
+            for path in plan.delete:
+                try:
+                    if os.path.isdir(path) and not os.path.islink(path):
+                        rmtree(path)
+                    else:
+                        os.unlink(path)
+                except OSError as e:
+                    self.errors.append((path, e))
+            for path in plan.mkdir:
+                try:
+                    os.makedirs(path, exist_ok=True)
+                except OSError as e:
+                    self.errors.append((path, e))
+
+            results = _bounded_map(
+                executor, self._sync_file, plan.copy, max_inflight=self.max_workers * 4, ordered=False,
+            )
+            for result in results:
+                if result is not None:
+                    self.errors.append(result)
+
+        # As datas dos diretórios são copiadas por último (a cópia dos arquivos as altera).
+        for src_dir, dest_dir in reversed(plan.dirs):
+            try:
+                copystat(src_dir, dest_dir)
+            except OSError as e:
+                self.errors.append((src_dir, e))
+        plan.errors = list(self.errors)
+        return plan
 
 
-class ByteSize(int):
+class SyncPlan(object):
     """
-      Classe para mostrar o tamaho de um arquivo (B, KB, MB, GB) de modo legível para humanos.
-    """
-
-    # https://qastack.com.br/programming/1392413/calculating-a-directorys-size-using-python
-    # 2021-11-13 - 21:12
-    
-    _kB = 1024
-    _suffixes = 'B', 'kB', 'MB', 'GB', 'PB'
-
-    def __new__(cls, *args, **kwargs):
-        return super().__new__(cls, *args, **kwargs)
-
-    def __init__(self, *args, **kwargs):
-        self.bytes = self.B = int(self)
-        self.kilobytes = self.kB = self / self._kB**1
-        self.megabytes = self.MB = self / self._kB**2
-        self.gigabytes = self.GB = self / self._kB**3
-        self.petabytes = self.PB = self / self._kB**4
-        *suffixes, last = self._suffixes
-        suffix = next((
-            suffix
-            for suffix in suffixes
-            if 1 < getattr(self, suffix) < self._kB
-        ), last)
-        self.readable = suffix, getattr(self, suffix)
+       Operações de uma sincronização (CopyEngine.sync / ShellCore.sync).
 
+    mkdir  = diretórios criados em dest.
+    copy   = arquivos copiados [(src, dest)].
+    delete = arquivos/diretórios apagados de dest.
+    bytes  = total de bytes a copiar.
+    errors = erros da execução [(caminho, exceção)].
+    """
+    def __init__(self, src: str, dest: str, *, dry_run: bool=False) -> None:
         super().__init__()
+        self.src: str = src
+        self.dest: str = dest
+        self.dry_run: bool = dry_run
+        self.mkdir: list = []
+        self.copy: list = []
+        self.delete: list = []
+        self.dirs: list = []
+        self.bytes: int = 0
+        self.errors: list = []
 
-    def __str__(self):
-        return self.__format__('.2f')
+    @property
+    def returnbool(self) -> bool:
+        return not self.errors
 
     def __repr__(self):
-        return '{}({})'.format(self.__class__.__name__, super().__repr__())
+        return '{}(mkdir={}, copy={}, delete={}, bytes={}, dry_run={})'.format(
+            self.__class__.__name__, len(self.mkdir), len(self.copy), len(self.delete), self.bytes, self.dry_run
+        )
 
-    def __format__(self, format_spec):
-        suffix, val = self.readable
-        return '{val:{fmt}} {suf}'.format(val=val, fmt=format_spec, suf=suffix)
 
-    def __sub__(self, other):
-        return self.__class__(super().__sub__(other))
+class RemoveEngine(object):
+    """
+       Apagar árvores de diretórios com os.scandir()/os.unlink() relativos ao
+    descritor do diretório pai (dir_fd). Os diretórios são abertos com O_NOFOLLOW,
+    trocar um diretório por um link simbólico durante a remoção não faz o engine
+    apagar arquivos fora da árvore.
 
-    def __add__(self, other):
-        return self.__class__(super().__add__(other))
+    max_workers = threads usadas para apagar os diretórios em paralelo, em todos os
+                  níveis da árvore.
 
-    def __mul__(self, other):
-        return self.__class__(super().__mul__(other))
+    Os erros não interrompem a remoção, ficam em errors [(caminho, exceção)].
+    Contadores: files (arquivos/links apagados) e dirs (diretórios apagados).
+    """
+    def __init__(self, *, max_workers: int=None) -> None:
+        self.max_workers: int = max_workers or get_max_workers()
+        self.files: int = 0
+        self.dirs: int = 0
+        self.errors: list = []
+        self._threads: list = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _open_dir(name: str, dir_fd: int) -> int:
+        return os.open(name, os.O_RDONLY | os.O_DIRECTORY | os.O_NOFOLLOW, dir_fd=dir_fd)
+
+    def _unlink_entry(self, name: str, path: str, dir_fd: int, result: list) -> None:
+        try:
+            os.unlink(name, dir_fd=dir_fd)
+            result[0] += 1
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            result[2].append((path, e))
+
+    def _clear_dir(self, node: list) -> tuple:
+        """
+           Abre o diretório do nó (relativo ao descritor do pai) e apaga os arquivos
+        dele. Retorna ([arquivos, diretórios, erros], subdiretórios), os subdiretórios
+        são apagados por outras tarefas e o diretório só é removido depois deles.
+        """
+        import errno
 
-    def __rsub__(self, other):
-        return self.__class__(super().__sub__(other))
+        parent, name, path = node[0], node[1], node[2]
+        result = [0, 0, []]
+        subdirs = []
+        try:
+            node[3] = self._open_dir(name, parent[3])
+        except OSError as e:
+            if e.errno in (errno.ELOOP, errno.ENOTDIR):
+                # Foi trocado por um link/arquivo: apaga apenas a entrada.
+                self._unlink_entry(name, path, parent[3], result)
+            elif e.errno != errno.ENOENT:
+                result[2].append((path, e))
+            return result, subdirs
 
-    def __radd__(self, other):
-        return self.__class__(super().__add__(other))
+        try:
+            with os.scandir(node[3]) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.name)
+                    else:
+                        self._unlink_entry(entry.name, os.path.join(path, entry.name), node[3], result)
+        except OSError as e:
+            result[2].append((path, e))
+        return result, subdirs
+
+    def _finish_dir(self, node: list, totals: list) -> None:
+        """Remove o diretório do nó e dos ancestrais que não têm mais subdiretórios pendentes."""
+        while node[0] is not None:
+            parent, name, path, fd = node[:4]
+            if fd is not None:
+                os.close(fd)
+                node[3] = None
+                try:
+                    os.rmdir(name, dir_fd=parent[3])
+                    totals[1] += 1
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    totals[2].append((path, e))
+            parent[4] -= 1
+            if parent[4] > 0:
+                return
+            node = parent
+
+    def _remove_tree(self, path: str) -> bool:
+        """
+           Cada diretório (em qualquer nível) é lido e esvaziado por uma tarefa do pool
+        e removido quando os seus subdiretórios terminam. Os diretórios aguardando
+        tarefas ficam em uma pilha, a árvore é percorrida em profundidade e apenas os
+        diretórios em andamento e os seus ancestrais ficam abertos.
+        """
+        from concurrent.futures import ThreadPoolExecutor, wait as wait_futures, FIRST_COMPLETED
+
+        abs_path = os.path.abspath(path)
+        parent_fd = os.open(os.path.dirname(abs_path), os.O_RDONLY | os.O_DIRECTORY)
+        # nó = [pai, nome, caminho, fd, subdiretórios pendentes]
+        top = [None, None, os.path.dirname(abs_path), parent_fd, 1]
+        ready = [[top, os.path.basename(abs_path), path, None, 0]]
+        totals = [0, 0, []]
+        max_inflight = self.max_workers * 2
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                pending = {}
+                while ready or pending:
+                    while ready and (len(pending) < max_inflight):
+                        node = ready.pop()
+                        pending[executor.submit(self._clear_dir, node)] = node
+                    done, _ = wait_futures(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        node = pending.pop(future)
+                        (files, dirs, errors), subdirs = future.result()
+                        totals[0] += files
+                        totals[1] += dirs
+                        totals[2].extend(errors)
+                        if not subdirs:
+                            self._finish_dir(node, totals)
+                            continue
+                        node[4] = len(subdirs)
+                        for name in subdirs:
+                            ready.append([node, name, os.path.join(node[2], name), None, 0])
+        finally:
+            os.close(parent_fd)
+
+        with self._lock:
+            self.files += totals[0]
+            self.dirs += totals[1]
+            self.errors.extend(totals[2])
+        return not totals[2]
+
+    def remove(self, path: str, *, background: bool=False) -> bool:
+        """
+           Apaga path (arquivo, link ou diretório). Retorna False se algum item não
+        pôde ser apagado (veja self.errors).
 
-    def __rmul__(self, other):
-        return self.__class__(super().__rmul__(other))
+        background = renomeia path para um nome temporário no mesmo diretório e o
+                     apaga em uma thread, o retorno é imediato. Use self.wait() para
+                     aguardar o fim das remoções.
+        """
+        if not os.path.lexists(path):
+            raise FileNotFoundError(f'Arquivo ou diretório não encontrado ... {path}')
+        if not background:
+            return self._remove_tree(path)
+
+        head, name = os.path.split(os.path.abspath(path))
+        trash_path = os.path.join(head, f'.{name}.cmdlib-rm-{os.getpid()}-{time.monotonic_ns()}')
+        os.rename(path, trash_path)
+        # Não é daemon: o interpretador espera a remoção terminar antes de sair.
+        thread = threading.Thread(target=self._remove_tree, args=(trash_path,), name='cmdlib-rm')
+        thread.start()
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            self._threads.append(thread)
+        return True
+
+    def wait(self, timeout: float=None) -> bool:
+        """Aguarda as remoções em segundo plano, retorna True se todas terminaram."""
+        with self._lock:
+            threads = list(self._threads)
+        for thread in threads:
+            thread.join(timeout)
+        return not any(thread.is_alive() for thread in threads)
+
+
+def _path_overlaps(a: str, b: str) -> bool:
+    """True se a e b forem o mesmo caminho ou um estiver dentro do outro."""
+    if a == b:
+        return True
+    return a.startswith(os.path.join(b, '')) or b.startswith(os.path.join(a, ''))
+
+
+class ShellOperation(object):
+    """
+       Uma operação de um ShellPlan e o seu resultado.
 
+    status = 'pending' | 'ok' | 'failed' | 'skipped' (uma dependência falhou) |
+             'redundant' (mkdir já coberto por outro mkdir do plano).
+    """
+    def __init__(self, index: int, name: str, args: tuple) -> None:
+        super().__init__()
+        self.index: int = index
+        self.name: str = name # mkdir | copy | rmdir
+        self.args: tuple = args
+        self.status: str = 'pending'
+        self.error: str = None
+        self.wall_time: float = 0.0
+        self.depends: set = set()
 
+    @property
+    def returnbool(self) -> bool:
+        return self.status in ('ok', 'redundant')
 
-class FileSize(object):
-    """Obeter o tamanho de arquivos e diretórios com python."""
-    def __init__(self, path: str):
-        self.path: str = path # arquivo/diretório.
+    @property
+    def reads(self) -> tuple:
+        if self.name == 'copy':
+            return (self.args[0],)
+        return ()
 
-    def _get_folder_size(self) -> float:
-        _path: Path = Path(self.path)
-        total: float = 0.0
-        for item in _path.rglob('*'):
-            total += os.path.getsize(item)
-        return total
+    @property
+    def writes(self) -> tuple:
+        return (self.args[-1],)
 
-    def _get_file_size(self) -> float:
-        return float(os.path.getsize(self.path))
+    def conflicts(self, other) -> bool:
+        """True se as duas operações não puderem ser executadas ao mesmo tempo."""
+        if self.name == other.name == 'mkdir':
+            # mkdir -p/os.makedirs podem ser executados em qualquer ordem.
+            return False
+        for path in self.writes:
+            for other_path in other.reads + other.writes:
+                if _path_overlaps(path, other_path):
+                    return True
+        for path in self.reads:
+            for other_path in other.writes:
+                if _path_overlaps(path, other_path):
+                    return True
+        return False
 
-    def get_size(self) -> float:
-        if os.path.isdir(self.path):
-            return self._get_folder_size()
-        else:
-            return self._get_file_size()
+    def __repr__(self):
+        return '{}({}, {}{})'.format(
+            self.__class__.__name__, self.name, ', '.join(map(repr, self.args)),
+            f', status={self.status!r}' if self.status != 'pending' else ''
+        )
 
-    def number_size(self) -> float:
-        """
-        ESTE MÉTODO FOI DESCONTINUADO. Use self.get_size()
-          Retorna o tamanho em bytes de um arquivo/diretório.
-        """
-        return self.get_size()
 
-    def human_size(self) -> ByteSize:
-        """Retorna o tamaho de um arquivo ou diretório de maneira legivel a humanos."""
-        return ByteSize(int(self.get_size()))
+class ShellPlan(object):
+    """
+       Lista de operações (mkdir, copy, rmdir) executadas de uma só vez por um
+    ShellCoreUtils (shellcore.plan()).
+
+    - mkdir repetidos, ou de diretórios pais criados por outro mkdir, são
+      marcados como 'redundant' e não são executados.
+    - uma operação só é executada depois das operações anteriores que usam os
+      mesmos caminhos (ou caminhos pai/filho), as demais são executadas em paralelo.
+    - se uma operação falhar, as que dependem dela são marcadas como 'skipped'.
+
+    execute() retorna a lista de ShellOperation com o resultado de cada operação.
+    """
+    def __init__(self, shellcore) -> None:
+        super().__init__()
+        self.shellcore = shellcore
+        self.operations: list = []
+
+    def _add(self, name: str, *paths) -> 'ShellPlan':
+        args = tuple(os.path.abspath(path) for path in paths)
+        self.operations.append(ShellOperation(len(self.operations), name, args))
+        return self
+
+    def mkdir(self, path: str) -> 'ShellPlan':
+        return self._add('mkdir', path)
+
+    def copy(self, src: str, dest: str) -> 'ShellPlan':
+        return self._add('copy', src, dest)
+
+    def rmdir(self, path: str) -> 'ShellPlan':
+        return self._add('rmdir', path)
+
+    def __len__(self) -> int:
+        return len(self.operations)
+
+    def _mark_redundant(self) -> None:
+        operations = self.operations
+        for i, op in enumerate(operations):
+            if op.name != 'mkdir':
+                continue
+            path = op.args[0]
+            # Um mkdir posterior do mesmo diretório ou de um subdiretório, sem nenhuma
+            # operação no caminho entre os dois, já cria este diretório.
+            for later in operations[i + 1:]:
+                if later.name == 'mkdir' and later.status != 'redundant':
+                    later_path = later.args[0]
+                    if later_path == path or later_path.startswith(os.path.join(path, '')):
+                        op.status = 'redundant'
+                        break
+                if later.conflicts(op):
+                    break
 
+    def _resolve_depends(self) -> list:
+        active = [op for op in self.operations if op.status == 'pending']
+        for i, op in enumerate(active):
+            op.depends = {prev.index for prev in active[:i] if op.conflicts(prev)}
+        return active
+
+    def execute(self, *, max_workers: int=None) -> list:
+        """Executa o plano e retorna a lista de ShellOperation."""
+        self._mark_redundant()
+        active = self._resolve_depends()
+        if active:
+            self.shellcore._execute_plan(active, max_workers=max_workers or get_max_workers())
+        return self.operations
+
+    @property
+    def returnbool(self) -> bool:
+        return all(op.returnbool for op in self.operations)
 
 
 class ShellCoreUtils(object):
@@ -347,6 +2892,10 @@ class ShellCoreUtils(object):
     def copy(self, SRC: str, DEST: str) -> bool:
         pass
 
+    def sync(self, src: str, dest: str, *, checksum: bool=False, delete: bool=False, dry_run: bool=False):
+        """Sincroniza o diretório dest com src, retorna um SyncPlan."""
+        pass
+
     def rmdir(self, path: str) -> bool:
         pass
 
@@ -371,21 +2920,80 @@ class ShellCoreUtils(object):
     def device_ismounted(self, device: str) -> bool:
         pass
 
+    def plan(self) -> ShellPlan:
+        """
+           Cria um ShellPlan para executar várias operações de uma só vez:
+        shellcore.plan().mkdir(a).copy(b, c).rmdir(d).execute()
+        """
+        return ShellPlan(self)
+
+    def _exec_operation(self, op: ShellOperation) -> None:
+        """Executa uma operação do plano, deve ser seguro chamar em várias threads."""
+        pass
+
+    def _execute_plan(self, operations: list, *, max_workers: int) -> None:
+        """
+           Executa as operações de um plano em paralelo, respeitando as dependências
+        (op.depends).
+        """
+        from concurrent.futures import ThreadPoolExecutor, wait as wait_futures, FIRST_COMPLETED
+
+        by_index = {op.index: op for op in operations}
+        waiting = list(operations)
+        pending = {}
+
+        def run(op):
+            start = time.monotonic()
+            try:
+                self._exec_operation(op)
+            except Exception as e:
+                op.status = 'failed'
+                op.error = str(e)
+            op.wall_time = time.monotonic() - start
+            return op
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while waiting or pending:
+                still_waiting = []
+                for op in waiting:
+                    statuses = [by_index[i].status for i in op.depends]
+                    if any(status in ('failed', 'skipped') for status in statuses):
+                        op.status = 'skipped'
+                        op.error = 'uma operação anterior falhou.'
+                    elif all(status == 'ok' for status in statuses):
+                        pending[executor.submit(run, op)] = op
+                    else:
+                        still_waiting.append(op)
+                if len(still_waiting) == len(waiting) and not pending:
+                    break
+                waiting = still_waiting
+                if pending:
+                    done, _ = wait_futures(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        del pending[future]
+
 
 
 class LinuxShellCore(ShellCoreUtils):
-   
-    def __init__(self, *, exec_root: bool = False, verbose=False):
+
+    # Tamanho máximo (bytes) de cada parte do script de um plano executado com exec_root.
+    PLAN_SCRIPT_SIZE = 96 * 1024
+    _PLAN_MARKER = '@@cmdlib-op'
+
+    def __init__(self, *, exec_root: bool = False, verbose=False, root_helper: bool=False):
         
         super().__init__()
         # Os comandos podem ser executados como root por meio do sudo (apenas em sistemas posix).
         # se exec_root for True, o comando sudo será inserido no comando a ser executado.
+        # Com root_helper=True o sudo é executado apenas uma vez, os comandos seguintes
+        # são enviados para um processo auxiliar root (RootHelper).
         if sys.platform == 'linux':
             if which('sudo') is None:
                 print(f'{__class__.__name__} comando [sudo] não está disponível.')
 
         self.exec_root: bool = exec_root
         self.verbose: bool = verbose
+        self.root_helper: bool = root_helper
         self._cmd_list = []
         self._exec_commands: ExecShellCommand = ExecShellCommand(self._cmd_list)
 
@@ -403,31 +3011,211 @@ class LinuxShellCore(ShellCoreUtils):
         print(text)
         sys.stdout.flush()
 
+    def _exec_cli(self, cli: list, *, silent: bool=False) -> bool:
+        """
+           Executa cli (como root se self.exec_root for True), o resultado fica em
+        self._exec_commands (returnbool/returncode/text_exit).
+        """
+        if self.exec_root and self.root_helper and (os.geteuid() != 0):
+            helper = get_root_helper()
+            if helper is None:
+                print(f'{__class__.__name__} ERRO processo auxiliar root não foi iniciado.')
+                self._exec_commands.returnbool = False
+                self._exec_commands.returncode = 1
+                self._exec_commands.text_exit = None
+                return False
+
+            result = helper.exec(cli)
+            self._exec_commands.returnbool = result.returnbool
+            self._exec_commands.returncode = result.returncode
+            if result.returnbool:
+                self._exec_commands.text_exit = result.stdout
+            else:
+                self._exec_commands.text_exit = result.stderr
+            if (not silent) and result.stdout:
+                print(result.stdout, end='')
+            return result.returnbool
+
+        if self.exec_root:
+            cli.insert(0, 'sudo')
+        self._exec_commands.cli = cli
+        if silent:
+            self._exec_commands.exec_silent()
+        else:
+            self._exec_commands.exec()
+        return self._exec_commands.returnbool
+
     def copy(self, SRC: str, DEST: str) -> bool:
         """Copia arquivos é diretórios com o cp do Linux."""
        
         self.print_msg(f'Copiando ... {SRC}')
-        self._exec_commands.cli = ['cp', '-R', SRC, DEST]
-        
-        if self.exec_root:
-            self._exec_commands.cli.insert(0, 'sudo')
+        start = time.monotonic()
+        returnbool = self._exec_cli(['cp', '-R', SRC, DEST])
+        if events.enabled:
+            events.emit('copy', start=start, backend='linux', src=SRC, dest=DEST, returnbool=returnbool)
+        return returnbool
 
-        self._exec_commands.exec()
-        return self._exec_commands.returnbool
+    def sync(self, src: str, dest: str, *, checksum: bool=False, delete: bool=False, dry_run: bool=False):
+        """
+           Sincroniza o diretório dest com src usando o rsync (rsync -a), retorna um
+        SyncPlan montado a partir da saída do rsync (--itemize-changes) ou None em
+        caso de erro.
+        """
+        if which('rsync') is None:
+            print(f'{__class__.__name__} comando [rsync] não está disponível.')
+            return None
+
+        self.print_msg(f'Sincronizando ... {src}')
+        cli = ['rsync', '-a', '--itemize-changes']
+        if checksum:
+            cli.append('--checksum')
+        if delete:
+            cli.append('--delete')
+        if dry_run:
+            cli.append('--dry-run')
+        # A barra no final faz o rsync copiar o conteúdo de src e não o próprio diretório.
+        cli.extend(['--', os.path.join(src, ''), dest])
+        start = time.monotonic()
+        if not self._exec_cli(cli, silent=True):
+            print(f'{__class__.__name__} {self._exec_commands.text_exit}')
+            return None
+
+        plan = SyncPlan(src, dest, dry_run=dry_run)
+        for line in (self._exec_commands.text_exit or '').splitlines():
+            item, _, name = line.partition(' ')
+            if item == '*deleting':
+                plan.delete.append(os.path.join(dest, name.strip().rstrip('/')))
+            elif (len(item) == 11) and name:
+                name = name.split(' -> ')[0].rstrip('/')
+                if item[:2] == 'cd':
+                    if item[2] == '+':
+                        plan.mkdir.append(os.path.normpath(os.path.join(dest, name)))
+                elif item[0] in '<>c':
+                    plan.copy.append((os.path.join(src, name), os.path.join(dest, name)))
+        if events.enabled:
+            events.emit(
+                'sync', start=start, backend='linux', src=src, dest=dest, files=len(plan.copy),
+                deleted=len(plan.delete), dry_run=dry_run, returnbool=True,
+            )
+        return plan
 
     def mkdir(self, path: str) -> bool:
         """Cria diretórios com o mkdir"""
         self.print_msg(f'Criando ditetório ... {path}')
-        if os.system(f'mkdir -p {path}') == 0:
-            return True
-        return False
+        return self._exec_cli(['mkdir', '-p', '--', path], silent=True)
+
+    @staticmethod
+    def _operation_cli(op: ShellOperation) -> list:
+        if op.name == 'mkdir':
+            return ['mkdir', '-p', '--', *op.args]
+        elif op.name == 'copy':
+            return ['cp', '-R', '--', *op.args]
+        return ['rm', '-rf', '--', *op.args]
+
+    def _exec_operation(self, op: ShellOperation) -> None:
+        result = run_command(self._operation_cli(op))
+        op.status = 'ok' if result.returnbool else 'failed'
+        if not result.returnbool:
+            op.error = result.stderr.strip()
+
+    def _execute_plan(self, operations: list, *, max_workers: int) -> None:
+        """
+           Sem exec_root as operações são executadas em paralelo (um processo por
+        operação). Com exec_root o plano é executado em sequência por um processo
+        root (sudo sh -c SCRIPT ou o RootHelper). O script é dividido em partes de
+        até PLAN_SCRIPT_SIZE bytes, um único argumento do execve() não pode passar
+        de MAX_ARG_STRLEN (128 KiB).
+        """
+        if not self.exec_root:
+            return super()._execute_plan(operations, max_workers=max_workers)
+
+        by_index = {op.index: op for op in operations}
+        chunk = []
+        size = 0
+        for op in operations:
+            line = self._plan_script_line(op, by_index, chunk)
+            if chunk and (line is not None) and (size + len(line.encode('utf8')) > self.PLAN_SCRIPT_SIZE):
+                self._exec_plan_script(chunk)
+                chunk = []
+                size = 0
+                line = self._plan_script_line(op, by_index, chunk)
+            if line is None:
+                continue
+            chunk.append((op, line))
+            size += len(line.encode('utf8')) + 1
+        if chunk:
+            self._exec_plan_script(chunk)
+
+    def _plan_script_line(self, op: ShellOperation, by_index: dict, chunk: list) -> str:
+        """
+           Retorna a linha do script para op. As dependências executadas em partes
+        anteriores já têm o status conhecido, se alguma delas não terminou com 'ok'
+        op é marcada como 'skipped' e o retorno é None.
+        """
+        import shlex
+
+        in_chunk = {chunk_op.index: chunk_op for chunk_op, _ in chunk}
+        depends = []
+        for i in sorted(op.depends):
+            if i in in_chunk:
+                depends.append(i)
+            elif by_index[i].status != 'ok':
+                op.status = 'skipped'
+                op.error = 'uma operação anterior falhou.'
+                return None
+
+        cli = ' '.join(shlex.quote(arg) for arg in self._operation_cli(op))
+        if depends:
+            condition = ' && '.join(f'[ "$s{i}" = 0 ]' for i in depends)
+            line = f'if {condition}; then {cli} 2>&1; s{op.index}=$?; else s{op.index}=skipped; fi'
+        else:
+            line = f'{cli} 2>&1; s{op.index}=$?'
+        return line + f"\nprintf '\\n{self._PLAN_MARKER} %s %s\\n' {op.index} \"$s{op.index}\""
+
+    def _exec_plan_script(self, chunk: list) -> None:
+        """Executa uma parte do plano (lista de (op, linha)) e atualiza o status das operações."""
+        script = '\n'.join(line for _, line in chunk)
+        start = time.monotonic()
+        self._exec_cli(['sh', '-c', script], silent=True)
+        wall_time = time.monotonic() - start
+
+        by_index = {op.index: op for op, _ in chunk}
+        output = []
+        for line in (self._exec_commands.text_exit or '').splitlines():
+            if not line.startswith(self._PLAN_MARKER + ' '):
+                output.append(line)
+                continue
+            _, index, status = line.split(' ', 2)
+            op = by_index[int(index)]
+            op.wall_time = wall_time / len(chunk)
+            text = '\n'.join(output).strip()
+            output = []
+            if status == '0':
+                op.status = 'ok'
+            elif status == 'skipped':
+                op.status = 'skipped'
+                op.error = 'uma operação anterior falhou.'
+            else:
+                op.status = 'failed'
+                op.error = text or f'código de saída {status}'
+
+        # O script não chegou a ser executado (ou foi interrompido).
+        error = (self._exec_commands.text_exit or '').strip()
+        if not error:
+            error = f'o script do plano não foi executado (código de saída {self._exec_commands.returncode}).'
+        for op, _ in chunk:
+            if op.status == 'pending':
+                op.status = 'failed'
+                op.error = error
 
     def rmdir(self, path: str) -> bool:
         """Apaga arquivos e diretórios usando o rm do Linux."""
         self.print_msg(f'Deletando ... {path}')
-        if os.system(f'rm -rf {path}') == 0:
-            return True
-        return False
+        start = time.monotonic()
+        returnbool = self._exec_cli(['rm', '-rf', '--', path], silent=True)
+        if events.enabled:
+            events.emit('remove', start=start, backend='linux', path=path, returnbool=returnbool)
+        return returnbool
 
     def file_size(self, path, *, human=False) -> str:
         """Retorna o tamanho de arquivos e diretórios"""
@@ -440,16 +3228,11 @@ class LinuxShellCore(ShellCoreUtils):
                 path += '/'
 
         if human:
-            self._exec_commands.cli = ['du', '-hs', path]
+            self._cmd_list.extend(['du', '-hs', path])
         else:
-            self._exec_commands.cli = ['du', '-s', path]
+            self._cmd_list.extend(['du', '-s', path])
 
-        if self.exec_root:
-            self._exec_commands.cli.insert(0, 'sudo')
-
-        self._exec_commands.cli = self._cmd_list
-        self._exec_commands.exec_silent()
-        if not self._exec_commands.returnbool: 
+        if not self._exec_cli(self._cmd_list, silent=True):
             return -1.0
 
         return str((self._exec_commands.text_exit).split()[0])
@@ -471,26 +3254,7 @@ class LinuxShellCore(ShellCoreUtils):
         metódo trabalha com um dispositivo (/dev/sda1, /dev/sda2, ...)
         """
 
-        if '/dev/loop' in device:
-            try:
-                with open('/proc/mounts', 'rt') as f:
-                    mounts = f.read()
-            except Exception as e:
-                print(f'{__class__.__name__} {e}')
-                return False
-        else:
-            proc = ExecShellCommand(['mount'])
-            proc.exec_silent()
-            mounts = proc.text_exit
-
-        _ismount: bool = False
-        for num, line in enumerate(mounts.split('\n')):
-            if num < len(mounts.split('\n')) - 1:
-                if (line.split()[0] == device) and (len(line.split()[0]) == len(device)):
-                    _ismount = True
-                    break
-
-        return _ismount
+        return get_mount_table().is_mounted(device)
 
 
 
@@ -500,13 +3264,25 @@ class PythonShellCore(ShellCoreUtils):
     nativos do Python, sem as ferramentas Unix/Linux.
     """
 
-    def __init__(self, *, exec_root: bool=False, verbose=False) -> None:
+    def __init__(self, *, exec_root: bool=False, verbose=False, size_index: bool=False, use_inotify: bool=False,
+                 background_remove: bool=False) -> None:
         super().__init__()
         self._cmd_list = []
         self.returnbool: bool = True
         self.exception_text = None
         self.exception_type = None
         self.verbose = verbose
+        # Com size_index=True o tamanho dos diretórios é mantido em um FolderSizeIndex,
+        # consultas repetidas releem apenas os diretórios alterados.
+        self.size_index: bool = size_index
+        self.use_inotify: bool = use_inotify
+        self._size_indexes: dict = {}
+        # Com background_remove=True rmdir() renomeia o diretório e o apaga em uma
+        # thread, retornando imediatamente (veja RemoveEngine).
+        self.background_remove: bool = background_remove
+        self.remove_engine: RemoveEngine = RemoveEngine()
+        # Contadores de bytes/arquivos copiados: self.copy_engine.bytes_copied, files_copied.
+        self.copy_engine: CopyEngine = CopyEngine()
 
     def print_msg(self, text: str) -> None:
         if not self.verbose:
@@ -517,7 +3293,10 @@ class PythonShellCore(ShellCoreUtils):
     def _copy_dir(self, src: str, dest: str) -> bool:
         """Método interno para copiar diretórios"""
         try:
-            copytree(src, dest, symlinks=True, ignore=None)
+            self.copy_engine.copy_tree(src, dest)
+            if self.copy_engine.errors:
+                path, e = self.copy_engine.errors[0]
+                raise type(e)(f'{len(self.copy_engine.errors)} erro(s) ao copiar, o primeiro em {path}: {e}')
         except Exception as e:
             print(__class__.__name__, e)
             self.exception_text = e
@@ -533,7 +3312,7 @@ class PythonShellCore(ShellCoreUtils):
     def _copy_files(self, src: str, dest: str) -> bool:
         """Método interno para copiar arquivos"""
         try:
-            copy(src, dest, follow_symlinks=False)
+            self.copy_engine.copy_file(src, dest)
         except Exception as e:
             print(__class__.__name__, e)
             self.exception_text = e
@@ -546,17 +3325,76 @@ class PythonShellCore(ShellCoreUtils):
             self.returnbool = True
             return True
 
-    def copy(self, src: str, dest: str) -> bool:
-        """Copia arquivos e diretórios."""
+    def sync(self, src: str, dest: str, *, checksum: bool=False, delete: bool=False, dry_run: bool=False):
+        """
+           Copia apenas os arquivos novos ou alterados de src para dest (CopyEngine.sync).
+        Retorna um SyncPlan ou None em caso de erro.
+        """
+        self.print_msg(f'Sincronizando ... {src}')
+        start = time.monotonic()
+        try:
+            plan = self.copy_engine.sync(src, dest, checksum=checksum, delete=delete, dry_run=dry_run)
+            if events.enabled:
+                events.emit(
+                    'sync', start=start, backend='python', src=src, dest=dest, bytes_written=plan.bytes,
+                    files=len(plan.copy), deleted=len(plan.delete), dry_run=dry_run, returnbool=plan.returnbool,
+                )
+            if plan.errors:
+                path, e = plan.errors[0]
+                raise type(e)(f'{len(plan.errors)} erro(s) ao sincronizar, o primeiro em {path}: {e}')
+        except Exception as e:
+            print(__class__.__name__, e)
+            self.exception_text = e
+            self.exception_type = type(e)
+            self.returnbool = False
+            return None
+        else:
+            self.exception_text = None
+            self.exception_type = None
+            self.returnbool = True
+            return plan
+
+    def copy(self, src: str, dest: str, *, sync: bool=False, checksum: bool=False, delete: bool=False,
+             progress: Progress=None) -> bool:
+        """
+           Copia arquivos e diretórios com o CopyEngine (reflink, copy_file_range,
+        sendfile), os arquivos de um diretório são copiados em paralelo.
+        Com sync=True (diretórios) apenas os arquivos novos ou alterados são copiados,
+        veja self.sync().
+        progress = Progress atualizado durante a cópia, ex: Progress(TerminalProgress()).
+        """
+        if progress is not None:
+            self.copy_engine.progress = progress
+            try:
+                return self.copy(src, dest, sync=sync, checksum=checksum, delete=delete)
+            finally:
+                self.copy_engine.progress = None
+                progress.finish()
+
+        if sync and os.path.isdir(src):
+            return self.sync(src, dest, checksum=checksum, delete=delete) is not None
+
+        start = time.monotonic()
+        bytes_before = self.copy_engine.bytes_copied
+        files_before = self.copy_engine.files_copied
         if os.path.isdir(src):
-            return self._copy_dir(src, dest)
+            returnbool = self._copy_dir(src, dest)
         else:
-            return self._copy_files(src, dest)
+            returnbool = self._copy_files(src, dest)
+        if events.enabled:
+            events.emit(
+                'copy', start=start, backend='python', src=src, dest=dest,
+                bytes_written=self.copy_engine.bytes_copied - bytes_before,
+                files=self.copy_engine.files_copied - files_before, returnbool=returnbool,
+            )
+        return returnbool
 
     def mkdir(self, path: str) -> bool:
         """Cria um diretório."""
         try:
             os.makedirs(path)
+            self.returnbool = True
+            return True
         except(PermissionError):
             print(f'{__class__.__name__} você não tem permissão de escrita em ... {path}')
             self.exception_type = 'PermissionError'
@@ -593,9 +3431,13 @@ class PythonShellCore(ShellCoreUtils):
             return True
 
     def _rmdirectory(self, path) -> bool:
-        """Método interno para remover um diretório."""
+        """Método interno para remover um diretório (RemoveEngine, em paralelo)."""
         try:
-            rmtree(path)
+            errors_before = len(self.remove_engine.errors)
+            if not self.remove_engine.remove(path, background=self.background_remove):
+                errors = self.remove_engine.errors[errors_before:]
+                path, e = errors[0]
+                raise type(e)(f'{len(errors)} erro(s) ao apagar, o primeiro em {path}: {e}')
         except Exception as e:
             print(__class__.__name__, e)
             self.exception_text = e
@@ -630,7 +3472,17 @@ class PythonShellCore(ShellCoreUtils):
         self.print_msg(f'Deletando ... {path}')
 
         if os.path.isdir(path):
-            return bool(self._rmdirectory(path))
+            if not events.enabled:
+                return bool(self._rmdirectory(path))
+            start = time.monotonic()
+            files_before = self.remove_engine.files
+            dirs_before = self.remove_engine.dirs
+            returnbool = bool(self._rmdirectory(path))
+            events.emit(
+                'remove', start=start, backend='python', path=path, files=self.remove_engine.files - files_before,
+                dirs=self.remove_engine.dirs - dirs_before, background=self.background_remove, returnbool=returnbool,
+            )
+            return returnbool
         elif os.path.islink(path):
             return bool(self._rmlink(path))
         elif os.path.isfile(path):
@@ -647,10 +3499,32 @@ class PythonShellCore(ShellCoreUtils):
         """
           Retorna o tamanho de um arquivo ou diretório.
         """
+        if self.size_index and os.path.isdir(path):
+            index_key = os.path.abspath(path)
+            if index_key not in self._size_indexes:
+                self._size_indexes[index_key] = FolderSizeIndex(path, use_inotify=self.use_inotify)
+            size = self._size_indexes[index_key].get_size()
+            if not human:
+                return size
+            return ByteSize(int(size))
+
         if not human:
             return FileSize(path).get_size()
         return  FileSize(path).human_size()
 
+    def _exec_operation(self, op: ShellOperation) -> None:
+        # Uma instância por operação: exception_text/returnbool não são compartilhados entre threads.
+        shellcore = PythonShellCore(background_remove=self.background_remove)
+        shellcore.remove_engine = self.remove_engine
+        if op.name == 'rmdir' and not os.path.lexists(op.args[0]):
+            # Como o rm -rf, apagar um caminho que não existe não é um erro no plano.
+            op.status = 'ok'
+            return
+        returnbool = getattr(shellcore, op.name)(*op.args)
+        op.status = 'ok' if returnbool else 'failed'
+        if not returnbool:
+            op.error = str(shellcore.exception_text)
+
     def get_header_file(self, file: str) -> str:
         """Retorna o cabeçalho de um arquivo."""
         return str(from_file(file))
@@ -660,15 +3534,76 @@ class PythonShellCore(ShellCoreUtils):
         return self.get_header_file(file).split()[0]
 
     def get_type_file(self, file: str) -> str:
-        """Retorna o tipo de arquivo baseado no cabeçalho"""
+        """
+           Retorna o tipo de arquivo baseado no cabeçalho, os formatos conhecidos por
+        detect_file_type() não passam pelo libmagic.
+        """
+        file_type = detect_file_type(file)
+        if file_type is not None:
+            return file_type
         return self.get_header_file(file).split()[0]
 
 
+#===============================================================#
+# shellcore = PythonShellCore() - criado no primeiro acesso (__getattr__).
 #===============================================================#
 
-shellcore = PythonShellCore()
+# Quantidade de bytes do início do arquivo lida para identificar o formato.
+FILE_HEADER_SIZE: int = 512
+
+# (deslocamento, assinatura, tipo). O tipo é a primeira palavra da descrição
+# retornada pelo libmagic, assim os dois métodos retornam os mesmos valores.
+_FILE_SIGNATURES = (
+    (0, b'\xfd7zXZ\x00', 'XZ'),
+    (0, b'\x1f\x8b', 'gzip'),
+    (0, b'PK\x03\x04', 'Zip'),
+    (0, b'PK\x05\x06', 'Zip'),
+    (0, b'!<arch>\ndebian-binary', 'Debian'),
+    (0, b'\x28\xb5\x2f\xfd', 'Zstandard'),
+    (0, b'\x04\x22\x4d\x18', 'LZ4'),
+    (257, b'ustar', 'POSIX'),
+)
+
+
+def _is_tar_header(header: bytes) -> bool:
+    """Verifica o checksum do cabeçalho tar (formato v7, sem a assinatura ustar)."""
+    if len(header) < 512:
+        return False
+    try:
+        checksum = int(header[148:156].replace(b'\x00', b' ').strip() or b'-1', 8)
+    except ValueError:
+        return False
+    return checksum == sum(header[:148]) + 8 * 32 + sum(header[156:512])
+
+
+def detect_file_type(data) -> str:
+    """
+        data = caminho do arquivo ou os primeiros bytes do arquivo.
+    Identifica o formato pelo número mágico, sem usar o libmagic. Reconhece
+    XZ, bzip2, gzip, Zip, Debian, Zstandard, LZ4 e tar ('POSIX'/'tar').
+    Retorna None para formatos desconhecidos.
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        header = bytes(data[:FILE_HEADER_SIZE])
+    else:
+        try:
+            with open(data, 'rb') as f:
+                header = f.read(FILE_HEADER_SIZE)
+        except OSError:
+            return None
+
+    for offset, signature, file_type in _FILE_SIGNATURES:
+        if header[offset:offset + len(signature)] == signature:
+            return file_type
+
+    # bzip2: 'BZh' seguido do tamanho do bloco (1-9).
+    if (header[:3] == b'BZh') and (header[3:4] in b'123456789') and (len(header) > 3):
+        return 'bzip2'
+
+    if _is_tar_header(header):
+        return 'tar'
+    return None
 
-#===============================================================#
 
 class File(object):
     """
@@ -677,6 +3612,8 @@ class File(object):
     def __init__(self, file: str) -> None:
         super().__init__()
         self.file = file
+        # (chave do stat, tipo) do último extension_file().
+        self._type_cache: tuple = None
 
     def ext(self) -> str:
         """Retorna a extensão do arquivo baseada no nome."""
@@ -713,11 +3650,29 @@ class File(object):
         return PythonShellCore().get_header_file(self.path())
 
     def extension_file(self):
-        """Retorna o tipo de arquivo baseado no cabeçalho"""
-        if not self.exists():
+        """
+           Retorna o tipo de arquivo baseado no cabeçalho. O resultado fica em cache
+        enquanto o arquivo não for alterado (dev, inode, tamanho e mtime).
+        """
+        if self.file is None:
             return None
+        try:
+            st = os.stat(self.file)
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+
+        key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+        if (self._type_cache is not None) and (self._type_cache[0] == key):
+            return self._type_cache[1]
+
         #return PythonShellCore().get_extension_file(self.path())
-        return shellcore.get_type_file(self.path())
+        file_type = detect_file_type(self.file)
+        if file_type is None:
+            file_type = str(from_file(self.file)).split()[0]
+        self._type_cache = (key, file_type)
+        return file_type
 
     def size(self) -> int:
         """Retorna o tamanho do arquivo em bytes, se o arquivo existir"""
@@ -734,39 +3689,96 @@ class File(object):
 
 
 class UnpackLinux(object):
-    """Classe para descompactar arquivos usando ferramentas Linux."""
+    """
+       Classe para descompactar arquivos usando ferramentas Linux.
+
+    progress = Progress atualizado com os bytes lidos do arquivo compactado. Nos
+               formatos tar o arquivo é enviado ao tar pelo stdin para acompanhar a
+               leitura, nos demais o progresso é atualizado apenas no final.
+    """
 
-    def __init__(self, *, output_dir=os.getcwd()):
+    def __init__(self, *, output_dir=os.getcwd(), progress: Progress=None):
         self.output_dir = output_dir
+        self.progress: Progress = progress
         self.returnbool = True # OK/ERRO (True/False)
 
+    def _unpack_from_stdin(self, command_unpack: list, file_path: str) -> bool:
+        """Executa o tar lendo o arquivo pelo stdin, atualizando self.progress."""
+        # tar ... -f ARQUIVO -> tar ... -f -
+        command_unpack = ['-' if arg == file_path else arg for arg in command_unpack]
+        try:
+            proc = Popen(command_unpack, stdin=PIPE, stdout=DEVNULL, stderr=PIPE)
+        except OSError as e:
+            print(f'{__class__.__name__} {e}')
+            return False
+
+        stderr_output = CapturedOutput(tail_bytes=65536, keep_output=False)
+        reader = threading.Thread(target=pump_streams, args=({'stderr': proc.stderr}, {'stderr': stderr_output}))
+        reader.start()
+        try:
+            with open(file_path, 'rb', buffering=0) as file:
+                while True:
+                    data = file.read(UNPACK_BUFFER_SIZE)
+                    if not data:
+                        break
+                    proc.stdin.write(data)
+                    self.progress.update(len(data))
+        except BrokenPipeError:
+            # O tar terminou antes (erro), o código de saída é verificado abaixo.
+            pass
+        finally:
+            try:
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+        proc.wait()
+        reader.join()
+        proc.stderr.close()
+        if proc.returncode != 0:
+            print(f'{__class__.__name__} {stderr_output.tail()}')
+        return proc.returncode == 0
+
     def unpack(self, path_file: File) -> bool:
         """
             Descompacta arquivos usando as ferramentas de linha de comando Linux.
         """
         # Setar a linha de comando para descomprimir o arquivo, de acordo com
         # a extensão/tipo de arquivo.
-        if path_file.extension_file() == 'XZ':
-            command_unpack = ["tar", "-Jxf", path_file.path(), "-C", self.output_dir]
-        elif path_file.extension_file() == 'bzip2':
-            command_unpack = ["tar", "-jxvf", path_file.path(), "-C", self.output_dir]
-        elif path_file.extension_file() == 'gzip':
-            command_unpack = ["tar", "-zxvf", path_file.path(), "-C", self.output_dir]
-        elif path_file.extension_file() == 'Zip':
-            command_unpack = ["unzip", "-u", path_file.path(), "-d", self.output_dir]
-        elif path_file.extension_file() == 'Debian':
+        file_type = path_file.extension_file()
+        file_path = path_file.path()
+        if file_type == 'XZ':
+            command_unpack = ["tar", "-Jxf", file_path, "-C", self.output_dir]
+        elif file_type == 'bzip2':
+            command_unpack = ["tar", "-jxf", file_path, "-C", self.output_dir]
+        elif file_type == 'gzip':
+            command_unpack = ["tar", "-zxf", file_path, "-C", self.output_dir]
+        elif file_type == 'Zstandard':
+            command_unpack = ["tar", "--zstd", "-xf", file_path, "-C", self.output_dir]
+        elif file_type == 'LZ4':
+            command_unpack = ["tar", "-I", "lz4", "-xf", file_path, "-C", self.output_dir]
+        elif file_type in ('POSIX', 'tar'):
+            command_unpack = ["tar", "-xf", file_path, "-C", self.output_dir]
+        elif file_type == 'Zip':
+            command_unpack = ["unzip", "-q", "-u", file_path, "-d", self.output_dir]
+        elif file_type == 'Debian':
             if os.path.isfile('/etc/debian_version'):
-                command_unpack = ["dpkg-deb", "-x", path_file.path(), self.output_dir]
+                command_unpack = ["dpkg-deb", "-x", file_path, self.output_dir]
             else:
-                command_unpack = ["ar", "-x", path_file.path(), "--output", self.output_dir]
+                command_unpack = ["ar", "-x", file_path, "--output", self.output_dir]
         else:
             print(f'{__name__} ERRO arquivo não suportado {path_file.name()}')
             sys.stdout.flush()
             return False
 
+        if (self.progress is not None) and (command_unpack[0] == 'tar'):
+            self.returnbool = self._unpack_from_stdin(command_unpack, file_path)
+            return self.returnbool
+
         exec_proc = ExecShellCommand(command_unpack)
         exec_proc.exec_silent()
         self.returnbool = exec_proc.returnbool
+        if self.progress is not None:
+            self.progress.update(max(0, (self.progress.total_bytes or 0) - self.progress.bytes_done))
         return self.returnbool
 
 
@@ -783,6 +3795,8 @@ class ShutilUnpack(object):
         path_file = Instância da classe File().
         """
    
+        from shutil import unpack_archive
+
         try:
             unpack_archive(path_file.path(), extract_dir=self.output_dir, format=self.format)
         except Exception as e:
@@ -795,12 +3809,585 @@ class ShutilUnpack(object):
 
 
 
-def unpack(compressed_file: str, *, output_dir: str=os.getcwd(), verbose :bool=True) -> bool:
+# Tamanho dos blocos lidos/escritos pelo StreamUnpack.
+UNPACK_BUFFER_SIZE: int = 1024 * 1024
+
+
+def _safe_member_path(output_dir: str, name: str) -> str:
+    """
+       Retorna o destino de um membro de arquivo compactado dentro de output_dir, ou
+    None se o caminho não for seguro (contém '..' ou fica vazio).
+    """
+    name = name.replace('\\', '/').lstrip('/')
+    parts = [p for p in name.split('/') if p not in ('', '.')]
+    if (not parts) or ('..' in parts):
+        return None
+    return os.path.join(output_dir, *parts)
+
+
+def _merge_tree(src: str, dest: str) -> None:
+    """
+       Move o conteúdo de src para dest (os.replace), mesclando diretórios que já
+    existem em dest.
+    """
+    with os.scandir(src) as it:
+        entries = list(it)
+    for entry in entries:
+        target = os.path.join(dest, entry.name)
+        if entry.is_dir(follow_symlinks=False) and os.path.isdir(target) and not os.path.islink(target):
+            _merge_tree(entry.path, target)
+        else:
+            os.replace(entry.path, target)
+
+
+class _StreamReader(object):
+    """
+       Leitor usado pelo StreamUnpack. Conta os bytes lidos, envia cada bloco lido da
+    origem para os callbacks de on_data e permite devolver dados lidos a mais (unread).
+    """
+    def __init__(self, stream, *, on_data: list=None) -> None:
+        super().__init__()
+        self._stream = stream
+        self._pending: bytes = b''
+        self.on_data: list = on_data or []
+        self.bytes_read: int = 0
+
+    def _read_source(self, size: int) -> bytes:
+        data = self._stream.read(size)
+        if data:
+            self.bytes_read += len(data)
+            for callback in self.on_data:
+                callback(data)
+        return data
+
+    def read(self, size: int=-1) -> bytes:
+        if not self._pending:
+            return self._read_source(size)
+
+        if (size is None) or (size < 0):
+            data, self._pending = self._pending, b''
+            return data + self._read_source(-1)
+        data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+    def read_exact(self, size: int) -> bytes:
+        """Lê exatamente size bytes (menos apenas no fim do stream)."""
+        parts = []
+        while size > 0:
+            data = self.read(size)
+            if not data:
+                break
+            parts.append(data)
+            size -= len(data)
+        return b''.join(parts)
+
+    def unread(self, data: bytes) -> None:
+        if data:
+            self._pending = data + self._pending
+
+    def drain(self, buffer_size: int) -> None:
+        """Lê o restante do stream (os dados ainda passam pelos callbacks)."""
+        self._pending = b''
+        while self._read_source(buffer_size):
+            pass
+
+
+class StreamUnpack(object):
+    """
+       Descompacta arquivos tar (gzip, bzip2, xz ou sem compressão) e zip a partir de
+    qualquer stream legível (resposta HTTP, pipe, arquivo), sem gravar o arquivo
+    compactado em disco e sem ferramentas externas.
+
+    Membros com caminhos absolutos, '..' ou links que apontam para fora de
+    output_dir são ignorados. Os contadores bytes_read, bytes_written e files
+    são atualizados durante a extração.
+    """
+
+    def __init__(self, *, output_dir: str=None, buffer_size: int=UNPACK_BUFFER_SIZE, hashes: dict=None,
+                 progress: Progress=None) -> None:
+        super().__init__()
+        self.output_dir: str = output_dir or os.getcwd()
+        self.buffer_size: int = buffer_size
+        self.hashes: dict = hashes or {}
+        self.digests: dict = {}
+        self.returnbool: bool = True # OK/ERRO (True/False)
+        self.bytes_read: int = 0
+        self.bytes_written: int = 0
+        self.files: int = 0
+        self.skipped: list = []
+        self.on_data: list = []
+        # progress recebe os bytes lidos do arquivo compactado.
+        self.progress: Progress = progress
+        if progress is not None:
+            self.on_data.append(_ProgressFeed(progress))
+
+    def unpack(self, path_file: File) -> bool:
+        """Descompacta um objeto File() em self.output_dir."""
+        try:
+            with open(path_file.path(), 'rb', buffering=0) as stream:
+                return self.unpack_stream(stream)
+        except (OSError, TypeError) as e:
+            print(f'{__class__.__name__} {e}')
+            self.returnbool = False
+            return False
+
+    def unpack_stream(self, stream, *, format: str=None) -> bool:
+        """
+           Descompacta os dados lidos de stream (objeto com read()) em self.output_dir.
+        format = 'tar' | 'zip' (None = detectar pelo cabeçalho).
+
+        Com self.hashes ({'sha256': '...'}) as hashes do arquivo compactado são
+        calculadas sobre os mesmos bytes lidos para a extração. Os dados são extraídos
+        em um diretório temporário dentro de output_dir e só são movidos para o destino
+        se todas as hashes conferirem, caso contrário a extração é desfeita.
+        """
+        import tarfile
+        import hashlib
+        import zlib
+
+        self.bytes_read = self.bytes_written = self.files = 0
+        self.skipped = []
+        self.digests = {}
+        hashers = {}
+        try:
+            for name in self.hashes:
+                hashers[name] = hashlib.new(name)
+        except ValueError as e:
+            print(f'{__class__.__name__} ERRO {e}')
+            self.returnbool = False
+            return False
+        reader = _StreamReader(stream, on_data=self.on_data + [h.update for h in hashers.values()])
+
+        if format is None:
+            header = reader.read_exact(FILE_HEADER_SIZE)
+            reader.unread(header)
+            file_type = detect_file_type(header)
+            if file_type in ('XZ', 'bzip2', 'gzip', 'POSIX', 'tar'):
+                format = 'tar'
+            elif file_type == 'Zip':
+                format = 'zip'
+            else:
+                print(f'{__class__.__name__} ERRO formato não suportado ... {file_type}')
+                self.returnbool = False
+                return False
+
+        if format not in ('tar', 'zip'):
+            print(f'{__class__.__name__} ERRO formato não suportado ... {format}')
+            self.returnbool = False
+            return False
+
+        output_dir = self.output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        staging_dir = None
+        if hashers:
+            import tempfile
+            staging_dir = tempfile.mkdtemp(prefix='.cmdlib-unpack-', dir=output_dir)
+            self.output_dir = staging_dir
+
+        # O diretório temporário é sempre apagado (e output_dir restaurado), mesmo se
+        # uma exceção inesperada interromper a extração.
+        self.returnbool = False
+        try:
+            try:
+                if format == 'tar':
+                    self._unpack_tar(reader)
+                else:
+                    self._unpack_zip(reader)
+            except (OSError, EOFError, ValueError, tarfile.TarError, zlib.error) as e:
+                print(f'{__class__.__name__} {e}')
+            else:
+                self.returnbool = True
+            self.bytes_read = reader.bytes_read
+
+            if hashers:
+                self.digests = {name: h.hexdigest() for name, h in hashers.items()}
+                for name, expected in self.hashes.items():
+                    if self.digests[name] != expected.lower():
+                        print(f'{__class__.__name__} FALHA hash {name} não confere, extração desfeita.')
+                        self.returnbool = False
+                if self.returnbool:
+                    try:
+                        _merge_tree(staging_dir, output_dir)
+                    except OSError as e:
+                        print(f'{__class__.__name__} {e}')
+                        self.returnbool = False
+        finally:
+            if staging_dir is not None:
+                self.output_dir = output_dir
+                PythonShellCore()._rmdirectory(staging_dir)
+        return self.returnbool
+
+    def _safe_path(self, name: str) -> str:
+        return _safe_member_path(self.output_dir, name)
+
+    def _skip(self, name: str, reason: str) -> None:
+        self.skipped.append((name, reason))
+        print(f'{__class__.__name__} ignorando {name} ... {reason}')
+
+    def _unpack_tar(self, reader: _StreamReader) -> None:
+        import tarfile
+
+        # bufsize fica no padrão (RECORDSIZE): o _Stream do tarfile refatia o buffer
+        # a cada cabeçalho, um buffer grande deixa lentos os arquivos com muitos membros.
+        tar = tarfile.open(fileobj=reader, mode='r|*', copybufsize=self.buffer_size)
+        with tar:
+            for member in tar:
+                if self._safe_path(member.name) is None:
+                    self._skip(member.name, 'caminho inseguro')
+                    continue
+                try:
+                    if hasattr(tarfile, 'data_filter'):
+                        tar.extract(member, self.output_dir, filter='data')
+                    elif member.isdev() or (member.issym() or member.islnk()) and not self._safe_link(member):
+                        self._skip(member.name, 'link ou dispositivo não permitido')
+                        continue
+                    else:
+                        tar.extract(member, self.output_dir)
+                except tarfile.TarError as e:
+                    if not isinstance(e, getattr(tarfile, 'FilterError', ())):
+                        raise
+                    self._skip(member.name, str(e))
+                    continue
+
+                if member.isfile():
+                    self.files += 1
+                    self.bytes_written += member.size
+            # Ler o final do arquivo (blocos vazios) para que todo o stream seja consumido.
+            reader.drain(self.buffer_size)
+
+    def _safe_link(self, member) -> bool:
+        """Verifica se o destino de um link fica dentro de output_dir."""
+        base = os.path.realpath(self.output_dir)
+        if member.issym():
+            start = os.path.dirname(os.path.join(base, member.name))
+            target = os.path.realpath(os.path.join(start, member.linkname))
+        else:
+            target = os.path.realpath(os.path.join(base, member.linkname))
+        return (target == base) or target.startswith(base + os.sep)
+
+    def _unpack_zip(self, reader: _StreamReader) -> None:
+        """
+           Lê os cabeçalhos locais do zip em sequência, sem precisar do diretório
+        central (que fica no fim do arquivo). Suporta os métodos stored, deflate e
+        bzip2, inclusive entradas com data descriptor (tamanho após os dados).
+        """
+        while True:
+            signature = reader.read_exact(4)
+            if signature != b'PK\x03\x04':
+                # Diretório central ou fim do arquivo: não há mais membros.
+                reader.drain(self.buffer_size)
+                return
+
+            fields = reader.read_exact(26)
+            if len(fields) < 26:
+                raise EOFError('zip truncado')
+            (_version, flags, method, mod_time, mod_date, crc, comp_size, size,
+             name_len, extra_len) = struct.unpack('<HHHHHIIIHH', fields)
+            raw_name = reader.read_exact(name_len)
+            extra = reader.read_exact(extra_len)
+            name = raw_name.decode('utf8' if flags & 0x800 else 'cp437')
+
+            zip64 = False
+            if (comp_size == 0xFFFFFFFF) or (size == 0xFFFFFFFF):
+                zip64 = True
+                size, comp_size = self._zip64_sizes(extra, size, comp_size)
+
+            if flags & 0x01:
+                raise ValueError(f'zip criptografado não suportado ... {name}')
+
+            has_descriptor = bool(flags & 0x08)
+            target = self._safe_path(name)
+            if target is None:
+                self._skip(name, 'caminho inseguro')
+            is_dir = name.endswith('/')
+
+            if is_dir:
+                if target is not None:
+                    os.makedirs(target, exist_ok=True)
+                out = None
+            elif target is not None:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                out = open(target, 'wb')
+            else:
+                out = None
+
+            try:
+                written, data_crc = self._copy_zip_member(reader, method, comp_size, has_descriptor, out, name)
+            finally:
+                if out is not None:
+                    out.close()
+
+            if has_descriptor:
+                descriptor = reader.read_exact(4)
+                if descriptor != b'PK\x07\x08':
+                    reader.unread(descriptor)
+                if zip64:
+                    crc, comp_size, size = struct.unpack('<IQQ', reader.read_exact(20))
+                else:
+                    crc, comp_size, size = struct.unpack('<III', reader.read_exact(12))
+
+            if (out is not None) and (data_crc != crc):
+                raise ValueError(f'CRC inválido ... {name}')
+
+            if (target is not None) and not is_dir:
+                self.files += 1
+                self.bytes_written += written
+                # Data no formato DOS (resolução de 2 segundos).
+                try:
+                    mtime = time.mktime((
+                        (mod_date >> 9) + 1980, (mod_date >> 5) & 0xF, mod_date & 0x1F,
+                        mod_time >> 11, (mod_time >> 5) & 0x3F, (mod_time & 0x1F) * 2, 0, 0, -1
+                    ))
+                    os.utime(target, (mtime, mtime))
+                except (OverflowError, ValueError):
+                    pass
+
+    def _zip64_sizes(self, extra: bytes, size: int, comp_size: int) -> tuple:
+        offset = 0
+        while offset + 4 <= len(extra):
+            header_id, data_len = struct.unpack_from('<HH', extra, offset)
+            data = extra[offset + 4:offset + 4 + data_len]
+            if header_id == 0x0001:
+                pos = 0
+                if size == 0xFFFFFFFF:
+                    size = struct.unpack_from('<Q', data, pos)[0]
+                    pos += 8
+                if comp_size == 0xFFFFFFFF:
+                    comp_size = struct.unpack_from('<Q', data, pos)[0]
+                break
+            offset += 4 + data_len
+        return size, comp_size
+
+    def _copy_zip_member(self, reader: _StreamReader, method: int, comp_size: int,
+                         has_descriptor: bool, out, name: str) -> tuple:
+        """Descompacta um membro do zip em out, retorna (bytes escritos, crc32)."""
+        import zlib
+
+        if method == 0:
+            if has_descriptor:
+                raise ValueError(f'membro sem compressão e sem tamanho não suportado ... {name}')
+            decompressor = None
+        elif method == 8:
+            decompressor = zlib.decompressobj(-15)
+        elif method == 12:
+            import bz2
+            decompressor = bz2.BZ2Decompressor()
+        else:
+            raise ValueError(f'método de compressão {method} não suportado ... {name}')
+
+        written = 0
+        crc = 0
+        remaining = None if has_descriptor else comp_size
+        while True:
+            if remaining is None:
+                data = reader.read(self.buffer_size)
+            elif remaining > 0:
+                data = reader.read(min(self.buffer_size, remaining))
+                remaining -= len(data)
+            else:
+                data = b''
+
+            if not data:
+                if (remaining is None) or (remaining > 0):
+                    raise EOFError(f'zip truncado ... {name}')
+                break
+
+            if decompressor is None:
+                chunk = data
+            else:
+                chunk = decompressor.decompress(data)
+
+            if chunk:
+                crc = zlib.crc32(chunk, crc)
+                written += len(chunk)
+                if out is not None:
+                    out.write(chunk)
+
+            if (decompressor is not None) and decompressor.eof:
+                if remaining is None:
+                    # Dados lidos além do fim do membro pertencem ao data descriptor.
+                    reader.unread(decompressor.unused_data)
+                elif remaining > 0:
+                    reader.read_exact(remaining)
+                break
+
+            if remaining == 0:
+                break
+        return written, crc
+
+
+class ZipParallelUnpack(object):
+    """
+       Descompacta arquivos zip em paralelo. Os membros do zip são independentes, o
+    diretório central é dividido entre max_workers threads (o zlib libera o GIL) e
+    cada thread abre o seu próprio ZipFile. Os diretórios são criados uma única vez
+    antes da extração, permissões, links simbólicos e datas são preservados.
+    """
+    def __init__(self, *, output_dir: str=None, max_workers: int=None, buffer_size: int=UNPACK_BUFFER_SIZE) -> None:
+        super().__init__()
+        self.output_dir: str = output_dir or os.getcwd()
+        self.max_workers: int = max_workers or get_max_workers()
+        self.buffer_size: int = buffer_size
+        self.returnbool: bool = True # OK/ERRO (True/False)
+        self.files: int = 0
+        self.bytes_written: int = 0
+        self.skipped: list = []
+        self.errors: list = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _split(self, members: list) -> list:
+        """Divide os membros entre os workers, equilibrando pelo tamanho compactado."""
+        buckets = [[0, []] for _ in range(min(self.max_workers, len(members)) or 1)]
+        for item in sorted(members, key=lambda m: m[0].compress_size, reverse=True):
+            bucket = min(buckets, key=lambda b: b[0])
+            bucket[0] += item[0].compress_size
+            bucket[1].append(item)
+        return [b[1] for b in buckets if b[1]]
+
+    def _mode(self, info) -> int:
+        if info.create_system == 3:
+            return info.external_attr >> 16
+        return 0
+
+    def _extract_members(self, zip_path: str, members: list) -> None:
+        import zipfile
+        import shutil
+
+        with zipfile.ZipFile(zip_path) as zf:
+            for info, target in members:
+                if self._stop.is_set():
+                    return
+                mode = self._mode(info)
+                try:
+                    if stat.S_ISLNK(mode):
+                        link = zf.read(info).decode('utf8')
+                        real_target = os.path.realpath(os.path.join(os.path.dirname(target), link))
+                        base = os.path.realpath(self.output_dir)
+                        if os.path.isabs(link) or not (real_target + os.sep).startswith(base + os.sep):
+                            self.skipped.append((info.filename, 'link para fora do diretório'))
+                            continue
+                        if os.path.lexists(target):
+                            os.remove(target)
+                        os.symlink(link, target)
+                        continue
+
+                    with zf.open(info) as src, open(target, 'wb') as dst:
+                        shutil.copyfileobj(src, dst, self.buffer_size)
+                    if stat.S_IMODE(mode):
+                        os.chmod(target, stat.S_IMODE(mode))
+                    mtime = time.mktime(info.date_time + (0, 0, -1))
+                    os.utime(target, (mtime, mtime))
+                except (OSError, zipfile.BadZipFile, RuntimeError, ValueError) as e:
+                    self.errors.append((info.filename, e))
+                    print(f'{__class__.__name__} {info.filename} ... {e}')
+                    continue
+
+                with self._lock:
+                    self.files += 1
+                    self.bytes_written += info.file_size
+
+    def unpack(self, path_file: File) -> bool:
+        """Descompacta um objeto File() em self.output_dir."""
+        import zipfile
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        self.files = self.bytes_written = 0
+        self.skipped = []
+        self.errors = []
+        zip_path = path_file.path()
+        try:
+            with zipfile.ZipFile(zip_path) as zf:
+                infos = zf.infolist()
+        except (OSError, TypeError, zipfile.BadZipFile) as e:
+            print(f'{__class__.__name__} {e}')
+            self.returnbool = False
+            return False
+
+        directories = {self.output_dir}
+        dir_infos = []
+        members = []
+        for info in infos:
+            target = _safe_member_path(self.output_dir, info.filename)
+            if target is None:
+                self.skipped.append((info.filename, 'caminho inseguro'))
+                print(f'{__class__.__name__} ignorando {info.filename} ... caminho inseguro')
+                continue
+            if info.is_dir():
+                directories.add(target)
+                dir_infos.append((info, target))
+            else:
+                directories.add(os.path.dirname(target))
+                members.append((info, target))
+
+        try:
+            for directory in sorted(directories):
+                os.makedirs(directory, exist_ok=True)
+        except OSError as e:
+            print(f'{__class__.__name__} {e}')
+            self.returnbool = False
+            return False
+
+        # Um erro inesperado em um worker (ex: zlib.error com dados corrompidos) interrompe
+        # a extração, os demais workers param no próximo membro.
+        self._stop.clear()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self._extract_members, zip_path, chunk) for chunk in self._split(members)]
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    self._stop.set()
+                    for other in futures:
+                        other.cancel()
+                    self.errors.append((zip_path, e))
+                    print(f'{__class__.__name__} {e}')
+                    break
+
+        # Permissões e datas dos diretórios só depois de criar os arquivos dentro deles.
+        for info, target in sorted(dir_infos, key=lambda d: d[1], reverse=True):
+            try:
+                if stat.S_IMODE(self._mode(info)):
+                    os.chmod(target, stat.S_IMODE(self._mode(info)))
+                mtime = time.mktime(info.date_time + (0, 0, -1))
+                os.utime(target, (mtime, mtime))
+            except OSError as e:
+                self.errors.append((info.filename, e))
+
+        self.returnbool = len(self.errors) == 0
+        return self.returnbool
+
+
+def unpack_stream(stream, *, output_dir: str=None, format: str=None, verbose: bool=False) -> bool:
+    """
+        Descompacta um arquivo tar/zip lido de stream (ex: resposta HTTP) sem gravar
+    o arquivo compactado em disco.
+    stream     = objeto com read() (arquivo, pipe, resposta HTTP).
+    output_dir = destino dos dados descomprimidos.
+    format     = 'tar' | 'zip' | None (detectar pelo cabeçalho).
+    """
+    unpack_file = StreamUnpack(output_dir=output_dir)
+    unpack_file.unpack_stream(stream, format=format)
+    if verbose and unpack_file.returnbool:
+        print(f'Descompactado ... {unpack_file.files} arquivos {ByteSize(unpack_file.bytes_written)}')
+    return unpack_file.returnbool
+
+
+def unpack(compressed_file: str, *, output_dir: str=os.getcwd(), verbose :bool=True, engine: str=None,
+           max_workers: int=None, hashes: dict=None, progress: Progress=None) -> bool:
     """
         Descompacta arquivos.
     compresse_file = caminho absoluto do arquivo a ser descomprimido.
     output_dir     = destino dos dados a serem descomprimidos.
     verbose        = bool
+    engine         = None (ferramentas Linux ou shutil) | 'stream' (StreamUnpack, tar/zip
+                     descompactados pelo próprio python).
+    max_workers    = descompacta arquivos zip em paralelo com max_workers threads.
+    hashes         = hashes esperadas do arquivo, ex: {'sha256': '...'}. Para tar/zip as
+                     hashes são calculadas durante a extração (uma única leitura) e a
+                     extração é desfeita se alguma não conferir.
+    progress       = Progress atualizado com os bytes lidos do arquivo compactado,
+                     ex: Progress(TerminalProgress()).
     """
 
     # Setar o formato de arquivo.
@@ -808,17 +4395,16 @@ def unpack(compressed_file: str, *, output_dir: str=os.getcwd(), verbose :bool=T
     #    tar    XZ
     #    tar    bzip2
     #    tar    gzip
+    #    tar    POSIX/tar
     #    zip    Zip
 
     path_file: File = File(compressed_file)
+    file_type = path_file.extension_file()
    
-    if path_file.extension_file() == 'XZ':
-        FORMAT = "tar"
-    elif path_file.extension_file() == 'bzip2':
-        FORMAT = "tar"
-    elif path_file.extension_file() == 'gzip':
+    FORMAT = None
+    if file_type in ('XZ', 'bzip2', 'gzip', 'POSIX', 'tar'):
         FORMAT = "tar"
-    elif path_file.extension_file() == 'Zip':
+    elif file_type == 'Zip':
         FORMAT = "zip"
     
     """
@@ -828,8 +4414,23 @@ def unpack(compressed_file: str, *, output_dir: str=os.getcwd(), verbose :bool=T
         unpack_file: ShutilUnpack = ShutilUnpack(output_dir=output_dir, format=FORMAT)
     """
 
-    if sys.platform == 'linux':
-        unpack_file: UnpackLinux = UnpackLinux(output_dir=output_dir)
+    if hashes and (FORMAT is None):
+        # Formatos sem suporte no StreamUnpack: verificar antes de descompactar.
+        if not ShaSum().check_many(compressed_file, hashes):
+            return False
+        hashes = None
+
+    if (progress is not None) and (progress.total_bytes is None):
+        progress.total_bytes = os.path.getsize(compressed_file)
+
+    if hashes:
+        unpack_file: StreamUnpack = StreamUnpack(output_dir=output_dir, hashes=hashes, progress=progress)
+    elif (max_workers is not None) and (file_type == 'Zip'):
+        unpack_file: ZipParallelUnpack = ZipParallelUnpack(output_dir=output_dir, max_workers=max_workers)
+    elif engine == 'stream':
+        unpack_file: StreamUnpack = StreamUnpack(output_dir=output_dir, progress=progress)
+    elif sys.platform == 'linux':
+        unpack_file: UnpackLinux = UnpackLinux(output_dir=output_dir, progress=progress)
     else:
         unpack_file: ShutilUnpack = ShutilUnpack(output_dir=output_dir, format=FORMAT)
     
@@ -838,7 +4439,22 @@ def unpack(compressed_file: str, *, output_dir: str=os.getcwd(), verbose :bool=T
         print(f'Descompactando ... {path_file.name()}', end=' ')
         sys.stdout.flush()
         
+    start = time.monotonic()
     unpack_file.unpack(path_file)
+    if progress is not None:
+        # Engines sem progresso durante a extração: completar no final.
+        if unpack_file.returnbool and progress.total_bytes and (progress.bytes_done < progress.total_bytes):
+            progress.update(progress.total_bytes - progress.bytes_done)
+        if getattr(unpack_file, 'files', None):
+            progress.update(files=unpack_file.files)
+        progress.finish()
+    if events.enabled:
+        events.emit(
+            'unpack', start=start, file=compressed_file, format=file_type, engine=type(unpack_file).__name__,
+            bytes_read=getattr(unpack_file, 'bytes_read', None) or os.path.getsize(compressed_file),
+            bytes_written=getattr(unpack_file, 'bytes_written', None), files=getattr(unpack_file, 'files', None),
+            returnbool=unpack_file.returnbool,
+        )
     if verbose and unpack_file.returnbool:
         print('OK')
     return unpack_file.returnbool
@@ -867,7 +4483,99 @@ def get_bytes(data) -> bytes:
                 print(e)
         else:
             _bytes = str.encode(data)
-        return _bytes    
+        return _bytes
+
+
+# Tamanho do buffer usado para ler arquivos durante o cálculo das hashes. Blocos
+# grandes permitem que o hashlib libere o GIL e mantêm o uso de memória constante.
+HASH_BUFFER_SIZE: int = 1024 * 1024
+
+
+def _iter_file_chunks(file, buffer_size: int):
+    """
+       Lê um objeto de arquivo em blocos. Se o objeto suportar readinto() o mesmo
+    buffer é reaproveitado em todas as leituras.
+    """
+    if hasattr(file, 'readinto'):
+        buffer = bytearray(buffer_size)
+        view = memoryview(buffer)
+        while True:
+            size = file.readinto(buffer)
+            if not size:
+                break
+            yield view[:size]
+        return
+
+    while True:
+        chunk = file.read(buffer_size)
+        if not chunk:
+            break
+        if isinstance(chunk, str):
+            chunk = str.encode(chunk)
+        yield chunk
+
+
+def iter_chunks(data, *, buffer_size: int=HASH_BUFFER_SIZE):
+    """
+        data = arquivo/texto/bytes/bytearray/memoryview/objeto de arquivo/iterável de blocos
+    Gera os bytes de data em blocos, sem carregar arquivos inteiros na memória.
+
+    Os blocos de arquivos são views de um buffer reaproveitado, cada bloco deve ser
+    consumido antes de solicitar o próximo. Tipos não suportados geram TypeError e
+    erros de leitura geram OSError.
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        yield data
+        return
+
+    if isinstance(data, str) and not os.path.isfile(data):
+        yield str.encode(data)
+        return
+
+    if isinstance(data, (str, os.PathLike)):
+        with open(data, 'rb', buffering=0) as file:
+            yield from _iter_file_chunks(file, buffer_size)
+        return
+
+    if hasattr(data, 'read'):
+        yield from _iter_file_chunks(data, buffer_size)
+        return
+
+    try:
+        chunks = iter(data)
+    except TypeError:
+        raise TypeError(f'iter_chunks ERRO tipo de dados não suportado ... {type(data).__name__}')
+
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = str.encode(chunk)
+        yield chunk
+
+
+class _ByteCounter(object):
+    """Conta os bytes passados para update(), usado junto com os objetos de hashlib."""
+    __slots__ = ('bytes',)
+
+    def __init__(self) -> None:
+        self.bytes: int = 0
+
+    def update(self, data) -> None:
+        self.bytes += len(data)
+
+
+def _update_hashes(data, hashers: list) -> bool:
+    """
+       Alimenta todos os objetos de hash em hashers com os bytes de data, lendo os
+    dados uma única vez. Retorna False se os dados não puderem ser lidos.
+    """
+    try:
+        for chunk in iter_chunks(data):
+            for h in hashers:
+                h.update(chunk)
+    except (OSError, TypeError) as e:
+        print(e)
+        return False
+    return True
 
 
 
@@ -924,6 +4632,45 @@ class ShaSumUtils(object):
         """
         pass
 
+    def get_digests(self, data, algorithms: list=('md5', 'sha256')) -> dict:
+        """
+        Retorna um dicionário {algoritmo: hash} com as hashes de data.
+        data = arquivo/texto/bytes
+        """
+        pass
+
+    def check_many(self, data, hashes: dict) -> bool:
+        """
+           Verifica várias hashes de data de uma só vez.
+        hashes = {'md5': '...', 'sha256': '...'}
+        """
+        if not hashes:
+            print(f'{__class__.__name__} ERRO nenhuma hash foi informada.')
+            return False
+
+        import hashlib
+
+        for algorithm, hash_string in hashes.items():
+            try:
+                hash_len = hashlib.new(algorithm).digest_size * 2
+            except ValueError:
+                print(f'{__class__.__name__} ERRO algoritmo não suportado ... {algorithm}')
+                return False
+            if len(hash_string) != hash_len:
+                print(f'{__class__.__name__} ERRO hash do tipo {algorithm} deve ter {hash_len} caracteres.')
+                return False
+
+        digests = self.get_digests(data, list(hashes.keys()))
+        if digests is None:
+            return False
+
+        _ok: bool = True
+        for algorithm, hash_string in hashes.items():
+            if digests[algorithm] != hash_string.lower():
+                print(f'{__class__.__name__} FALHA {algorithm}')
+                _ok = False
+        return _ok
+
     def check_md5(self, data, md5_string: str) -> bool:
         pass
 
@@ -981,49 +4728,255 @@ class ShaSumUtils(object):
         return False
 
 
+class DigestCache(object):
+    """
+       Cache persistente (sqlite) das hashes de arquivos. Cada hash é associada a
+    (st_dev, st_ino, tamanho, mtime_ns, algoritmo), se o arquivo for alterado a
+    entrada antiga é descartada na próxima consulta.
+
+    Arquivos modificados há menos de RACY_SECONDS não são armazenados, pois uma
+    alteração posterior poderia manter o mesmo mtime.
+    """
+
+    RACY_SECONDS: float = 2.0
+
+    def __init__(self, path: str=None, *, max_entries: int=200000) -> None:
+        super().__init__()
+        import sqlite3
+
+        if path is None:
+            path = os.path.join(os.path.expanduser('~'), '.cache', 'cmdlib', 'digests.sqlite')
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self.path: str = path
+        self.max_entries: int = max_entries
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._inserts: int = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS digests ('
+            ' dev INTEGER, ino INTEGER, algorithm TEXT,'
+            ' size INTEGER, mtime_ns INTEGER, ctime_ns INTEGER,'
+            ' digest TEXT, last_used REAL,'
+            ' PRIMARY KEY (dev, ino, algorithm))'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS digests_last_used ON digests (last_used)')
+
+    def get(self, st: os.stat_result, algorithm: str) -> str:
+        """Retorna a hash armazenada para o arquivo de st, ou None."""
+        key = (st.st_dev, st.st_ino, algorithm)
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT size, mtime_ns, ctime_ns, digest FROM digests'
+                ' WHERE dev=? AND ino=? AND algorithm=?', key
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            if row[:3] != (st.st_size, st.st_mtime_ns, st.st_ctime_ns):
+                self._conn.execute('DELETE FROM digests WHERE dev=? AND ino=? AND algorithm=?', key)
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                'UPDATE digests SET last_used=? WHERE dev=? AND ino=? AND algorithm=?', (time.time(), *key)
+            )
+            self.hits += 1
+            return row[3]
+
+    def put(self, st: os.stat_result, algorithm: str, digest: str) -> bool:
+        """Armazena a hash do arquivo de st, retorna False se o arquivo for recente demais."""
+        now = time.time()
+        if (now - st.st_mtime_ns / 1e9) < self.RACY_SECONDS:
+            return False
+
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (st.st_dev, st.st_ino, algorithm, st.st_size, st.st_mtime_ns, st.st_ctime_ns, digest, now)
+            )
+            self._inserts += 1
+            if self._inserts % 256 == 0:
+                self._evict()
+        return True
+
+    def _evict(self) -> None:
+        """Remove as entradas menos usadas quando o cache passa de max_entries."""
+        total = self._conn.execute('SELECT COUNT(*) FROM digests').fetchone()[0]
+        if total <= self.max_entries:
+            return
+        # Remover 10% a mais para não executar a limpeza a cada inserção.
+        excess = total - int(self.max_entries * 0.9)
+        self._conn.execute(
+            'DELETE FROM digests WHERE rowid IN'
+            ' (SELECT rowid FROM digests ORDER BY last_used LIMIT ?)', (excess,)
+        )
+        self.evictions += excess
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute('DELETE FROM digests')
+
+    def stats(self) -> dict:
+        """Retorna os contadores do cache."""
+        with self._lock:
+            self._evict()
+            entries = self._conn.execute('SELECT COUNT(*) FROM digests').fetchone()[0]
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': entries,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._evict()
+            self._conn.close()
+
+
 class ShaSum(ShaSumUtils):
-    def __init__(self) -> None:
+    def __init__(self, *, cache: DigestCache=None) -> None:
         super().__init__()
+        # Cache opcional, usado apenas quando data é o caminho de um arquivo.
+        self.cache: DigestCache = cache
 
-    def getmd5(self, data) -> str:
+    def _get_cached_digests(self, path, algorithms: list, progress: Progress=None) -> dict:
+        """
+           Consulta o cache e calcula apenas as hashes ausentes. Um arquivo sem
+        alterações custa apenas um stat().
+        """
+        start = time.monotonic()
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            print(e)
+            return None
+
+        digests = {}
+        missing = []
+        for name in algorithms:
+            digest = self.cache.get(st, name)
+            if digest is None:
+                missing.append(name)
+            else:
+                digests[name] = digest
+
+        if not missing:
+            if events.enabled:
+                # Nenhum byte lido: o tamanho do arquivo vai em bytes, bytes_hashed=0.
+                events.emit(
+                    'hash', start=start, algorithms=list(algorithms), bytes=st.st_size, bytes_hashed=0,
+                    cached=True, returnbool=True,
+                )
+            if progress is not None:
+                progress.update(files=1)
+                progress.finish()
+            return digests
+
+        from pathlib import Path
+
+        new_digests = self._compute_digests(Path(path), missing, progress)
+        if new_digests is None:
+            return None
+        digests.update(new_digests)
+
+        # Só armazenar se o arquivo não mudou (nem foi removido) durante a leitura.
+        try:
+            st_after = os.stat(path)
+        except OSError:
+            st_after = None
+        if (st_after is not None) and \
+                (st.st_size, st.st_mtime_ns, st.st_ino) == (st_after.st_size, st_after.st_mtime_ns, st_after.st_ino):
+            for name in missing:
+                self.cache.put(st, name, new_digests[name])
+        return {name: digests[name] for name in algorithms}
+
+    def get_digests(self, data, algorithms: list=('md5', 'sha256'), *, progress: Progress=None) -> dict:
+        """
+           Retorna um dicionário {algoritmo: hash} com as hashes de data, todas
+        calculadas na mesma leitura dos dados. O consumo de memória não depende
+        do tamanho do arquivo.
+        data     = arquivo/texto/bytes/objeto de arquivo/iterável de blocos
+        progress = Progress atualizado com os bytes lidos (progress.finish() no final).
+        """
+        if (self.cache is not None) and isinstance(data, (str, os.PathLike)) and os.path.isfile(data):
+            return self._get_cached_digests(data, list(algorithms), progress)
+        return self._compute_digests(data, algorithms, progress)
+
+    def _compute_digests(self, data, algorithms: list, progress: Progress=None) -> dict:
+        import hashlib
+
+        try:
+            hashers = {name: hashlib.new(name) for name in algorithms}
+        except ValueError as e:
+            print(f'{__class__.__name__} ERRO {e}')
+            return None
+
+        updaters = list(hashers.values())
+        if progress is not None:
+            if (progress.total_bytes is None) and isinstance(data, (str, os.PathLike)) and os.path.isfile(data):
+                progress.total_bytes = os.path.getsize(data)
+            updaters.append(_ProgressFeed(progress))
+
+        if not events.enabled:
+            returnbool = _update_hashes(data, updaters)
+        else:
+            start = time.monotonic()
+            counter = _ByteCounter()
+            returnbool = _update_hashes(data, updaters + [counter])
+            events.emit(
+                'hash', start=start, algorithms=list(algorithms), bytes_hashed=counter.bytes, returnbool=returnbool
+            )
+        if progress is not None:
+            progress.update(files=1)
+            progress.finish()
+        if not returnbool:
+            return None
+        return {name: h.hexdigest() for name, h in hashers.items()}
+
+    def _hexdigest(self, data, algorithm: str, progress: Progress=None) -> str:
+        digests = self.get_digests(data, [algorithm], progress=progress)
+        if digests is None:
+            return None
+        return digests[algorithm]
+
+    def getmd5(self, data, *, progress: Progress=None) -> str:
         """
         Retorna a hash md5 de data.
         data = arquivo/texto/bytes
         """
-        data_bytes = get_bytes(data)
-        if data_bytes is None:
-            return None
-        return hashlib.md5(data_bytes).hexdigest()
+        return self._hexdigest(data, 'md5', progress)
 
-    def getsha1(self, data) -> str:
+    def getsha1(self, data, *, progress: Progress=None) -> str:
         """
         Retorna a hash sha1 de data.
         data = arquivo/texto/bytes
         """
-        data_bytes = get_bytes(data)
-        if data_bytes is None:
-            return None
-        return hashlib.sha1(data_bytes).hexdigest()
+        return self._hexdigest(data, 'sha1', progress)
         
-    def getsha256(self, data) -> str:
+    def getsha256(self, data, *, progress: Progress=None) -> str:
         """
         Retorna a hash sha256sum de data.
-        data = arquivo/texto/bytes
+        data     = arquivo/texto/bytes
+        progress = Progress (opcional), ex: Progress(TerminalProgress()).
         """
-        data_bytes = get_bytes(data)
-        if data_bytes is None:
-            return None
-        return hashlib.sha256(data_bytes).hexdigest()
+        return self._hexdigest(data, 'sha256', progress)
 
-    def getsha512(self, data) -> str:
+    def getsha512(self, data, *, progress: Progress=None) -> str:
         """
         Retorna a hash sha512 de data.
         data = arquivo/texto/bytes
         """
-        data_bytes = get_bytes(data)
-        if data_bytes is None:
-            return None
-        return hashlib.sha512(data_bytes).hexdigest()
+        return self._hexdigest(data, 'sha512', progress)
 
 
 class ShaSumLinux(ShaSumUtils):
@@ -1048,11 +5001,238 @@ class ShaSumLinux(ShaSumUtils):
     def getsha512(self, data) -> str:
         return self.__get_output(['sha512sum', data]).split()[0]
 
+    def get_digests(self, data, algorithms: list=('md5', 'sha256')) -> dict:
+        """
+           Retorna um dicionário {algoritmo: hash}, executando um comando
+        ({algoritmo}sum) para cada algoritmo.
+        """
+        digests = {}
+        for name in algorithms:
+            if which(f'{name}sum') is None:
+                print(f'{__class__.__name__} ERRO comando [{name}sum] não está disponível.')
+                return None
+            digests[name] = self.__get_output([f'{name}sum', data]).split()[0]
+        return digests
+
 #===============================================================#
+# shasum = ShaSum() - criado no primeiro acesso (__getattr__).
+#===============================================================#
+
+def _escape_manifest_name(name: bytes) -> tuple:
+    """
+       Escapa o nome de arquivo como o sha256sum, retorna (prefixo, nome). Nomes com
+    barra invertida ou quebra de linha recebem o prefixo '\\'.
+    """
+    if (b'\\' not in name) and (b'\n' not in name) and (b'\r' not in name):
+        return b'', name
+    name = name.replace(b'\\', b'\\\\').replace(b'\n', b'\\n').replace(b'\r', b'\\r')
+    return b'\\', name
+
+
+def _unescape_manifest_name(name: bytes) -> bytes:
+    _out = bytearray()
+    num = 0
+    while num < len(name):
+        char = name[num:num+1]
+        if (char == b'\\') and (num + 1 < len(name)):
+            _out += {b'n': b'\n', b'r': b'\r'}.get(name[num+1:num+2], name[num+1:num+2])
+            num += 2
+        else:
+            _out += char
+            num += 1
+    return bytes(_out)
 
-shasum: ShaSum = ShaSum()
 
-#===============================================================#
+def parse_manifest_line(line: bytes) -> tuple:
+    """
+       Interpreta uma linha no formato do sha256sum/md5sum, retorna (hash, arquivo)
+    ou None se a linha for inválida.
+        <hash>  arquivo
+        <hash> *arquivo
+    """
+    line = line.rstrip(b'\n')
+    escaped = line.startswith(b'\\')
+    if escaped:
+        line = line[1:]
+
+    hash_string, sep, name = line.partition(b' ')
+    if (sep == b'') or (name[:1] not in (b' ', b'*')) or (len(name) < 2):
+        return None
+
+    try:
+        hash_string = hash_string.decode('ascii').lower()
+        int(hash_string, 16)
+    except ValueError:
+        return None
+
+    name = name[1:]
+    if escaped:
+        name = _unescape_manifest_name(name)
+    return hash_string, os.fsdecode(name)
+
+
+class ShaSumTree(object):
+    """
+       Calcula hashes de árvores de diretórios em paralelo e gera/verifica arquivos de
+    manifesto compatíveis com o sha256sum/md5sum (sha256sum -c MANIFESTO).
+
+    O hashlib libera o GIL para blocos grandes, por isso threads são suficientes
+    para ocupar todos os núcleos.
+    """
+    def __init__(self, *, algorithm: str='sha256', max_workers: int=None, shasum: ShaSum=None) -> None:
+        super().__init__()
+        self.algorithm: str = algorithm
+        self.max_workers: int = max_workers or get_max_workers()
+        self.shasum: ShaSum = shasum or ShaSum()
+        self.errors: list = []
+
+    def iter_files(self, root: str):
+        """
+           Gera os caminhos relativos a root de todos os arquivos regulares da árvore,
+        em ordem alfabética. Links simbólicos não são seguidos (como find -type f).
+        """
+        stack = ['']
+        while stack:
+            rel_dir = stack.pop()
+            try:
+                with os.scandir(os.path.join(root, rel_dir)) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except OSError as e:
+                self.errors.append((rel_dir, e))
+                print(f'{__class__.__name__} {e}')
+                continue
+
+            subdirs = []
+            for entry in entries:
+                rel_path = os.path.join(rel_dir, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(rel_path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield rel_path
+            stack.extend(reversed(subdirs))
+
+    def _hash_file(self, item: tuple) -> tuple:
+        """Retorna (arquivo, hash, erro), hash é None e erro o OSError se o arquivo não puder ser lido."""
+        # Path() garante que o caminho seja lido como arquivo e nunca como texto.
+        from pathlib import Path
+
+        rel_path, path = item
+        # Abrir antes para obter o erro (o ShaSum apenas exibe a mensagem).
+        try:
+            with open(path, 'rb'):
+                pass
+        except OSError as e:
+            return rel_path, None, e
+        return rel_path, self.shasum._hexdigest(Path(path), self.algorithm), None
+
+    def _iter_hash_results(self, files, *, base_dir: str='', ordered: bool=True):
+        from concurrent.futures import ThreadPoolExecutor
+
+        items = ((f, os.path.join(base_dir, f)) for f in files)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            yield from _bounded_map(
+                executor, self._hash_file, items, max_inflight=self.max_workers * 4, ordered=ordered
+            )
+
+    def iter_hash_files(self, files, *, base_dir: str='', ordered: bool=True):
+        """
+           Calcula as hashes de files (caminhos relativos a base_dir) em paralelo,
+        gerando tuplas (arquivo, hash). A hash é None se o arquivo não puder ser lido.
+        """
+        for rel_path, digest, _error in self._iter_hash_results(files, base_dir=base_dir, ordered=ordered):
+            yield rel_path, digest
+
+    def hash_tree(self, root: str) -> dict:
+        """Retorna um dicionário {caminho relativo: hash} de todos os arquivos de root."""
+        return dict(self.iter_hash_files(self.iter_files(root), base_dir=root))
+
+    def write_manifest(self, root: str, manifest: str, *, binary: bool=False) -> bool:
+        """
+           Grava em manifest as hashes de todos os arquivos de root, com caminhos
+        relativos a root. O arquivo gerado pode ser verificado com:
+            cd root && sha256sum -c manifest
+        """
+        self.errors.clear()
+        manifest_path = os.path.abspath(manifest)
+        mode = b'*' if binary else b' '
+        tmp_manifest = f'{manifest_path}.tmp{os.getpid()}'
+
+        files = (
+            f for f in self.iter_files(root)
+            if os.path.abspath(os.path.join(root, f)) not in (manifest_path, tmp_manifest)
+        )
+
+        try:
+            with open(tmp_manifest, 'wb') as out:
+                for rel_path, digest in self.iter_hash_files(files, base_dir=root):
+                    if digest is None:
+                        self.errors.append((rel_path, 'read error'))
+                        continue
+                    prefix, name = _escape_manifest_name(os.fsencode(rel_path))
+                    out.write(prefix + digest.encode('ascii') + b' ' + mode + name + b'\n')
+            os.replace(tmp_manifest, manifest_path)
+        except OSError as e:
+            print(f'{__class__.__name__} {e}')
+            if os.path.exists(tmp_manifest):
+                os.remove(tmp_manifest)
+            return False
+
+        return len(self.errors) == 0
+
+    def read_manifest(self, manifest: str) -> list:
+        """Retorna a lista de tuplas (hash, arquivo) contidas em manifest."""
+        entries = []
+        with open(manifest, 'rb') as f:
+            for num, line in enumerate(f, start=1):
+                item = parse_manifest_line(line)
+                if item is None:
+                    if line.strip():
+                        print(f'{__class__.__name__} linha {num} inválida em ... {manifest}')
+                    continue
+                entries.append(item)
+        return entries
+
+    def iter_verify(self, manifest: str, *, base_dir: str=None):
+        """
+           Verifica em paralelo os arquivos listados em manifest e gera tuplas
+        (arquivo, status) conforme as verificações terminam.
+        status = 'OK' | 'FAILED' | 'MISSING' (não existe) | 'ERROR' (não pôde ser lido)
+        base_dir = diretório base dos caminhos, o padrão é o diretório do manifesto.
+        """
+        if base_dir is None:
+            base_dir = os.path.dirname(os.path.abspath(manifest))
+
+        expected = {}
+        for hash_string, name in self.read_manifest(manifest):
+            expected[name] = hash_string
+
+        for rel_path, digest, error in self._iter_hash_results(expected.keys(), base_dir=base_dir, ordered=False):
+            if isinstance(error, FileNotFoundError):
+                yield rel_path, 'MISSING'
+            elif digest is None:
+                yield rel_path, 'ERROR'
+            elif digest == expected[rel_path]:
+                yield rel_path, 'OK'
+            else:
+                yield rel_path, 'FAILED'
+
+    def verify_manifest(self, manifest: str, *, base_dir: str=None, on_mismatch=None) -> bool:
+        """
+           Verifica os arquivos de manifest, as falhas são exibidas (ou enviadas para
+        on_mismatch(arquivo, status)) assim que encontradas.
+        """
+        self.errors.clear()
+        for rel_path, status in self.iter_verify(manifest, base_dir=base_dir):
+            if status == 'OK':
+                continue
+            self.errors.append((rel_path, status))
+            if on_mismatch is None:
+                print(f'{rel_path}: {status}')
+                sys.stdout.flush()
+            else:
+                on_mismatch(rel_path, status)
+        return len(self.errors) == 0
+
 
 class GpgUtils(object):
     def __init__(self) -> None:
@@ -1086,10 +5266,27 @@ class GpgLinux(GpgUtils):
         return proc.returnbool
    
     
-gpg_utils = GpgLinux()
+# Instâncias globais criadas apenas no primeiro acesso (cmdlib.shasum, ...).
+_LAZY_GLOBALS = {
+    'shellcore': PythonShellCore,
+    'shasum': ShaSum,
+    'gpg_utils': GpgLinux,
+}
+_lazy_lock = threading.Lock()
+
+
+def __getattr__(name: str):
+    if name not in _LAZY_GLOBALS:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    with _lazy_lock:
+        if name not in globals():
+            globals()[name] = _LAZY_GLOBALS[name]()
+    return globals()[name]
+
 
 def main():
-    pass
+    if '--root-helper' in sys.argv[1:]:
+        sys.exit(RootHelper.serve())
 
     
 if __name__ == '__main__':
@@ -0,0 +1,15 @@
+import os
+
+import pytest
+
+
+@pytest.fixture
+def fake_sudo(tmp_path, monkeypatch):
+    """sudo falso no PATH que apenas executa o comando."""
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    sudo = bin_dir / 'sudo'
+    sudo.write_text('#!/bin/sh\nexec "$@"\n')
+    sudo.chmod(0o755)
+    monkeypatch.setenv('PATH', f'{bin_dir}{os.pathsep}{os.environ["PATH"]}')
+    return sudo
@@ -0,0 +1,52 @@
+import asyncio
+import sys
+
+from cmdlib import AsyncExecShellCommand
+
+LONG_LINES = r'''
+import sys
+sys.stderr.write('\r'.join(f'{i:6d}%' for i in range(100000)))
+sys.stderr.write('\nerro final\n')
+sys.stdout.write('x' * 300000)
+sys.stdout.write('\nfim\n')
+'''
+
+
+def _collect(command, cli, **kwargs):
+    async def collect():
+        return [line async for line in command.iter_lines(cli, **kwargs)]
+    return asyncio.run(collect())
+
+
+def test_iter_lines():
+    command = AsyncExecShellCommand()
+    lines = _collect(command, [sys.executable, '-c', 'print("a"); print("b"); import sys; sys.stdout.write("c")'])
+
+    assert lines == ['a\n', 'b\n', 'c']
+    assert command.result.returncode == 0
+
+
+def test_iter_lines_long_lines():
+    command = AsyncExecShellCommand(timeout=60)
+    lines = _collect(command, [sys.executable, '-c', LONG_LINES])
+
+    assert ''.join(lines) == 'x' * 300000 + '\nfim\n'
+    assert lines[-1] == 'fim\n'
+    assert command.result.returncode == 0
+    assert not command.result.timed_out
+    assert command.result.stderr.endswith('erro final\n')
+
+
+def test_iter_lines_timeout():
+    command = AsyncExecShellCommand()
+    lines = _collect(command, [sys.executable, '-c', 'import time; print("a", flush=True); time.sleep(30)'], timeout=1)
+
+    assert lines == ['a\n']
+    assert command.result.timed_out
+
+
+def test_run():
+    result = asyncio.run(AsyncExecShellCommand().run([sys.executable, '-c', LONG_LINES]))
+
+    assert result.returnbool
+    assert result.stdout == 'x' * 300000 + '\nfim\n'
@@ -0,0 +1,104 @@
+import os
+import shutil
+
+import pytest
+
+from cmdlib import CopyEngine, PythonShellCore
+
+
+def _make_tree(root):
+    os.makedirs(root / 'a' / 'b')
+    (root / 'file.txt').write_bytes(b'hello')
+    (root / 'a' / 'b' / 'data.bin').write_bytes(os.urandom(300000))
+    os.symlink('file.txt', root / 'link')
+    with open(root / 'sparse.img', 'wb') as file:
+        file.seek(8 * 1024 * 1024)
+        file.write(b'end')
+
+
+def _tree_contents(root):
+    contents = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            rel_path = os.path.relpath(path, root)
+            if os.path.islink(path):
+                contents[rel_path] = ('link', os.readlink(path))
+            else:
+                with open(path, 'rb') as file:
+                    contents[rel_path] = ('file', file.read())
+    return contents
+
+
+def test_copy_tree_matches_source(tmp_path):
+    src = tmp_path / 'src'
+    _make_tree(src)
+    engine = CopyEngine()
+
+    engine.copy(str(src), str(tmp_path / 'dest'))
+
+    assert _tree_contents(tmp_path / 'dest') == _tree_contents(src)
+    assert engine.errors == []
+    assert engine.files_copied == 4
+    assert engine.methods['symlink'] == 1
+
+
+def test_copy_keeps_sparse_holes(tmp_path):
+    src = tmp_path / 'src'
+    _make_tree(src)
+
+    CopyEngine().copy_file(str(src / 'sparse.img'), str(tmp_path / 'copy.img'))
+
+    st = os.stat(tmp_path / 'copy.img')
+    assert st.st_size == os.path.getsize(src / 'sparse.img')
+    assert st.st_blocks * 512 < st.st_size
+
+
+def test_copy_file_into_own_directory_raises(tmp_path):
+    path = tmp_path / 'a.txt'
+    path.write_bytes(b'keep me')
+
+    with pytest.raises(shutil.SameFileError):
+        CopyEngine().copy_file(str(path), str(tmp_path))
+    assert path.read_bytes() == b'keep me'
+
+
+def test_shellcore_copy_into_own_directory_keeps_source(tmp_path):
+    path = tmp_path / 'a.txt'
+    path.write_bytes(b'keep me')
+    shellcore = PythonShellCore()
+
+    assert shellcore.copy(str(path), str(tmp_path) + os.sep) is False
+    assert shellcore.exception_type is shutil.SameFileError
+    assert path.read_bytes() == b'keep me'
+
+
+def test_shellcore_copy_existing_tree_fails(tmp_path):
+    src = tmp_path / 'src'
+    _make_tree(src)
+    os.makedirs(tmp_path / 'dest')
+
+    assert PythonShellCore().copy(str(src), str(tmp_path / 'dest')) is False
+
+
+def test_copy_file_fifo_raises(tmp_path):
+    os.mkfifo(tmp_path / 'fifo')
+
+    with pytest.raises(shutil.SpecialFileError):
+        CopyEngine().copy_file(str(tmp_path / 'fifo'), str(tmp_path / 'copy'))
+    assert not (tmp_path / 'copy').exists()
+
+
+def test_copy_tree_skips_special_files(tmp_path):
+    src = tmp_path / 'src'
+    _make_tree(src)
+    os.mkfifo(src / 'a' / 'fifo')
+    engine = CopyEngine()
+
+    engine.copy(str(src), str(tmp_path / 'dest'))
+
+    assert [path for path, _ in engine.errors] == [str(src / 'a' / 'fifo')]
+    assert isinstance(engine.errors[0][1], shutil.SpecialFileError)
+    assert not os.path.lexists(tmp_path / 'dest' / 'a' / 'fifo')
+    assert (tmp_path / 'dest' / 'a' / 'b' / 'data.bin').read_bytes() == (src / 'a' / 'b' / 'data.bin').read_bytes()
+    assert PythonShellCore().copy(str(src), str(tmp_path / 'dest2')) is False
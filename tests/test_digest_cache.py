@@ -0,0 +1,55 @@
+import hashlib
+import os
+import time
+
+from cmdlib import DigestCache
+from cmdlib.__main__ import ShaSum
+
+
+def _old_file(path, data):
+    """Arquivo com mtime antigo, para não cair na janela RACY_SECONDS do cache."""
+    path.write_bytes(data)
+    old = time.time() - 60
+    os.utime(path, (old, old))
+    return path
+
+
+def test_cache_hit_after_first_hash(tmp_path):
+    path = _old_file(tmp_path / 'data.bin', b'abc' * 1000)
+    cache = DigestCache(':memory:')
+    shasum = ShaSum(cache=cache)
+
+    first = shasum.get_digests(str(path), ['sha256'])
+    second = shasum.get_digests(str(path), ['sha256'])
+
+    assert first == second == {'sha256': hashlib.sha256(b'abc' * 1000).hexdigest()}
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['entries'] == 1
+
+
+def test_changed_file_is_hashed_again(tmp_path):
+    path = _old_file(tmp_path / 'data.bin', b'old')
+    shasum = ShaSum(cache=DigestCache(':memory:'))
+    shasum.get_digests(str(path), ['sha256'])
+
+    _old_file(path, b'new data')
+    os.utime(path, (time.time() - 30, time.time() - 30))
+
+    assert shasum.get_digests(str(path), ['sha256'])['sha256'] == hashlib.sha256(b'new data').hexdigest()
+
+
+def test_file_removed_while_hashing(tmp_path, monkeypatch):
+    path = _old_file(tmp_path / 'data.bin', b'gone')
+    cache = DigestCache(':memory:')
+    shasum = ShaSum(cache=cache)
+    compute_digests = shasum._compute_digests
+
+    def compute_and_remove(data, algorithms, progress=None):
+        digests = compute_digests(data, algorithms, progress)
+        os.remove(path)
+        return digests
+
+    monkeypatch.setattr(shasum, '_compute_digests', compute_and_remove)
+
+    assert shasum.get_digests(str(path), ['sha256']) == {'sha256': hashlib.sha256(b'gone').hexdigest()}
+    assert cache.stats()['entries'] == 0
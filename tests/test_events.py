@@ -0,0 +1,146 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+import pytest
+
+from cmdlib import DigestCache, LoggingSink, PrometheusTextfileSink, SpanRecorder, events
+from cmdlib.__main__ import EventBus, ShaSum
+
+
+@pytest.fixture
+def recorder():
+    recorder = SpanRecorder()
+    events.add_sink(recorder)
+    try:
+        yield recorder
+    finally:
+        events.remove_sink(recorder)
+
+
+def test_bus_enabled_only_with_sinks():
+    bus = EventBus()
+    recorder = SpanRecorder()
+    assert bus.enabled is False
+
+    bus.add_sink(recorder)
+    bus.emit('copy', start=time.monotonic(), bytes=10)
+    bus.remove_sink(recorder)
+    bus.emit('copy', bytes=20)
+
+    assert bus.enabled is False
+    assert [(event.name, event.fields) for event in recorder.spans] == [('copy', {'bytes': 10})]
+    assert recorder.spans[0].wall_time >= 0
+
+
+def test_failing_sink_does_not_stop_the_others(capsys):
+    bus = EventBus()
+    recorder = SpanRecorder()
+
+    def broken(event):
+        raise ValueError('sink quebrado')
+
+    bus.add_sink(broken)
+    bus.add_sink(recorder)
+    bus.emit('size', files=1)
+
+    assert len(recorder.spans) == 1
+    assert 'sink quebrado' in capsys.readouterr().err
+
+
+def test_logging_sink(caplog):
+    bus = EventBus()
+    bus.add_sink(LoggingSink(logging.getLogger('cmdlib.test')))
+
+    with caplog.at_level(logging.INFO, logger='cmdlib.test'):
+        bus.emit('remove', start=time.monotonic(), files=3)
+        bus.emit('size', bytes=5)
+
+    assert len(caplog.records) == 2
+    assert caplog.records[0].getMessage().startswith('remove wall_time=')
+    assert 'files=3' in caplog.records[0].getMessage()
+    assert caplog.records[1].getMessage() == 'size bytes=5'
+
+
+def test_span_recorder_summary_and_json():
+    bus = EventBus()
+    recorder = SpanRecorder(max_spans=2)
+    bus.add_sink(recorder)
+
+    for _ in range(3):
+        bus.emit('hash', start=time.monotonic(), bytes_hashed=1)
+
+    assert recorder.summary()['hash']['count'] == 2
+    assert [item['name'] for item in json.loads(recorder.to_json())] == ['hash', 'hash']
+    recorder.clear()
+    assert recorder.summary() == {}
+
+
+def test_prometheus_sink_counters(tmp_path):
+    path = tmp_path / 'cmdlib.prom'
+    sink = PrometheusTextfileSink(str(path), interval=3600)
+    bus = EventBus()
+    bus.add_sink(sink)
+
+    bus.emit('command', start=time.monotonic(), returncode=0, user_time=0.5, system_time=0.25)
+    bus.emit('command', returncode=1)
+    bus.emit('copy', bytes_read=100, bytes_written=100, files=2)
+    sink.close()
+
+    text = path.read_text()
+    assert 'cmdlib_events_total{event="command"} 2' in text
+    assert 'cmdlib_errors_total{event="command"} 1' in text
+    assert 'cmdlib_cpu_seconds_total{event="command",mode="user"} 0.5' in text
+    assert 'cmdlib_bytes_total{event="copy",field="bytes_written"} 100' in text
+    assert 'cmdlib_files_total{event="copy"} 2' in text
+    assert text.count('# TYPE cmdlib_events_total counter') == 1
+    assert os.listdir(tmp_path) == ['cmdlib.prom']
+
+
+def test_prometheus_sink_concurrent_writes(tmp_path, capsys):
+    path = tmp_path / 'cmdlib.prom'
+    sink = PrometheusTextfileSink(str(path), interval=0)
+    errors = []
+
+    def emit():
+        bus = EventBus()
+        bus.add_sink(sink)
+        try:
+            for _ in range(50):
+                bus.emit('size', bytes=1)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=emit) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    sink.close()
+
+    assert errors == []
+    assert 'ERRO' not in capsys.readouterr().err
+    assert 'cmdlib_events_total{event="size"} 200' in path.read_text()
+    assert os.listdir(tmp_path) == ['cmdlib.prom']
+
+
+def test_cached_hash_event(tmp_path, recorder):
+    path = tmp_path / 'data.bin'
+    path.write_bytes(b'abc' * 1000)
+    old = time.time() - 60
+    os.utime(path, (old, old))
+    shasum = ShaSum(cache=DigestCache(':memory:'))
+
+    shasum.getsha256(str(path))
+    assert shasum.getsha256(str(path)) == hashlib.sha256(b'abc' * 1000).hexdigest()
+
+    first, second = [event for event in recorder.spans if event.name == 'hash']
+    assert first.fields['bytes_hashed'] == 3000
+    assert 'cached' not in first.fields
+    assert second.fields['cached'] is True
+    assert second.fields['bytes'] == 3000
+    assert second.fields['bytes_hashed'] == 0
+    assert second.wall_time is not None
@@ -0,0 +1,44 @@
+import os
+import sys
+
+from cmdlib import ExecShellCommand
+from cmdlib.__main__ import CapturedOutput
+
+BIG_OUTPUT = [sys.executable, '-c', 'import sys; sys.stdout.write("x" * 200000)']
+
+
+def _open_fds():
+    return len(os.listdir('/proc/self/fd'))
+
+
+def test_exec_silent_spills_to_disk():
+    proc = ExecShellCommand(list(BIG_OUTPUT))
+
+    assert proc.exec_silent(max_memory=1024, tail_bytes=10)
+    assert proc.stdout_output.spilled
+    assert proc.stdout_output.size == 200000
+    assert proc.stdout_output.stream().read() == b'x' * 200000
+    assert proc.text_exit == 'x' * 10
+    proc.close_output()
+    assert proc.stdout_output is None
+
+
+def test_exec_silent_does_not_leak_files():
+    proc = ExecShellCommand()
+    proc.cli = list(BIG_OUTPUT)
+    proc.exec_silent(max_memory=1024)
+    before = _open_fds()
+    for _ in range(20):
+        proc.cli = list(BIG_OUTPUT)
+        assert proc.exec_silent(max_memory=1024)
+    assert _open_fds() <= before
+    proc.close_output()
+    assert _open_fds() < before
+
+
+def test_captured_output_context_manager():
+    with CapturedOutput(max_memory=4) as output:
+        output(b'0123456789')
+        assert output.spilled
+        assert output.stream().read() == b'0123456789'
+    assert output.stream() is None
@@ -0,0 +1,60 @@
+import json
+import os
+import subprocess
+import sys
+
+import cmdlib
+
+# Tempo máximo (-X importtime, microssegundos) de 'import cmdlib'. Importar o
+# cmdlib.__main__ leva dezenas de milissegundos, um retorno ao import antecipado
+# passa deste limite.
+IMPORT_BUDGET_US = 10000
+
+# Módulos pesados que só devem ser importados pelas funções que os usam.
+HEAVY_MODULES = (
+    'magic', 'asyncio', 'sqlite3', 'tarfile', 'zipfile', 'concurrent.futures', 'hashlib', 'shutil',
+    'tempfile',
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(cmdlib.__file__)))
+
+
+def _run(code, *options):
+    proc = subprocess.run(
+        [sys.executable, *options, '-c', code], cwd=ROOT, capture_output=True, text=True, timeout=60,
+    )
+    assert proc.returncode == 0, proc.stderr
+    return proc
+
+
+def _new_modules(code):
+    proc = _run(
+        'import json, sys\n'
+        'before = set(sys.modules)\n'
+        f'{code}\n'
+        'print(json.dumps(sorted(set(sys.modules) - before)))\n'
+    )
+    return set(json.loads(proc.stdout))
+
+
+def test_import_loads_only_the_package():
+    assert _new_modules('import cmdlib') == {'cmdlib'}
+
+
+def test_import_time_budget():
+    proc = _run('import cmdlib', '-X', 'importtime')
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        fields = [field.strip() for field in line.split('|')]
+        if fields[-1] == 'cmdlib':
+            assert int(fields[1]) < IMPORT_BUDGET_US
+            break
+    else:
+        raise AssertionError(f'cmdlib não encontrado na saída do -X importtime:\n{proc.stderr}')
+
+
+def test_main_module_does_not_import_heavy_modules():
+    modules = _new_modules('import cmdlib; cmdlib.FileSize, cmdlib.shasum, cmdlib.PythonShellCore')
+
+    assert 'cmdlib.__main__' in modules
+    assert modules.isdisjoint(HEAVY_MODULES)
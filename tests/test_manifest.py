@@ -0,0 +1,105 @@
+import hashlib
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from cmdlib import ShaSumTree
+from cmdlib.__main__ import parse_manifest_line
+
+
+def _make_tree(root):
+    files = {
+        'a.txt': b'alpha',
+        'dir/b.bin': os.urandom(100000),
+        'dir/sub/c.txt': b'',
+        'with space.txt': b'space',
+        'back\\slash.txt': b'backslash',
+        'new\nline.txt': b'newline',
+    }
+    for name, data in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    os.symlink('a.txt', root / 'link')
+    return files
+
+
+def test_hash_tree(tmp_path):
+    files = _make_tree(tmp_path)
+
+    result = ShaSumTree(max_workers=3).hash_tree(str(tmp_path))
+
+    assert result == {name: hashlib.sha256(data).hexdigest() for name, data in files.items()}
+
+
+def test_write_and_verify_manifest(tmp_path):
+    files = _make_tree(tmp_path)
+    manifest = tmp_path / 'SHA256SUMS'
+    tree = ShaSumTree()
+
+    assert tree.write_manifest(str(tmp_path), str(manifest))
+    entries = tree.read_manifest(str(manifest))
+    assert sorted(name for _, name in entries) == sorted(files)
+    assert tree.verify_manifest(str(manifest))
+
+
+def test_verify_reports_changes(tmp_path):
+    _make_tree(tmp_path)
+    manifest = tmp_path / 'SHA256SUMS'
+    tree = ShaSumTree()
+    tree.write_manifest(str(tmp_path), str(manifest))
+
+    (tmp_path / 'a.txt').write_bytes(b'changed')
+    os.remove(tmp_path / 'dir' / 'sub' / 'c.txt')
+    mismatches = []
+
+    assert not tree.verify_manifest(str(manifest), on_mismatch=lambda *item: mismatches.append(item))
+    assert sorted(mismatches) == [('a.txt', 'FAILED'), (os.path.join('dir', 'sub', 'c.txt'), 'MISSING')]
+
+
+@pytest.mark.skipif(shutil.which('sha256sum') is None, reason='sha256sum não está disponível')
+def test_manifest_matches_sha256sum(tmp_path):
+    _make_tree(tmp_path)
+    manifest = tmp_path / 'SHA256SUMS'
+    assert ShaSumTree().write_manifest(str(tmp_path), str(manifest))
+
+    proc = subprocess.run(
+        ['sha256sum', '--strict', '-c', 'SHA256SUMS'], cwd=tmp_path, capture_output=True, text=True
+    )
+    assert proc.returncode == 0, proc.stdout + proc.stderr
+
+    expected = subprocess.run(
+        ['sha256sum', '--', 'a.txt', os.path.join('dir', 'b.bin'), 'back\\slash.txt', 'new\nline.txt'],
+        cwd=tmp_path, capture_output=True, check=True,
+    ).stdout.splitlines(keepends=True)
+    lines = manifest.read_bytes().splitlines(keepends=True)
+    assert set(expected) <= set(lines)
+
+
+def test_parse_manifest_line():
+    digest = hashlib.md5(b'').hexdigest()
+
+    assert parse_manifest_line(f'{digest}  file.txt\n'.encode()) == (digest, 'file.txt')
+    assert parse_manifest_line(f'{digest} *file.bin\n'.encode()) == (digest, 'file.bin')
+    assert parse_manifest_line(f'\\{digest}  a\\nb\\\\c\n'.encode()) == (digest, 'a\nb\\c')
+    assert parse_manifest_line(f'{digest.upper()}  x\n'.encode()) == (digest, 'x')
+    assert parse_manifest_line(b'not a hash  file\n') is None
+    assert parse_manifest_line(f'{digest}\n'.encode()) is None
+
+
+def test_verify_reports_read_errors(tmp_path, capsys):
+    _make_tree(tmp_path)
+    manifest = tmp_path / 'SHA256SUMS'
+    tree = ShaSumTree()
+    tree.write_manifest(str(tmp_path), str(manifest))
+
+    # Um diretório no lugar do arquivo: IsADirectoryError, não MISSING.
+    os.remove(tmp_path / 'a.txt')
+    os.mkdir(tmp_path / 'a.txt')
+    os.remove(tmp_path / 'with space.txt')
+
+    assert not tree.verify_manifest(str(manifest))
+    assert sorted(tree.errors) == [('a.txt', 'ERROR'), ('with space.txt', 'MISSING')]
+    assert sorted(capsys.readouterr().out.splitlines()) == ['a.txt: ERROR', 'with space.txt: MISSING']
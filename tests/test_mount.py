@@ -0,0 +1,40 @@
+import os
+
+from cmdlib import MountTable
+
+MOUNTINFO = '''\
+22 1 8:1 / / rw,relatime shared:1 - ext4 /dev/sda1 rw
+23 22 0:21 / /tmp rw,nosuid shared:2 - tmpfs tmpfs rw
+24 22 0:45 / /mnt/nfs rw,relatime shared:3 - nfs4 server:/export rw,vers=4.2
+25 22 0:46 / /mnt/cifs rw,relatime shared:4 - cifs //host/share rw
+26 22 0:47 / /mnt/with\\040space rw shared:5 - ext4 {link} rw
+'''
+
+
+def _table(tmp_path):
+    os.symlink('/dev/sda1', tmp_path / 'by-uuid')
+    path = tmp_path / 'mountinfo'
+    path.write_text(MOUNTINFO.format(link=tmp_path / 'by-uuid'))
+    return MountTable(mountinfo=str(path))
+
+
+def test_mountpoints(tmp_path):
+    table = _table(tmp_path)
+
+    assert table.mountpoints('/dev/sda1') == ['/', '/mnt/with space']
+    assert table.mountpoints(str(tmp_path / 'by-uuid')) == ['/mnt/with space']
+    assert table.mountpoints('/dev/sdz9') == []
+    table.close()
+
+
+def test_non_path_sources(tmp_path):
+    table = _table(tmp_path)
+
+    assert table.mounted_devices(['server:/export', 'tmpfs', '//host/share', 'other:/export']) == {
+        'server:/export': True,
+        'tmpfs': True,
+        '//host/share': True,
+        'other:/export': False,
+    }
+    assert table.mountpoints('//host/share') == ['/mnt/cifs']
+    table.close()
@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+from cmdlib import LinuxShellCore, PythonShellCore
+
+
+@pytest.mark.parametrize('shellcore', [PythonShellCore, LinuxShellCore])
+def test_plan_runs_in_order(tmp_path, shellcore):
+    src = tmp_path / 'src'
+    src.mkdir()
+    (src / 'file.txt').write_bytes(b'data')
+    dest = tmp_path / 'dest'
+
+    plan = shellcore().plan().mkdir(str(dest)).copy(str(src / 'file.txt'), str(dest)).rmdir(str(src))
+    operations = plan.execute()
+
+    assert [op.status for op in operations] == ['ok', 'ok', 'ok']
+    assert plan.returnbool
+    assert (dest / 'file.txt').read_bytes() == b'data'
+    assert not src.exists()
+
+
+@pytest.mark.parametrize('shellcore', [PythonShellCore, LinuxShellCore])
+def test_plan_skips_dependents_of_failed_operation(tmp_path, shellcore):
+    dest = tmp_path / 'dest'
+    plan = shellcore().plan().copy(str(tmp_path / 'missing'), str(dest)).rmdir(str(dest))
+    operations = plan.execute()
+
+    assert [op.status for op in operations] == ['failed', 'skipped']
+    assert operations[0].error
+    assert not plan.returnbool
+
+
+def test_root_plan_larger_than_arg_limit(tmp_path, fake_sudo):
+    # ~300 bytes por operação: o script inteiro passa de MAX_ARG_STRLEN (128 KiB).
+    root = tmp_path / ('d' * 200)
+    plan = LinuxShellCore(exec_root=True).plan()
+    for i in range(600):
+        plan.mkdir(str(root / f'{i:04d}'))
+    operations = plan.execute()
+
+    assert all(op.status == 'ok' for op in operations)
+    assert len(os.listdir(root)) == 600
+
+
+def test_root_plan_dependency_across_script_parts(tmp_path, fake_sudo):
+    shellcore = LinuxShellCore(exec_root=True)
+    shellcore.PLAN_SCRIPT_SIZE = 1
+    dest = tmp_path / 'dest'
+    plan = shellcore.plan().copy(str(tmp_path / 'missing'), str(dest)).rmdir(str(dest))
+    plan.mkdir(str(tmp_path / 'other'))
+    operations = plan.execute()
+
+    assert [op.status for op in operations] == ['failed', 'skipped', 'ok']
+    assert (tmp_path / 'other').is_dir()
+
+
+def test_root_plan_spawn_failure_sets_error(tmp_path, monkeypatch):
+    monkeypatch.setenv('PATH', str(tmp_path))
+    plan = LinuxShellCore(exec_root=True).plan().mkdir(str(tmp_path / 'a')).mkdir(str(tmp_path / 'b'))
+    operations = plan.execute()
+
+    assert [op.status for op in operations] == ['failed', 'failed']
+    assert all(op.error for op in operations)
@@ -0,0 +1,108 @@
+import io
+import os
+import sys
+import tarfile
+
+import pytest
+
+import cmdlib.__main__
+from cmdlib import File, Progress, TerminalProgress, unpack
+from cmdlib.__main__ import UNPACK_BUFFER_SIZE, UnpackLinux
+
+
+def test_callback_throttled_by_interval():
+    calls = []
+    progress = Progress(calls.append, total_bytes=1000, interval=3600)
+
+    for _ in range(100):
+        progress.update(10)
+    assert calls == []
+
+    progress.finish()
+    progress.finish()
+    assert calls == [progress]
+    assert progress.finished
+    assert progress.bytes_done == 1000
+
+
+def test_callback_without_interval():
+    calls = []
+    progress = Progress(lambda p: calls.append(p.bytes_done), interval=0)
+
+    for _ in range(5):
+        progress.update(1, files=1)
+
+    assert calls == [1, 2, 3, 4, 5]
+    assert progress.files_done == 5
+
+
+def test_fraction_and_eta():
+    progress = Progress(total_bytes=200)
+    assert progress.fraction == 0.0
+
+    progress.update(100)
+    assert progress.fraction == 0.5
+    assert progress.eta > 0
+
+    progress.update(300)
+    assert progress.fraction == 1.0
+    assert progress.eta == 0.0
+    assert Progress().fraction is None
+    assert Progress().eta is None
+
+
+def test_terminal_progress(monkeypatch):
+    monkeypatch.setattr(cmdlib.__main__, 'get_term_col', lambda: 80)
+    output = io.StringIO()
+    progress = Progress(TerminalProgress(file=output), total_bytes=2048, interval=3600, name='iso')
+
+    progress.update(1024)
+    line = TerminalProgress().render(progress)
+    assert line.startswith('iso  50% [')
+    assert '1.00 kB/2.00 kB' in line
+    assert len(line) < 80
+
+    progress.finish()
+    text = output.getvalue()
+    assert text.startswith('\r') and text.endswith('\n')
+    assert 'ETA' not in text
+
+
+@pytest.mark.skipif(sys.platform != 'linux', reason='UnpackLinux')
+def test_unpack_linux_progress_from_stdin(tmp_path):
+    data = os.urandom(3 * UNPACK_BUFFER_SIZE)
+    archive = tmp_path / 'data.tar.gz'
+    with tarfile.open(archive, 'w:gz') as tar:
+        tar.add(_write(tmp_path / 'data.bin', data), arcname='data.bin')
+    calls = []
+    progress = Progress(lambda p: calls.append(p.bytes_done), interval=0)
+    output_dir = tmp_path / 'out'
+    output_dir.mkdir()
+
+    assert UnpackLinux(output_dir=str(output_dir), progress=progress).unpack(File(str(archive))) is True
+
+    assert (output_dir / 'data.bin').read_bytes() == data
+    assert progress.bytes_done == os.path.getsize(archive)
+    # Atualizado durante a leitura, um bloco por vez.
+    assert len(calls) > 1
+    assert calls == sorted(calls)
+
+
+@pytest.mark.skipif(sys.platform != 'linux', reason='UnpackLinux')
+def test_unpack_progress_corrupted_tar(tmp_path, capsys):
+    archive = tmp_path / 'data.tar.gz'
+    with tarfile.open(archive, 'w:gz') as tar:
+        tar.add(_write(tmp_path / 'data.bin', os.urandom(100000)), arcname='data.bin')
+    raw = bytearray(archive.read_bytes())
+    raw[len(raw) // 2:] = bytes(len(raw) - len(raw) // 2)
+    archive.write_bytes(bytes(raw))
+    progress = Progress(interval=3600)
+
+    assert unpack(str(archive), output_dir=str(tmp_path), verbose=False, progress=progress) is False
+    assert progress.finished
+    assert 'UnpackLinux' in capsys.readouterr().out
+
+
+def _write(path, data):
+    path.write_bytes(data)
+    return str(path)
@@ -0,0 +1,140 @@
+import os
+import threading
+import time
+
+import pytest
+
+from cmdlib import RemoveEngine, PythonShellCore
+
+
+def _make_tree(root, *, dirs=5, files=4, depth=3):
+    count = [0, 0]
+
+    def fill(path, level):
+        os.makedirs(path)
+        count[1] += 1
+        for i in range(files):
+            (path / f'f{i}.txt').write_bytes(b'x' * i)
+            count[0] += 1
+        if level < depth:
+            for i in range(dirs):
+                fill(path / f'd{i}', level + 1)
+
+    fill(root, 1)
+    return count
+
+
+def test_remove_tree(tmp_path):
+    root = tmp_path / 'tree'
+    files, dirs = _make_tree(root)
+    os.symlink('f0.txt', root / 'link')
+    engine = RemoveEngine(max_workers=4)
+
+    assert engine.remove(str(root))
+    assert not os.path.lexists(root)
+    assert engine.files == files + 1
+    assert engine.dirs == dirs
+    assert engine.errors == []
+
+
+def test_remove_deep_tree(tmp_path):
+    root = tmp_path / 'deep'
+    path = root
+    for i in range(300):
+        path = path / f'l{i}'
+    os.makedirs(path)
+    (path / 'file').write_bytes(b'data')
+    engine = RemoveEngine()
+
+    assert engine.remove(str(root))
+    assert not root.exists()
+    assert engine.dirs == 301
+
+
+def test_nested_directories_use_the_pool(tmp_path, monkeypatch):
+    root = tmp_path / 'tree'
+    _make_tree(root / 'only', dirs=8, files=1, depth=2)
+    engine = RemoveEngine(max_workers=4)
+    threads = set()
+    clear_dir = engine._clear_dir
+
+    def record_thread(node):
+        threads.add(threading.current_thread().name)
+        time.sleep(0.02)
+        return clear_dir(node)
+
+    monkeypatch.setattr(engine, '_clear_dir', record_thread)
+
+    assert engine.remove(str(root))
+    assert len(threads) > 1
+
+
+def test_symlinks_are_not_followed(tmp_path):
+    outside = tmp_path / 'outside'
+    outside.mkdir()
+    (outside / 'keep.txt').write_bytes(b'keep')
+    root = tmp_path / 'tree'
+    (root / 'sub').mkdir(parents=True)
+    os.symlink(outside, root / 'sub' / 'dir_link')
+    os.symlink(outside / 'keep.txt', root / 'file_link')
+
+    assert RemoveEngine().remove(str(root))
+    assert not os.path.lexists(root)
+    assert (outside / 'keep.txt').read_bytes() == b'keep'
+
+
+def test_remove_symlink_to_directory(tmp_path):
+    outside = tmp_path / 'outside'
+    outside.mkdir()
+    (outside / 'keep.txt').write_bytes(b'keep')
+    os.symlink(outside, tmp_path / 'link')
+
+    assert RemoveEngine().remove(str(tmp_path / 'link'))
+    assert not os.path.lexists(tmp_path / 'link')
+    assert (outside / 'keep.txt').exists()
+
+
+def test_remove_file_and_missing_path(tmp_path):
+    path = tmp_path / 'file.txt'
+    path.write_bytes(b'data')
+    engine = RemoveEngine()
+
+    assert engine.remove(str(path))
+    assert not path.exists()
+    with pytest.raises(FileNotFoundError):
+        engine.remove(str(path))
+
+
+def test_remove_in_background(tmp_path):
+    root = tmp_path / 'tree'
+    files, dirs = _make_tree(root)
+    engine = RemoveEngine()
+
+    assert engine.remove(str(root), background=True)
+    assert not root.exists()
+    assert engine.wait(timeout=30)
+    assert os.listdir(tmp_path) == []
+    assert engine.files == files
+
+
+def test_remove_reports_errors(tmp_path):
+    if os.geteuid() == 0:
+        pytest.skip('root ignora as permissões dos diretórios')
+    root = tmp_path / 'tree'
+    (root / 'locked').mkdir(parents=True)
+    (root / 'locked' / 'file').write_bytes(b'data')
+    os.chmod(root / 'locked', 0o500)
+    engine = RemoveEngine()
+    try:
+        assert engine.remove(str(root)) is False
+        assert engine.errors
+    finally:
+        os.chmod(root / 'locked', 0o700)
+
+
+def test_shellcore_rmdir(tmp_path):
+    root = tmp_path / 'tree'
+    _make_tree(root)
+
+    assert PythonShellCore().rmdir(str(root))
+    assert not root.exists()
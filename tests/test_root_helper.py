@@ -0,0 +1,83 @@
+import atexit
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import cmdlib
+from cmdlib import RootHelper
+
+HELPER = [sys.executable, os.path.join(os.path.dirname(cmdlib.__file__), '__main__.py'), '--root-helper']
+
+
+def _serve(*lines):
+    """Envia as linhas para o processo auxiliar e retorna as respostas."""
+    proc = subprocess.run(
+        HELPER, input=''.join(line + '\n' for line in lines).encode('utf8'),
+        capture_output=True, timeout=30,
+    )
+    assert proc.returncode == 0, proc.stderr.decode()
+    return [json.loads(line) for line in proc.stdout.decode('utf8').splitlines()]
+
+
+def test_exec_and_shutdown():
+    responses = _serve(
+        json.dumps({'op': 'ping'}),
+        json.dumps({'op': 'exec', 'cli': ['sh', '-c', 'echo out; echo err >&2; exit 3']}),
+        json.dumps({'op': 'shutdown'}),
+        json.dumps({'op': 'ping'}),
+    )
+
+    assert len(responses) == 3
+    assert responses[0]['ok'] and responses[0]['euid'] == os.geteuid()
+    assert responses[1]['returncode'] == 3
+    assert responses[1]['stdout'] == 'out\n'
+    assert responses[1]['stderr'] == 'err\n'
+
+
+@pytest.mark.parametrize('line', [
+    'not json',
+    '[1]',
+    '"shutdown"',
+    json.dumps({'op': 'exec'}),
+    json.dumps({'op': 'exec', 'cli': 'ls'}),
+    json.dumps({'op': 'exec', 'cli': ['/nonexistent/command']}),
+    json.dumps({'op': 'unknown'}),
+])
+def test_bad_request_keeps_serving(line):
+    responses = _serve(line, json.dumps({'op': 'ping'}))
+
+    assert len(responses) == 2
+    assert responses[1]['ok']
+    if responses[0]['ok']:
+        assert responses[0]['returncode'] != 0
+    else:
+        assert responses[0]['error']
+
+
+@pytest.mark.skipif(os.geteuid() != 0, reason='o processo auxiliar precisa executar como root')
+def test_root_helper_client():
+    helper = RootHelper()
+    assert helper.start()
+    try:
+        result = helper.exec(['sh', '-c', 'echo hello'])
+        assert result.returnbool
+        assert result.stdout == 'hello\n'
+        assert helper.ping()
+    finally:
+        helper.stop()
+    assert not helper.is_alive()
+
+
+@pytest.mark.skipif(os.geteuid() != 0, reason='o processo auxiliar precisa executar como root')
+def test_restart_registers_atexit_once(monkeypatch):
+    registered = []
+    monkeypatch.setattr(atexit, 'register', registered.append)
+    helper = RootHelper()
+    for _ in range(3):
+        assert helper.start()
+        helper.stop()
+
+    assert registered == [helper.stop]
@@ -0,0 +1,108 @@
+import os
+
+import pytest
+
+from cmdlib import ByteSize, FileSize, FolderSizeIndex, format_sizes
+
+
+def _make_tree(root):
+    os.makedirs(root / 'a' / 'b' / 'c')
+    os.makedirs(root / 'empty')
+    (root / 'top.txt').write_bytes(b'x' * 1000)
+    (root / 'a' / 'one.bin').write_bytes(b'y' * 5000)
+    (root / 'a' / 'b' / 'c' / 'deep.bin').write_bytes(b'z' * 70000)
+    os.link(root / 'a' / 'one.bin', root / 'a' / 'b' / 'hardlink.bin')
+    os.symlink('top.txt', root / 'link')
+
+
+@pytest.mark.parametrize('apparent', [True, False])
+@pytest.mark.parametrize('one_filesystem', [True, False])
+def test_index_matches_file_size(tmp_path, apparent, one_filesystem):
+    _make_tree(tmp_path)
+    scanner = FileSize(str(tmp_path), apparent=apparent, one_filesystem=one_filesystem)
+    index = FolderSizeIndex(str(tmp_path), apparent=apparent, one_filesystem=one_filesystem)
+
+    assert index.get_size() == scanner.get_size()
+    assert index.files == scanner.files
+
+
+def test_index_tracks_changes(tmp_path):
+    _make_tree(tmp_path)
+    index = FolderSizeIndex(str(tmp_path), one_filesystem=True)
+    index.get_size()
+
+    (tmp_path / 'a' / 'b' / 'c' / 'new.bin').write_bytes(b'n' * 123)
+    os.remove(tmp_path / 'top.txt')
+    os.rename(tmp_path / 'empty', tmp_path / 'renamed')
+
+    scanner = FileSize(str(tmp_path), one_filesystem=True)
+    assert index.get_size() == scanner.get_size()
+    assert index.files == scanner.files
+
+
+def test_index_errors_are_reset(tmp_path, monkeypatch):
+    _make_tree(tmp_path)
+    index = FolderSizeIndex(str(tmp_path))
+    scan_dir = index._scanner._scan_dir
+
+    def failing_scan_dir(path):
+        index._scanner.errors.append(OSError('erro de leitura'))
+        return scan_dir(path)
+
+    monkeypatch.setattr(index._scanner, '_scan_dir', failing_scan_dir)
+    index.get_size()
+    assert len(index.errors) > 0
+
+    for _ in range(3):
+        os.utime(tmp_path)
+        (tmp_path / 'new.txt').write_bytes(b'n')
+        os.remove(tmp_path / 'new.txt')
+        index.get_size()
+    assert len(index.errors) == 1
+
+
+@pytest.mark.parametrize('size, text', [
+    (0, '0.00 B'),
+    (1, '1.00 B'),
+    (1023, '1023.00 B'),
+    (1024, '1.00 kB'),
+    (1536 * 1024, '1.50 MB'),
+    (3 * 1024**3, '3.00 GB'),
+    (2 * 1024**4, '2.00 TB'),
+    (5 * 1024**5, '5.00 PB'),
+    (2048 * 1024**5, '2048.00 PB'),
+    (-2048, '-2.00 kB'),
+])
+def test_byte_size_format(size, text):
+    assert str(ByteSize(size)) == text
+    assert format(ByteSize(size), '.2f') == text
+    assert format_sizes([size]) == [text]
+
+
+def test_byte_size_units():
+    size = ByteSize(1500 * 1000)
+
+    assert size.format(units='si') == '1.50 MB'
+    assert size.format('.1f', units='iec') == '1.4 MiB'
+    assert format_sizes([size, 10**12], units='si', precision=1) == ['1.5 MB', '1.0 TB']
+    assert ByteSize(2 * 1024**4).TB == 2.0
+    assert ByteSize(1024**5).readable == ('PB', 1.0)
+    with pytest.raises(ValueError):
+        size.format(units='kb')
+    with pytest.raises(ValueError):
+        format_sizes([1], units='kb')
+
+
+def test_byte_size_arithmetic():
+    size = ByteSize(3)
+
+    for result, expected in [(10 - size, 7), (size - 10, -7), (10 + size, 13), (size * 2, 6), (2 * size, 6)]:
+        assert type(result) is ByteSize
+        assert result == expected
+
+
+def test_format_sizes_numpy():
+    numpy = pytest.importorskip('numpy')
+    sizes = [0, 1, 1024, 5 * 1024**4, 7 * 1024**5]
+
+    assert format_sizes(numpy.array(sizes)) == format_sizes(sizes) == [format(ByteSize(n), '.2f') for n in sizes]
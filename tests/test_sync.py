@@ -0,0 +1,156 @@
+import os
+import shutil
+
+import pytest
+
+from cmdlib import CopyEngine, LinuxShellCore, PythonShellCore
+
+
+def _make_tree(root):
+    (root / 'dir' / 'sub').mkdir(parents=True)
+    (root / 'a.txt').write_bytes(b'alpha')
+    (root / 'dir' / 'b.bin').write_bytes(os.urandom(50000))
+    (root / 'dir' / 'sub' / 'c.txt').write_bytes(b'charlie')
+    os.symlink('a.txt', root / 'link')
+
+
+def _tree_contents(root):
+    contents = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        for name in dirnames + filenames:
+            path = os.path.join(dirpath, name)
+            rel_path = os.path.relpath(path, root)
+            if os.path.islink(path):
+                contents[rel_path] = ('link', os.readlink(path))
+            elif os.path.isdir(path):
+                contents[rel_path] = ('dir', None)
+            else:
+                with open(path, 'rb') as file:
+                    contents[rel_path] = ('file', file.read())
+    return contents
+
+
+def _set_mtime(path, mtime):
+    os.utime(path, (mtime, mtime), follow_symlinks=False)
+
+
+def test_sync_new_tree(tmp_path):
+    src = tmp_path / 'src'
+    _make_tree(src)
+    dest = tmp_path / 'dest'
+
+    plan = CopyEngine().sync(str(src), str(dest))
+
+    assert plan.returnbool
+    assert _tree_contents(dest) == _tree_contents(src)
+    assert len(plan.copy) == 4
+    assert os.stat(dest / 'dir' / 'b.bin').st_mtime_ns == os.stat(src / 'dir' / 'b.bin').st_mtime_ns
+
+
+def test_sync_copies_only_changes(tmp_path):
+    src = tmp_path / 'src'
+    _make_tree(src)
+    dest = tmp_path / 'dest'
+    engine = CopyEngine()
+    engine.sync(str(src), str(dest))
+
+    assert engine.sync(str(src), str(dest)).copy == []
+
+    # As datas são comparadas em segundos inteiros, como no rsync.
+    (src / 'dir' / 'sub' / 'c.txt').write_bytes(b'changed')
+    _set_mtime(src / 'dir' / 'sub' / 'c.txt', os.stat(dest / 'dir' / 'sub' / 'c.txt').st_mtime - 10)
+    (src / 'new.txt').write_bytes(b'new')
+    plan = engine.sync(str(src), str(dest))
+
+    assert sorted(os.path.relpath(s, src) for s, _ in plan.copy) == [os.path.join('dir', 'sub', 'c.txt'), 'new.txt']
+    assert _tree_contents(dest) == _tree_contents(src)
+
+
+def test_sync_checksum_detects_same_size_and_mtime(tmp_path):
+    src = tmp_path / 'src'
+    _make_tree(src)
+    dest = tmp_path / 'dest'
+    engine = CopyEngine()
+    engine.sync(str(src), str(dest))
+
+    # Mesmo tamanho e mesma data: só a comparação do conteúdo detecta a alteração.
+    mtime = os.stat(dest / 'a.txt').st_mtime
+    (dest / 'a.txt').write_bytes(b'ALPHA')
+    _set_mtime(dest / 'a.txt', mtime)
+
+    assert engine.sync(str(src), str(dest)).copy == []
+    plan = engine.sync(str(src), str(dest), checksum=True)
+    assert plan.copy == [(str(src / 'a.txt'), str(dest / 'a.txt'))]
+    assert (dest / 'a.txt').read_bytes() == b'alpha'
+
+
+def test_sync_delete_and_dry_run(tmp_path):
+    src = tmp_path / 'src'
+    _make_tree(src)
+    dest = tmp_path / 'dest'
+    engine = CopyEngine()
+    engine.sync(str(src), str(dest))
+    (dest / 'extra.txt').write_bytes(b'extra')
+    (dest / 'extra_dir').mkdir()
+    shutil.rmtree(src / 'dir' / 'sub')
+
+    plan = engine.sync(str(src), str(dest), delete=True, dry_run=True)
+    assert sorted(plan.delete) == sorted(
+        [str(dest / 'extra.txt'), str(dest / 'extra_dir'), str(dest / 'dir' / 'sub')]
+    )
+    assert (dest / 'extra.txt').exists()
+
+    assert engine.sync(str(src), str(dest), delete=True).returnbool
+    assert _tree_contents(dest) == _tree_contents(src)
+
+
+def test_sync_replaces_file_with_directory(tmp_path):
+    src = tmp_path / 'src'
+    _make_tree(src)
+    dest = tmp_path / 'dest'
+    dest.mkdir()
+    (dest / 'dir').write_bytes(b'not a directory')
+
+    assert CopyEngine().sync(str(src), str(dest)).returnbool
+    assert _tree_contents(dest) == _tree_contents(src)
+
+
+def test_shellcore_sync(tmp_path):
+    src = tmp_path / 'src'
+    _make_tree(src)
+    dest = tmp_path / 'dest'
+
+    plan = PythonShellCore().sync(str(src), str(dest))
+
+    assert plan.returnbool
+    assert _tree_contents(dest) == _tree_contents(src)
+
+
+@pytest.mark.skipif(shutil.which('rsync') is None, reason='rsync não está disponível')
+def test_linux_shellcore_sync(tmp_path):
+    src = tmp_path / 'src'
+    _make_tree(src)
+    dest = tmp_path / 'dest'
+
+    plan = LinuxShellCore().sync(str(src), str(dest))
+
+    assert plan is not None
+    assert _tree_contents(dest) == _tree_contents(src)
+    assert len(plan.copy) == 4
+
+
+@pytest.mark.parametrize('dry_run', [True, False])
+def test_sync_reports_special_files(tmp_path, dry_run):
+    src = tmp_path / 'src'
+    _make_tree(src)
+    os.mkfifo(src / 'dir' / 'fifo')
+    dest = tmp_path / 'dest'
+
+    plan = CopyEngine().sync(str(src), str(dest), dry_run=dry_run)
+
+    assert all(os.path.basename(path) != 'fifo' for path, _ in plan.copy)
+    assert [path for path, _ in plan.errors] == [str(src / 'dir' / 'fifo')]
+    assert isinstance(plan.errors[0][1], shutil.SpecialFileError)
+    assert not os.path.lexists(dest / 'dir' / 'fifo')
+    if not dry_run:
+        assert (dest / 'dir' / 'b.bin').read_bytes() == (src / 'dir' / 'b.bin').read_bytes()
@@ -0,0 +1,259 @@
+import hashlib
+import io
+import os
+import subprocess
+import tarfile
+import zipfile
+
+import pytest
+
+from cmdlib import unpack
+from cmdlib.__main__ import StreamUnpack, unpack_stream
+
+
+def _make_zip(path, files, *, compression=zipfile.ZIP_DEFLATED):
+    with zipfile.ZipFile(path, 'w', compression=compression) as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    return path
+
+
+def _read_tree(root):
+    contents = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            with open(path, 'rb') as file:
+                contents[os.path.relpath(path, root).replace(os.sep, '/')] = file.read()
+    return contents
+
+
+FILES = {
+    'top.txt': b'top',
+    'dir/a.bin': os.urandom(50000),
+    'dir/sub/b.txt': b'b' * 10000,
+    'other/c.txt': b'',
+}
+
+
+def test_zip_parallel(tmp_path):
+    archive = _make_zip(tmp_path / 'files.zip', FILES)
+    output = tmp_path / 'out'
+
+    assert unpack(str(archive), output_dir=str(output), verbose=False, max_workers=3)
+    assert _read_tree(output) == FILES
+
+
+def test_zip_parallel_unsupported_compression(tmp_path, capsys):
+    archive = _make_zip(tmp_path / 'files.zip', FILES, compression=zipfile.ZIP_STORED)
+    # Trocar o método de compressão (cabeçalhos locais e diretório central) por um
+    # método que o zipfile não suporta.
+    data = bytearray(archive.read_bytes())
+    for signature, offset in ((b'PK\x03\x04', 8), (b'PK\x01\x02', 10)):
+        start = data.find(signature)
+        while start != -1:
+            data[start + offset:start + offset + 2] = (99).to_bytes(2, 'little')
+            start = data.find(signature, start + 4)
+    archive.write_bytes(bytes(data))
+
+    assert unpack(str(archive), output_dir=str(tmp_path / 'out'), verbose=False, max_workers=2) is False
+    assert 'not supported' in capsys.readouterr().out
+
+
+def test_zip_parallel_corrupted_data(tmp_path, capsys):
+    files = {f'f{i}.bin': os.urandom(1000) * 5 for i in range(8)}
+    archive = _make_zip(tmp_path / 'files.zip', files)
+    # Corromper os dados comprimidos de um membro: o zlib levanta zlib.error.
+    info = zipfile.ZipFile(archive).getinfo('f3.bin')
+    data = bytearray(archive.read_bytes())
+    start = info.header_offset + 30 + len(info.filename) + 2
+    for i in range(start, start + 40):
+        data[i] ^= 0xff
+    archive.write_bytes(bytes(data))
+
+    assert unpack(str(archive), output_dir=str(tmp_path / 'out'), verbose=False, max_workers=4) is False
+    assert 'decompressing data' in capsys.readouterr().out
+
+
+def _make_tar(path, files, *, mode='w:gz'):
+    with tarfile.open(path, mode) as archive:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return path
+
+
+class _WriteOnly(object):
+    """Arquivo sem seek/tell: o zipfile grava os membros com data descriptor."""
+    def __init__(self, file):
+        self.file = file
+
+    def write(self, data):
+        return self.file.write(data)
+
+    def flush(self):
+        self.file.flush()
+
+
+@pytest.mark.parametrize('mode', ['w', 'w:gz', 'w:bz2', 'w:xz'])
+def test_stream_unpack_tar_from_pipe(tmp_path, mode):
+    archive = _make_tar(tmp_path / 'files.tar', FILES, mode=mode)
+    output = tmp_path / 'out'
+
+    with subprocess.Popen(['cat', str(archive)], stdout=subprocess.PIPE) as proc:
+        unpack_file = StreamUnpack(output_dir=str(output))
+        assert unpack_file.unpack_stream(proc.stdout)
+
+    assert _read_tree(output) == FILES
+    assert unpack_file.files == len(FILES)
+    assert unpack_file.bytes_written == sum(len(data) for data in FILES.values())
+    assert unpack_file.bytes_read == os.path.getsize(archive)
+
+
+@pytest.mark.parametrize('compression', [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED, zipfile.ZIP_BZIP2])
+def test_stream_unpack_zip(tmp_path, compression):
+    archive = _make_zip(tmp_path / 'files.zip', FILES, compression=compression)
+    output = tmp_path / 'out'
+
+    with open(archive, 'rb') as stream:
+        assert unpack_stream(stream, output_dir=str(output))
+    assert _read_tree(output) == FILES
+
+
+def test_stream_unpack_zip_with_data_descriptor(tmp_path):
+    archive = tmp_path / 'files.zip'
+    with open(archive, 'wb') as file:
+        with zipfile.ZipFile(_WriteOnly(file), 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+            for name, data in FILES.items():
+                zf.writestr(name, data)
+    output = tmp_path / 'out'
+
+    with open(archive, 'rb') as stream:
+        assert unpack_stream(stream, output_dir=str(output), format='zip')
+    assert _read_tree(output) == FILES
+
+
+def test_stream_unpack_skips_unsafe_members(tmp_path):
+    archive = tmp_path / 'evil.tar'
+    with tarfile.open(archive, 'w') as tar:
+        for name in ('../evil.txt', '/tmp/cmdlib-evil.txt', 'good.txt'):
+            info = tarfile.TarInfo(name)
+            info.size = 4
+            tar.addfile(info, io.BytesIO(b'data'))
+        info = tarfile.TarInfo('link')
+        info.type = tarfile.SYMTYPE
+        info.linkname = '../../etc/passwd'
+        tar.addfile(info)
+    output = tmp_path / 'out'
+
+    unpack_file = StreamUnpack(output_dir=str(output))
+    with open(archive, 'rb') as stream:
+        unpack_file.unpack_stream(stream)
+
+    # Caminhos absolutos são extraídos dentro de output_dir (como o tar).
+    assert _read_tree(output) == {'good.txt': b'data', 'tmp/cmdlib-evil.txt': b'data'}
+    assert not (tmp_path / 'evil.txt').exists()
+    assert not os.path.exists('/tmp/cmdlib-evil.txt')
+    assert sorted(name for name, _ in unpack_file.skipped) == ['../evil.txt', 'link']
+
+
+def test_stream_unpack_unknown_format(tmp_path):
+    unpack_file = StreamUnpack(output_dir=str(tmp_path / 'out'))
+
+    assert unpack_file.unpack_stream(io.BytesIO(b'not an archive' * 100)) is False
+
+
+@pytest.mark.parametrize('name, make', [
+    ('files.tar.gz', lambda path: _make_tar(path, FILES)),
+    ('files.zip', lambda path: _make_zip(path, FILES)),
+])
+def test_unpack_with_matching_hashes(tmp_path, name, make):
+    archive = make(tmp_path / name)
+    output = tmp_path / 'out'
+    hashes = {
+        'sha256': hashlib.sha256(archive.read_bytes()).hexdigest(),
+        'md5': hashlib.md5(archive.read_bytes()).hexdigest().upper(),
+    }
+
+    assert unpack(str(archive), output_dir=str(output), verbose=False, hashes=hashes)
+    assert _read_tree(output) == FILES
+    # Nenhum diretório temporário fica em output_dir.
+    assert sorted(os.listdir(output)) == ['dir', 'other', 'top.txt']
+
+
+@pytest.mark.parametrize('name, make', [
+    ('files.tar.gz', lambda path: _make_tar(path, FILES)),
+    ('files.zip', lambda path: _make_zip(path, FILES)),
+])
+def test_unpack_with_wrong_hash_is_rolled_back(tmp_path, name, make):
+    archive = make(tmp_path / name)
+    output = tmp_path / 'out'
+    output.mkdir()
+    (output / 'existing.txt').write_bytes(b'keep')
+
+    assert unpack(str(archive), output_dir=str(output), verbose=False, hashes={'sha256': '0' * 64}) is False
+    assert _read_tree(output) == {'existing.txt': b'keep'}
+    assert os.listdir(output) == ['existing.txt']
+
+
+def test_unpack_hashes_for_other_formats_checked_first(tmp_path):
+    path = tmp_path / 'data.bin'
+    path.write_bytes(b'not an archive')
+    output = tmp_path / 'out'
+
+    assert unpack(str(path), output_dir=str(output), verbose=False, hashes={'sha256': '0' * 64}) is False
+    assert not output.exists()
+
+
+def test_unpack_unknown_hash_algorithm(tmp_path):
+    archive = _make_tar(tmp_path / 'files.tar.gz', FILES)
+
+    assert unpack(
+        str(archive), output_dir=str(tmp_path / 'out'), verbose=False, hashes={'nohash': '00'}
+    ) is False
+
+
+def _corrupt_member(archive, name):
+    """Corrompe os dados comprimidos do membro name: o zlib levanta zlib.error."""
+    info = zipfile.ZipFile(archive).getinfo(name)
+    data = bytearray(archive.read_bytes())
+    start = info.header_offset + 30 + len(info.filename) + 2
+    for i in range(start, start + 40):
+        data[i] ^= 0xff
+    archive.write_bytes(bytes(data))
+
+
+def test_stream_unpack_zip_corrupted_data(tmp_path, capsys):
+    archive = _make_zip(tmp_path / 'files.zip', {'a.bin': os.urandom(1000) * 5})
+    _corrupt_member(archive, 'a.bin')
+
+    assert unpack(str(archive), output_dir=str(tmp_path / 'out'), verbose=False, engine='stream') is False
+    assert 'decompressing data' in capsys.readouterr().out
+
+
+def test_unpack_with_hashes_corrupted_data_leaves_no_staging_dir(tmp_path):
+    archive = _make_zip(tmp_path / 'files.zip', {'a.bin': os.urandom(1000) * 5})
+    _corrupt_member(archive, 'a.bin')
+    output = tmp_path / 'out'
+    hashes = {'sha256': hashlib.sha256(archive.read_bytes()).hexdigest()}
+
+    assert unpack(str(archive), output_dir=str(output), verbose=False, hashes=hashes) is False
+    assert os.listdir(output) == []
+
+
+def test_unexpected_error_restores_output_dir(tmp_path, monkeypatch):
+    archive = _make_zip(tmp_path / 'files.zip', FILES)
+    output = tmp_path / 'out'
+    unpack_file = StreamUnpack(output_dir=str(output), hashes={'sha256': '0' * 64})
+
+    def fail(reader):
+        raise RuntimeError('falha inesperada')
+
+    monkeypatch.setattr(unpack_file, '_unpack_zip', fail)
+    with open(archive, 'rb') as stream, pytest.raises(RuntimeError):
+        unpack_file.unpack_stream(stream)
+
+    assert unpack_file.output_dir == str(output)
+    assert unpack_file.returnbool is False
+    assert os.listdir(output) == []